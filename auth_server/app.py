@@ -1,16 +1,20 @@
 import jwt
 import datetime
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 # 우리가 만든 db.py와 models.py에서 필요한 것들을 가져옵니다.
-from common.database import get_user_by_username, add_user
+from common.database import get_user_by_username_async, add_user_async, update_user_password_async, dispose_async_engine
 from common.models import User
-from common.redis_config import get_session_redis
-# 1. 비밀번호 암호화 도구 설정 (bcrypt 알고리즘 사용)
-#pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from common.redis_config import get_session_redis_async, close_redis_clients
+from common.session_cache import publish_session_invalidation
+from common import metrics # Prometheus 계측 (/metrics)
+from common import tracing # X-Request-ID + Server-Timing
+# 1. 비밀번호 해싱 (argon2id/bcrypt) 은 이벤트 루프가 아닌 크기 제한된 스레드 풀에서 실행합니다.
+import passwords
+# 2. JWT 서명 키 (EdDSA/RS256). 공개키는 /auth/.well-known/jwks.json 으로 공개해 게이트웨이가 직접 검증합니다.
+import keys
 app = FastAPI()
 
 app.add_middleware(
@@ -20,11 +24,38 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.setup(app, "auth")
+tracing.setup(app, "auth")
 
-SECRET_KEY = 'dev-jwt-secret'
-ALGORITHM = "HS256"
+key_ring = keys.KeyRing()
+JWKS_CACHE_CONTROL = "public, max-age=300"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+@app.on_event("startup")
+async def startup_event():
+    passwords.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    passwords.shutdown()
+    await dispose_async_engine()
+    await close_redis_clients()
+
+def password_pool_busy() -> HTTPException:
+    # 해시 대기열이 가득 차면 줄을 세우지 않고 바로 거절해 다른 요청의 지연을 지킵니다.
+    return HTTPException(status_code=503, detail="로그인 요청이 많습니다. 잠시 후 다시 시도해주세요.", headers={"Retry-After": "1"})
+
+@app.get("/auth/.well-known/jwks.json")
+async def get_jwks(response: Response):
+    """토큰 검증용 공개키 묶음 (교체 중에는 이전 키와 새 키가 함께 들어 있습니다)"""
+    response.headers["Cache-Control"] = JWKS_CACHE_CONTROL
+    return key_ring.jwks()
+
+@app.get("/metrics/password-pool")
+async def get_password_pool_metrics():
+    """비밀번호 해시 풀 설정과 현재 대기 수"""
+    return passwords.stats()
+
 # --- 데이터 모델 정의 ---
 class LoginRequest(BaseModel):
     username: str
@@ -40,32 +71,42 @@ class RegisterRequest(BaseModel):
 @app.post('/auth/register')
 async def register(req: RegisterRequest):
     # 1. 중복 체크 (DB에 이미 이 아이디가 있는지 확인)
-    existing_user = get_user_by_username(req.username)
+    existing_user = await get_user_by_username_async(req.username)
     if existing_user:
         raise HTTPException(status_code=400, detail="이미 존재하는 아이디입니다.")
 
     # 2. 비밀번호 해싱 (C++의 암호화 함수 호출과 같습니다)
-    # 사용자가 친 '1234'를 '$2b$12$...' 형태의 암호문으로 바꿉니다.
-    #hashed_password = pwd_context.hash(req.password)
+    # 사용자가 친 '1234'를 '$argon2id$...' 형태의 암호문으로 바꿉니다.
+    try:
+        hashed_password = await passwords.hash_password(req.password)
+    except passwords.PasswordPoolBusyError:
+        raise password_pool_busy()
 
     # 3. DB 객체 생성 및 저장
     new_user_data = User(
         username=req.username,
-        password=req.password,
+        password=hashed_password,
         full_name=req.full_name,
         email=req.email
     )
     
-    saved_user = add_user(new_user_data)
+    saved_user = await add_user_async(new_user_data)
     
     return {"message": "회원가입 성공!", "id": saved_user.id}
 
 # --- [API 2] 로그인 (Login) ---
 @app.post('/auth/login')
 async def login(req: LoginRequest):
-    user = get_user_by_username(req.username)
-    if not user or req.password != user.password:
+    user = await get_user_by_username_async(req.username)
+    try:
+        verified, new_hash = await passwords.verify_password(req.password, user.password if user else None)
+    except passwords.PasswordPoolBusyError:
+        raise password_pool_busy()
+    if not verified:
         raise HTTPException(status_code=401, detail="인증 실패")
+    if new_hash:
+        # 평문으로 저장돼 있던 비밀번호나 옛 파라미터 해시는 로그인에 성공한 이 시점에 교체합니다.
+        await update_user_password_async(user.id, new_hash)
 
     # 1. JWT 토큰 발행
     payload = {
@@ -73,28 +114,30 @@ async def login(req: LoginRequest):
         'id': user.id,
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)
     }
-    token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+    token = key_ring.sign(payload)
 
     # 2. Redis(Sentinel)에 세션 저장
-    r_session = get_session_redis()
+    r_session = get_session_redis_async()
     # 유저 ID를 키로 저장 (토큰 유효기간과 동일하게 1시간 설정)
-    r_session.setex(f"session:{user.id}", 3600, "active") 
+    await r_session.setex(f"session:{user.id}", 3600, "active") 
 
     return {'token': token}
 
 @app.post('/auth/logout')
 async def logout(token: str = Depends(oauth2_scheme)):
     try:
-        # 1. 토큰 해독 (Auth Server의 SECRET_KEY 사용)
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        # 1. 토큰 해독 (이 서버가 공개한 키 중 토큰의 kid 에 해당하는 공개키로 검증)
+        payload = key_ring.decode(token)
         user_id = payload.get("id")
         
         if user_id is None:
             raise HTTPException(status_code=401, detail="유효하지 않은 토큰입니다.")
 
         # 2. Redis(Sentinel)에서 세션 삭제
-        r_session = get_session_redis()
-        r_session.delete(f"session:{user_id}")
+        r_session = get_session_redis_async()
+        await r_session.delete(f"session:{user_id}")
+        # 3. 각 워커의 세션 near-cache 에서도 즉시 제거되도록 알림
+        await publish_session_invalidation(user_id)
         
         return {"message": "로그아웃 성공"}
         
@@ -0,0 +1,153 @@
+"""
+JWT 서명 키 관리 (auth_server)
+
+JWT_KEYS_DIR 의 개인키들을 읽어 가장 최근 키로 서명하고, 모든 키의 공개키를 JWKS 로 공개합니다.
+키 교체는 rotate_keys.py 로 하며, 디렉터리가 바뀌면 JWT_KEYS_RELOAD_SECONDS 안에 다시 읽습니다.
+"""
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+# 파일 하나에 PEM 개인키 하나, 파일 이름은 <kid>.pem (k8s 에서는 jwt-signing-keys Secret 을 여기에 마운트)
+JWT_KEYS_DIR = os.environ.get("JWT_KEYS_DIR", "/app/keys")
+# 새로 만드는 키의 알고리즘: EdDSA (Ed25519) 또는 RS256 (RSA 2048)
+JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM", "EdDSA")
+# 키 추가/삭제를 확인하려고 디렉터리를 다시 보는 주기(초)
+JWT_KEYS_RELOAD_SECONDS = float(os.environ.get("JWT_KEYS_RELOAD_SECONDS", "30"))
+# 새 키는 JWKS 에 바로 공개되지만 이 시간(초)이 지나야 서명에 쓰입니다.
+# 그 kid 를 단 토큰이 나오기 전에 모든 auth 레플리카와 게이트웨이가 새 키를 받아 두도록
+JWT_KEY_ACTIVATION_DELAY = float(os.environ.get("JWT_KEY_ACTIVATION_DELAY", "120"))
+
+KID_FORMAT = "%Y%m%dT%H%M%SZ"
+_KID_RE = re.compile(r"^\d{8}T\d{6}Z$")
+
+
+def algorithm_for(private_key) -> str:
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return "EdDSA"
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return "RS256"
+    raise ValueError(f"Unsupported key type: {type(private_key).__name__}")
+
+
+def generate_private_key(algorithm: str = JWT_ALGORITHM):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    raise ValueError(f"Unsupported JWT_ALGORITHM: {algorithm}")
+
+
+def private_key_pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+def new_kid() -> str:
+    """kid 는 키를 만든 UTC 시각이라 kid 순서가 곧 만든 순서입니다."""
+    return datetime.now(timezone.utc).strftime(KID_FORMAT)
+
+
+def _created_at(kid: str) -> Optional[float]:
+    if not _KID_RE.match(kid):
+        return None
+    return datetime.strptime(kid[:16], KID_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+class SigningKey:
+    def __init__(self, kid: str, private_key):
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self.algorithm = algorithm_for(private_key)
+        self.created_at = _created_at(kid)
+
+    def jwk(self) -> dict:
+        to_jwk = OKPAlgorithm.to_jwk if self.algorithm == "EdDSA" else RSAAlgorithm.to_jwk
+        return {**json.loads(to_jwk(self.public_key)), "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+class KeyRing:
+    """
+    JWT_KEYS_DIR 의 키 묶음. 디렉터리가 바뀌면 다시 읽습니다.
+    모든 키를 공개하고, JWT_KEY_ACTIVATION_DELAY 가 지난 키 중 가장 최근 키로 서명합니다.
+    키 파일이 하나도 없으면(로컬 개발) 메모리에 키를 하나 만들며, 이때는 auth_server 가 한 대일 때만 동작합니다.
+    """
+
+    def __init__(self, directory: str = JWT_KEYS_DIR):
+        self.directory = directory
+        self.keys: Dict[str, SigningKey] = {}
+        self._signature = None
+        self._checked_at = float("-inf")
+        self.reload()
+
+    def _scan(self) -> List[tuple]:
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith(".pem"))
+        except FileNotFoundError:
+            return []
+        # k8s Secret 볼륨은 갱신할 때 심볼릭 링크를 바꿔 끼우는데, os.stat 은 링크를 따라가므로 mtime 도 바뀝니다.
+        return [(name, os.stat(os.path.join(self.directory, name)).st_mtime) for name in names]
+
+    def reload(self):
+        signature = self._scan()
+        self._checked_at = time.monotonic()
+        if signature == self._signature and self.keys:
+            return
+        keys = {}
+        for name, _ in signature:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    key = SigningKey(name[:-len(".pem")], serialization.load_pem_private_key(f.read(), password=None))
+            except (OSError, ValueError) as e:
+                print(f"JWT keys: skipping {path}: {e}")
+                continue
+            keys[key.kid] = key
+        if not keys:
+            if self.keys:
+                return  # 모두 로그인할 수 없게 되느니 이전 키를 그대로 씁니다.
+            print(f"JWT keys: no keys in {self.directory}, using an in-memory {JWT_ALGORITHM} key (single replica only)")
+            key = SigningKey("ephemeral-" + uuid.uuid4().hex[:8], generate_private_key())
+            keys[key.kid] = key
+        self.keys = keys
+        self._signature = signature
+        print(f"JWT keys: loaded {sorted(keys)}, signing with {self.active.kid}")
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._checked_at >= JWT_KEYS_RELOAD_SECONDS:
+            self.reload()
+
+    @property
+    def active(self) -> SigningKey:
+        ordered = sorted(self.keys.values(), key=lambda key: key.kid)
+        now = time.time()
+        ready = [key for key in ordered if key.created_at is None or key.created_at + JWT_KEY_ACTIVATION_DELAY <= now]
+        return (ready or ordered)[-1]
+
+    def sign(self, payload: dict) -> str:
+        self._maybe_reload()
+        key = self.active
+        return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def decode(self, token: str, **options) -> dict:
+        """이 키 묶음(공개 중인 아무 키)으로 발급한 토큰을 검증합니다. 실패하면 jwt.PyJWTError"""
+        self._maybe_reload()
+        key = self.keys.get(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm], **options)
+
+    def jwks(self) -> dict:
+        self._maybe_reload()
+        return {"keys": [key.jwk() for key in sorted(self.keys.values(), key=lambda key: key.kid)]}
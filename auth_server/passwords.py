@@ -0,0 +1,117 @@
+"""
+비밀번호 해시 / 검증 (auth_server)
+
+해시 계산은 CPU 를 오래 쓰므로 이벤트 루프가 아닌 크기가 정해진 스레드 풀에서 실행하고,
+대기열이 가득 차면 기다리게 하지 않고 바로 PasswordPoolBusyError(503)로 거절합니다.
+"""
+import asyncio
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# 새 해시의 방식: argon2 (argon2id) 또는 bcrypt. 다른 방식의 해시도 검증되며,
+# 다음 로그인에 성공하면 현재 방식/파라미터로 다시 저장됩니다.
+PASSWORD_SCHEME = os.environ.get("PASSWORD_SCHEME", "argon2")
+# 비용 파라미터. bench/password_hashing.py 로 목표 로그인 처리량에 맞춰 조정합니다.
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", "19456"))  # KiB
+ARGON2_PARALLELISM = int(os.environ.get("ARGON2_PARALLELISM", "1"))
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+
+# argon2-cffi 와 bcrypt 는 해시하는 동안 GIL 을 놓으므로 스레드가 실제로 병렬 실행됩니다.
+PASSWORD_WORKERS = int(os.environ.get("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 프로세스당 실행 중 + 대기 중인 해시 작업의 최대 수. 넘으면 로그인은 503
+PASSWORD_QUEUE_LIMIT = int(os.environ.get("PASSWORD_QUEUE_LIMIT", str(PASSWORD_WORKERS * 8)))
+
+_executor = None
+_pending = 0
+_dummy_hash = None
+
+
+class PasswordPoolBusyError(RuntimeError):
+    """해시 작업이 이미 PASSWORD_QUEUE_LIMIT 개 쌓여 있을 때"""
+
+
+def build_context(scheme: str = PASSWORD_SCHEME, **overrides) -> CryptContext:
+    """설정된 파라미터의 CryptContext (overrides 는 튜닝 벤치마크에서 사용)"""
+    schemes = [scheme] + [other for other in ("argon2", "bcrypt") if other != scheme]
+    settings = {
+        "argon2__type": "ID",
+        "argon2__time_cost": ARGON2_TIME_COST,
+        "argon2__memory_cost": ARGON2_MEMORY_COST,
+        "argon2__parallelism": ARGON2_PARALLELISM,
+        "bcrypt__rounds": BCRYPT_ROUNDS,
+    }
+    settings.update(overrides)
+    # deprecated="auto": 기본 방식이 아니거나 파라미터가 예전 값이면 needs_update
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+
+pwd_context = build_context()
+
+
+def start():
+    """스레드 풀을 만듭니다. (앱 시작 시 호출)"""
+    global _executor, _dummy_hash
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+    if _dummy_hash is None:
+        _dummy_hash = pwd_context.hash(os.urandom(16).hex())
+
+
+def shutdown():
+    """스레드 풀을 멈춥니다. (앱 종료 시 호출)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run(func, *args):
+    global _pending
+    if _pending >= PASSWORD_QUEUE_LIMIT:
+        raise PasswordPoolBusyError(f"{_pending} password jobs already queued")
+    start()
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    """새 비밀번호를 풀에서 해시합니다. 대기열이 가득 차면 PasswordPoolBusyError"""
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    로그인 비밀번호를 저장된 값과 비교합니다.
+    반환값: (일치 여부, new_hash). 예전 평문 비밀번호, 다른 방식, 현재 설정보다 약한 파라미터처럼
+    행을 다시 써야 하면 new_hash 에 새 해시가 들어 있습니다.
+    stored=None(없는 유저)이어도 해시를 한 번 계산해 응답 시간으로 아이디 존재 여부가 드러나지 않게 합니다.
+    """
+    if stored is None:
+        start()
+        await _run(pwd_context.verify, password, _dummy_hash)
+        return False, None
+    if pwd_context.identify(stored) is None:
+        # 해시를 쓰기 전에 가입한 유저의 행에는 평문 비밀번호가 들어 있습니다.
+        if not hmac.compare_digest(password.encode(), stored.encode()):
+            return False, None
+        return True, await hash_password(password)
+    return await _run(pwd_context.verify_and_update, password, stored)
+
+
+def stats():
+    """풀 설정과 현재 대기 중인 작업 수"""
+    return {
+        "scheme": PASSWORD_SCHEME,
+        "workers": PASSWORD_WORKERS,
+        "queue_limit": PASSWORD_QUEUE_LIMIT,
+        "pending": _pending,
+    }
@@ -0,0 +1,46 @@
+"""
+JWT 서명 키 교체: 새 키를 만들고, 오래된 키는 --retain 개만 남기고 지웁니다.
+
+새 키는 JWKS 에 바로 공개되지만 JWT_KEY_ACTIVATION_DELAY(기본 120초)가 지나야 서명에 쓰입니다.
+이전 키는 그 키로 발급된 토큰이 만료될 때까지(1시간) 공개돼 있어야 하므로 --retain 은 2 이상으로 둡니다.
+
+사용 예:
+    python rotate_keys.py --dir ./keys                      # EdDSA 키 추가, 최근 2개 유지
+    python rotate_keys.py --dir ./keys --algorithm RS256 --retain 3
+
+k8s 에서는 로컬 디렉터리에서 교체한 뒤 Secret 을 갱신하면 auth-server 가 JWT_KEYS_RELOAD_SECONDS 안에 다시 읽습니다.
+    kubectl create secret generic jwt-signing-keys --from-file=./keys --dry-run=client -o yaml | kubectl apply -f -
+"""
+import argparse
+import os
+
+import keys
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=keys.JWT_KEYS_DIR, help="키 디렉터리 (JWT_KEYS_DIR)")
+    parser.add_argument("--algorithm", choices=("EdDSA", "RS256"), default=keys.JWT_ALGORITHM)
+    parser.add_argument("--retain", type=int, default=2, help="새 키를 포함해 남길 키 개수")
+    args = parser.parse_args()
+    if args.retain < 1:
+        parser.error("--retain must be at least 1")
+
+    os.makedirs(args.dir, exist_ok=True)
+    kid = keys.new_kid()
+    path = os.path.join(args.dir, f"{kid}.pem")
+    # 개인키이므로 소유자만 읽을 수 있게 만듭니다. (kid 는 초 단위 시각이라 같은 초에 두 번 만들 수 없음)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        parser.error(f"{path} already exists, retry in a second")
+    with os.fdopen(fd, "wb") as f:
+        f.write(keys.private_key_pem(keys.generate_private_key(args.algorithm)))
+    print(f"created {path} ({args.algorithm})")
+
+    existing = sorted(name for name in os.listdir(args.dir) if name.endswith(".pem"))
+    for name in existing[:-args.retain]:
+        os.remove(os.path.join(args.dir, name))
+        print(f"removed {name}")
+
+if __name__ == "__main__":
+    main()
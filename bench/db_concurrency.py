@@ -0,0 +1,95 @@
+"""
+DB 동시성 벤치마크: 느린 쿼리 하나가 있을 때 빠른 조회 처리량 비교
+
+동기 헬퍼(list_employees)를 async 핸들러 안에서 직접 호출하면 느린 쿼리가 이벤트 루프를 막아
+같은 워커의 다른 요청이 모두 멈춥니다. 비동기 헬퍼(list_employees_async)는 그렇지 않습니다.
+
+실행 (프로젝트 루트에서):
+    python bench/db_concurrency.py --duration 3 --concurrency 20
+로컬 SQLite 파일을 사용하므로 MySQL/Redis 없이 동작합니다.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_db_file = os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file}")
+os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{_db_file}")
+
+from sqlalchemy import text  # noqa: E402
+from common import database  # noqa: E402
+from common.models import Employee, User  # noqa: E402
+
+# SQLite 에서 약 0.5초 정도 걸리는 CPU 바운드 쿼리 (MySQL 의 느린 쿼리 대용)
+SLOW_SQL = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+    "SELECT count(*) FROM c"
+)
+
+def seed(rows: int) -> int:
+    database.create_db_and_tables()
+    user = database.add_user(User(username=f"bench-{time.time_ns()}", password="x"))
+    for i in range(rows):
+        database.add_employee(Employee(
+            full_name=f"Employee {i}", location="Seoul", job_title="Engineer",
+            badges="", owner_id=user.id
+        ))
+    return user.id
+
+def slow_sync(n: int):
+    with database.engine.connect() as conn:
+        conn.execute(SLOW_SQL, {"n": n}).scalar()
+
+async def slow_async(n: int):
+    async with database.get_async_engine().connect() as conn:
+        (await conn.execute(SLOW_SQL, {"n": n})).scalar()
+
+async def run(mode: str, owner_id: int, duration: float, concurrency: int, slow_n: int) -> dict:
+    done = 0
+    stop_at = time.perf_counter() + duration
+
+    async def fast_worker():
+        nonlocal done
+        while time.perf_counter() < stop_at:
+            if mode == "sync":
+                database.list_employees(owner_id)  # 기존 방식: 루프를 막습니다.
+                await asyncio.sleep(0)
+            else:
+                await database.list_employees_async(owner_id)
+            done += 1
+
+    async def slow_worker():
+        while time.perf_counter() < stop_at:
+            if mode == "sync":
+                slow_sync(slow_n)
+                await asyncio.sleep(0)
+            else:
+                await slow_async(slow_n)
+
+    start = time.perf_counter()
+    await asyncio.gather(slow_worker(), *(fast_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"mode": mode, "requests": done, "seconds": round(elapsed, 2), "rps": round(done / elapsed, 1)}
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--slow-n", type=int, default=2_000_000, help="느린 쿼리 반복 횟수")
+    args = parser.parse_args()
+
+    owner_id = seed(args.rows)
+    for mode in ("sync", "async"):
+        result = await run(mode, owner_id, args.duration, args.concurrency, args.slow_n)
+        print(f"{result['mode']:>5}: {result['requests']} fast queries in {result['seconds']} s -> {result['rps']} req/s")
+    await database.dispose_async_engine()
+
+if __name__ == "__main__":
+    asyncio.run(main())
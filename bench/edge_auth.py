@@ -0,0 +1,125 @@
+"""
+잘못된 토큰 요청의 비용: 게이트웨이에서 거절(after) vs employee_server 까지 전달 후 거절(before)
+
+bench/load_test.py 의 로컬 스택(한 프로세스, SQLite, fakeredis)을 띄우고 GET /api/employee/employees 에
+토큰 없음 / 형식 오류 / 위조 서명 / 만료 토큰과 정상 토큰을 보내, 종류별 처리량·지연과
+employee_server 까지 도달한 요청 수를 JSON 으로 출력합니다.
+  before: GATEWAY_VERIFY_TOKENS=0 (게이트웨이는 그대로 전달, employee_server 가 토큰 검증)
+  after : GATEWAY_VERIFY_TOKENS=1 (게이트웨이가 캐시된 JWKS 로 검증, 통과한 요청만 신원 헤더와 함께 전달)
+
+실행 (프로젝트 루트에서):
+    python bench/edge_auth.py --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_test import ROOT, percentile, start_local_stack  # noqa: E402
+
+sys.path.insert(0, ROOT)
+from common import metrics  # noqa: E402
+
+URL = "/api/employee/employees"
+
+def employee_requests_seen() -> float:
+    """employee_server 가 처리한 요청 수 (같은 프로세스의 Prometheus 카운터)"""
+    return sum(
+        sample.value
+        for family in metrics.HTTP_REQUESTS.collect()
+        for sample in family.samples
+        if sample.name.endswith("_total") and sample.labels.get("service") == "employee"
+    )
+
+def make_tokens(key_ring, valid_token: str, user_id: int, username: str) -> dict:
+    claims = {"user": username, "id": user_id}
+    now = datetime.datetime.utcnow()
+    kid = key_ring.active.kid
+    forged = jwt.encode({**claims, "exp": now + datetime.timedelta(hours=1)},
+                        ed25519.Ed25519PrivateKey.generate(), algorithm="EdDSA", headers={"kid": kid})
+    expired = key_ring.sign({**claims, "exp": now - datetime.timedelta(minutes=5)})
+    return {
+        "missing": None,
+        "malformed": "not-a-jwt",
+        "forged": forged,
+        "expired": expired,
+        "valid": valid_token,
+    }
+
+async def run(client, token, requests: int, concurrency: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    latencies, statuses = [], {}
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get(URL, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    seen_before = employee_requests_seen()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "status": statuses,
+        "reached_employee_server": int(employee_requests_seen() - seen_before),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="토큰 종류·모드별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--output", help="결과 JSON 을 저장할 파일")
+    args = parser.parse_args()
+
+    results = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        gateway_app, apps = await start_local_stack(None)
+        gateway = sys.modules["bench_gateway"]
+        key_ring = sys.modules["bench_auth_server"].key_ring
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway_app), base_url="http://gateway") as client:
+                username, password = f"edge-{int(time.time())}", "bench-password"
+                await client.post("/api/auth/register", json={"username": username, "password": password})
+                login = await client.post("/api/auth/login", json={"username": username, "password": password})
+                token = login.json()["token"]
+                user_id = jwt.decode(token, options={"verify_signature": False})["id"]
+                tokens = make_tokens(key_ring, token, user_id, username)
+
+                for mode, verify in (("before", False), ("after", True)):
+                    gateway.GATEWAY_VERIFY_TOKENS = verify
+                    await run(client, tokens["valid"], 20, 1)  # 워밍업 (JWKS, 세션 near-cache)
+                    results[mode] = {
+                        kind: await run(client, value, args.requests, args.concurrency)
+                        for kind, value in tokens.items()
+                    }
+        finally:
+            for app in reversed(apps):
+                await app.router.shutdown()
+
+    result = {"config": {"requests": args.requests, "concurrency": args.concurrency, "url": URL}, **results}
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+직원 목록 직렬화 마이크로 벤치마크: 캐시 적중(hit) / 미스(miss) 경로의 응답 생성 시간
+
+  hit  이전: 캐시 JSON 을 json.loads -> response_model 검증 -> jsonable_encoder -> JSONResponse 로 재직렬화
+       현재: 캐시 JSON 문자열을 그대로 Response 본문으로 사용 (raw_json_response)
+  miss 이전: 행마다 EmployeePublic.from_orm -> .dict() -> json.dumps
+       현재: TypeAdapter 로 목록 전체를 한 번에 검증/직렬화 (serialize_employees)
+
+Redis/DB 왕복은 빼고 애플리케이션 코드가 쓰는 CPU 시간만 측정합니다.
+
+실행 (프로젝트 루트에서):
+    python bench/employee_serialization.py --sizes 10,1000,10000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "employee_server"))
+
+_db_file = os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file}")
+os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{_db_file}")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+import application  # noqa: E402
+from common.models import Employee, EmployeePublic  # noqa: E402
+
+# 이전 경로의 from_orm/.dict() 사용 경고는 측정과 무관하므로 숨깁니다.
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+def make_employees(count: int) -> list:
+    return [
+        Employee(
+            id=i + 1, full_name=f"Employee {i}", location="Seoul", job_title="Engineer",
+            badges="python,redis", owner_id=1, object_key=f"{i:064x}.png" if i % 2 else None,
+        )
+        for i in range(count)
+    ]
+
+def miss_before(employees: list) -> str:
+    employees_public_data = []
+    for employee in employees:
+        emp_public = EmployeePublic.from_orm(employee)
+        if employee.object_key:
+            emp_public.photo_url = application.get_photo_url_for_fastapi(employee.object_key)
+        employees_public_data.append(emp_public)
+    return json.dumps([e.dict() for e in employees_public_data])
+
+def miss_after(employees: list) -> str:
+    return application.serialize_employees(employees)
+
+def hit_before(cached: str) -> bytes:
+    # FastAPI 가 dict 반환값에 대해 하는 일: response_model 검증 -> JSON 호환 변환 -> JSONResponse 렌더링
+    validated = application.EMPLOYEE_LIST_ADAPTER.validate_python(json.loads(cached))
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+def hit_after(cached: str) -> bytes:
+    return application.raw_json_response(cached).body
+
+def measure(func, arg, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "max_ms": max(samples)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,10000", help="쉼표로 구분한 직원 수")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'path':>5} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        employees = make_employees(size)
+        cached = miss_after(employees)
+        assert json.loads(cached) == json.loads(miss_before(employees))
+        for path, before, after, arg in (
+            ("miss", miss_before, miss_after, employees),
+            ("hit", hit_before, hit_after, cached),
+        ):
+            b = measure(before, arg, args.repeat)["median_ms"]
+            a = measure(after, arg, args.repeat)["median_ms"]
+            print(f"{size:>6} {path:>5} {b:>12.3f} {a:>11.3f} {b / a if a else float('inf'):>7.1f}x")
+
+if __name__ == "__main__":
+    main()
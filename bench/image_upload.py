@@ -0,0 +1,101 @@
+"""
+이미지 업로드 벤치마크: 리사이즈를 이벤트 루프에서 직접 할 때 vs 프로세스 풀에서 할 때
+
+업로드가 몰리는 동안 다른(비업로드) 요청이 얼마나 지연되는지를, 이벤트 루프에서 10ms 마다
+처리되는 가벼운 작업의 지연(p50/p99)으로 측정하고 초당 업로드 처리량을 함께 출력합니다.
+
+실행 (프로젝트 루트에서):
+    python bench/image_upload.py --uploads 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "employee_server"))
+
+from PIL import Image  # noqa: E402
+import image_pool  # noqa: E402
+import util  # noqa: E402
+
+SIZE = (120, 160)
+
+def make_photo(width: int, height: int) -> bytes:
+    """휴대폰 사진과 비슷한 크기의 JPEG 를 만듭니다."""
+    image = Image.effect_noise((width, height), 64).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run(mode: str, photo: bytes, uploads: int, concurrency: int) -> dict:
+    latencies = []
+    done = asyncio.Event()
+
+    async def other_requests():
+        # 비업로드 요청 대용: 10ms 마다 깨어나 예정보다 얼마나 늦었는지 기록
+        while not done.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            latencies.append((time.perf_counter() - expected) * 1000)
+
+    queue = asyncio.Queue()
+    for _ in range(uploads):
+        queue.put_nowait(photo)
+
+    async def uploader():
+        while not queue.empty():
+            data = queue.get_nowait()
+            if mode == "inline":
+                util.resize_image(BytesIO(data), SIZE)  # 기존 방식: 이벤트 루프에서 직접 실행
+                await asyncio.sleep(0)
+            else:
+                while True:
+                    try:
+                        await image_pool.resize_image(data, SIZE)
+                        break
+                    except image_pool.ImagePoolBusyError:
+                        await asyncio.sleep(0.01)  # 503 을 받은 클라이언트의 재시도
+
+    probe = asyncio.create_task(other_requests())
+    start = time.perf_counter()
+    await asyncio.gather(*(uploader() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe
+    return {
+        "mode": mode,
+        "uploads_per_sec": round(uploads / elapsed, 1),
+        "other_p50_ms": round(statistics.median(latencies), 1),
+        "other_p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    args = parser.parse_args()
+
+    photo = make_photo(args.width, args.height)
+    print(f"photo: {args.width}x{args.height} JPEG, {len(photo) // 1024} KB, workers={image_pool.IMAGE_WORKERS}")
+    image_pool.start()
+    try:
+        for mode in ("inline", "pool"):
+            result = await run(mode, photo, args.uploads, args.concurrency)
+            print(f"{result['mode']:>6}: {result['uploads_per_sec']} uploads/s, "
+                  f"other requests p50 {result['other_p50_ms']} ms / p99 {result['other_p99_ms']} ms")
+    finally:
+        image_pool.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,327 @@
+"""
+전체 흐름 부하 테스트: frontend/app.js 의 사용자 흐름을 게이트웨이를 통해 재생합니다.
+
+가상 사용자마다 register -> login -> (list / get / save(사진 포함) / delete / photo 를 비율대로 반복) -> logout
+을 수행하고, 엔드포인트별 처리량과 p50/p95/p99 지연을 JSON 으로 출력합니다.
+성능 변경 전/후에 같은 옵션으로 돌려 결과 JSON 을 비교하는 용도입니다.
+
+기본은 네 서비스(gateway, auth_server, employee_server, photo_service)를 한 프로세스에 띄우고
+httpx ASGITransport 로 연결합니다. MySQL 대신 임시 SQLite, Redis 대신 fakeredis(또는 --redis-url),
+사진 저장소는 임시 디렉터리를 사용하므로 외부 의존성 없이 동작합니다.
+(모든 서비스와 부하 생성기가 이벤트 루프 하나를 공유하므로 절대값보다 전/후 비교에 쓰세요.)
+--base-url 을 주면 이미 떠 있는 게이트웨이(docker-compose 등)에 실제 HTTP 로 부하를 겁니다.
+
+실행 (프로젝트 루트에서):
+    python bench/load_test.py --duration 10 --concurrency 20
+    python bench/load_test.py --mix list=60,get=20,save=10,delete=5,photo=5 --output before.json
+    python bench/load_test.py --base-url http://localhost:5000 --duration 30
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from io import BytesIO
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_MIX = "list=50,get=25,save=15,delete=5,photo=5"
+OPERATIONS = ("list", "get", "save", "delete", "photo")
+LOCATIONS = ("Seoul", "Busan", "Incheon", "Daegu")
+JOB_TITLES = ("Engineer", "Designer", "Manager", "Analyst")
+BADGES = ("python", "redis", "k8s", "mysql", "fastapi")
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r} (choose from {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs at least one operation with a positive weight")
+    return mix
+
+
+def make_photo() -> bytes:
+    """휴대폰 사진보다 작은, 업로드 경로 전체(리사이즈 -> photo_service 저장)를 거치는 JPEG"""
+    from PIL import Image
+    image = Image.effect_noise((640, 480), 64).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# ---------------------------------------------------------------------------
+# 결과 수집
+# ---------------------------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)                       # 엔드포인트 -> [ms]
+        self.statuses = defaultdict(lambda: defaultdict(int))    # 엔드포인트 -> 상태 코드 -> 수
+
+    async def request(self, client, endpoint: str, method: str, url: str, record: bool = True, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception as e:  # 연결 실패 등도 결과에 남깁니다.
+            response, status = None, type(e).__name__
+        if record:
+            self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+            self.statuses[endpoint][str(status)] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            statuses = dict(self.statuses[endpoint])
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400),
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "mean_ms": round(sum(values) / len(values), 2),
+                "max_ms": round(max(values), 2),
+                "status": statuses,
+            }
+        all_values = [value for values in self.latencies.values() for value in values]
+        total = {
+            "requests": len(all_values),
+            "errors": sum(result["errors"] for result in endpoints.values()),
+            "rps": round(len(all_values) / elapsed, 1),
+        }
+        if all_values:
+            total.update({
+                "p50_ms": round(percentile(all_values, 50), 2),
+                "p95_ms": round(percentile(all_values, 95), 2),
+                "p99_ms": round(percentile(all_values, 99), 2),
+            })
+        return {"seconds": round(elapsed, 2), "total": total, "endpoints": endpoints}
+
+
+# ---------------------------------------------------------------------------
+# 가상 사용자 (frontend/app.js 흐름)
+# ---------------------------------------------------------------------------
+
+def employee_form(rng: random.Random, index: int) -> dict:
+    return {
+        "full_name": f"Employee {index}",
+        "location": rng.choice(LOCATIONS),
+        "job_title": rng.choice(JOB_TITLES),
+        "badges": ",".join(rng.sample(BADGES, rng.randint(0, 3))),
+    }
+
+
+async def virtual_user(client, recorder: Recorder, user_no: int, run_id: str, args, photo: bytes, stop_at: float):
+    rng = random.Random(f"{run_id}-{user_no}")
+    operations, weights = zip(*args.mix.items())
+    username = f"bench-{run_id}-{user_no}"
+    password = "bench-password"
+
+    response = await recorder.request(client, "POST /api/auth/register", "POST", "/api/auth/register", json={
+        "username": username, "password": password, "full_name": f"Bench User {user_no}", "email": f"{username}@example.com",
+    })
+    response = await recorder.request(client, "POST /api/auth/login", "POST", "/api/auth/login", json={
+        "username": username, "password": password,
+    })
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    employees = {}  # 이 사용자가 만든 직원 id -> object_key
+    saved = 0
+
+    async def save(employee_id=None, record=True):
+        nonlocal saved
+        saved += 1
+        data = employee_form(rng, saved)
+        if employee_id:
+            data["employee_id"] = str(employee_id)
+        files = {"photo": (f"photo{saved}.jpg", photo, "image/jpeg")} if rng.random() < args.photo_ratio else None
+        response = await recorder.request(client, "POST /api/employee/employee", "POST", "/api/employee/employee",
+                                          record=record, headers=headers, data=data, files=files)
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            employees[body["id"]] = body.get("object_key")
+
+    # 목록/조회 대상이 있도록 미리 만들어 두는 직원 (결과에 포함하지 않음)
+    for _ in range(args.seed_employees):
+        await save(record=False)
+
+    while time.perf_counter() < stop_at:
+        operation = rng.choices(operations, weights)[0]
+        if operation in ("get", "delete", "photo") and not employees:
+            operation = "save"
+        if operation == "list":
+            await recorder.request(client, "GET /api/employee/employees", "GET", "/api/employee/employees", headers=headers)
+        elif operation == "get":
+            employee_id = rng.choice(list(employees))
+            await recorder.request(client, "GET /api/employee/employee/{id}", "GET",
+                                   f"/api/employee/employee/{employee_id}", headers=headers)
+        elif operation == "save":
+            # 프론트엔드와 같이 새 직원 추가와 기존 직원 수정을 섞습니다.
+            await save(rng.choice(list(employees)) if employees and rng.random() < args.update_ratio else None)
+        elif operation == "delete":
+            employee_id = rng.choice(list(employees))
+            del employees[employee_id]
+            await recorder.request(client, "DELETE /api/employee/employee/{id}", "DELETE",
+                                   f"/api/employee/employee/{employee_id}", headers=headers)
+        elif operation == "photo":
+            object_key = next((key for key in employees.values() if key), None)
+            if object_key is None:
+                continue
+            # 목록 타일과 같은 120px 썸네일
+            await recorder.request(client, "GET /static/uploads/{key}?w=120", "GET", f"/static/uploads/{object_key}",
+                                   params={"w": "120"}, headers={"Accept": "image/webp,image/*"})
+
+    await recorder.request(client, "POST /api/auth/logout", "POST", "/api/auth/logout", headers=headers)
+
+
+# ---------------------------------------------------------------------------
+# 한 프로세스 안의 로컬 스택
+# ---------------------------------------------------------------------------
+
+class RoutingTransport(httpx.AsyncBaseTransport):
+    """업스트림 호스트 이름(auth-server, employee-server, photo-service)별로 ASGI 앱에 연결합니다."""
+
+    def __init__(self, apps: dict):
+        self.transports = {host: httpx.ASGITransport(app=app) for host, app in apps.items()}
+
+    async def handle_async_request(self, request):
+        return await self.transports[request.url.host].handle_async_request(request)
+
+
+def load_service(name: str, directory: str):
+    """서비스마다 app.py 라는 같은 이름을 쓰므로 고유한 모듈 이름으로 불러옵니다."""
+    sys.path.insert(0, os.path.join(ROOT, directory))
+    path = os.path.join(ROOT, directory, "app.py" if directory != "employee_server" else "application.py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+async def start_local_stack(redis_url: str):
+    workdir = tempfile.mkdtemp(prefix="bench_stack_")
+    db_file = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_file}")
+    os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{db_file}")
+    os.environ.setdefault("PHOTOS_DIR", os.path.join(workdir, "photos"))
+    # k8s 배포와 같이 employee_server 는 게이트웨이가 검증한 신원 헤더를 사용
+    os.environ.setdefault("TRUST_IDENTITY_HEADERS", "1")
+
+    from common import redis_config
+    if redis_url:
+        import redis.asyncio as aioredis
+        redis_config._session_redis_async = redis_config._TracedSessionRedis(
+            connection_pool=aioredis.ConnectionPool.from_url(redis_url, decode_responses=True))
+        redis_config._cache_redis_async = redis_config._TracedCacheRedis(
+            connection_pool=aioredis.ConnectionPool.from_url(redis_url, decode_responses=True))
+    else:
+        import fakeredis
+        import fakeredis.aioredis
+        server = fakeredis.FakeServer()
+        fake_class = fakeredis.aioredis.FakeRedis
+        from common import tracing
+        redis_config._session_redis_async = tracing.traced_redis_class(fake_class, "session")(server=server, decode_responses=True)
+        redis_config._cache_redis_async = tracing.traced_redis_class(fake_class, "cache")(server=server, decode_responses=True)
+
+    photo = load_service("bench_photo_service", "photo_service")
+    auth = load_service("bench_auth_server", "auth_server")
+    employee = load_service("bench_employee_server", "employee_server")
+    gateway = load_service("bench_gateway", "gateway")
+
+    # 코드에 고정된 업스트림 URL 은 그대로 두고 전송 계층만 ASGI 앱으로 연결합니다. (계측 훅은 유지)
+    employee.client._transport = RoutingTransport({"photo-service": photo.app})
+    employee.jwks_cache.client._transport = RoutingTransport({"auth-server": auth.app})
+    routes = {"auth-server": auth.app, "employee-server": employee.app, "photo-service": photo.app}
+    for upstream in gateway.UPSTREAMS.values():
+        upstream.client._transport = RoutingTransport(routes)
+
+    apps = [photo.app, auth.app, employee.app, gateway.app]
+    for app in apps:
+        await app.router.startup()
+    return gateway.app, apps
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10, help="측정 시간(초)")
+    parser.add_argument("--concurrency", type=int, default=10, help="동시 가상 사용자 수")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"작업 비율 (기본 {DEFAULT_MIX})")
+    parser.add_argument("--photo-ratio", type=float, default=1.0, help="save 중 사진을 첨부하는 비율 (기본 1.0)")
+    parser.add_argument("--update-ratio", type=float, default=0.3, help="save 중 기존 직원 수정 비율 (기본 0.3)")
+    parser.add_argument("--seed-employees", type=int, default=5, help="사용자별 미리 만들어 둘 직원 수 (측정 제외)")
+    parser.add_argument("--base-url", help="이미 실행 중인 게이트웨이 주소 (예: http://localhost:5000)")
+    parser.add_argument("--redis-url", help="로컬 스택에서 fakeredis 대신 쓸 Redis (예: redis://localhost:6379/0)")
+    parser.add_argument("--output", help="결과 JSON 을 저장할 파일")
+    args = parser.parse_args()
+
+    # 서비스들이 print 하는 로그는 stderr 로 보내 stdout 에는 결과 JSON 만 남깁니다.
+    with contextlib.redirect_stdout(sys.stderr):
+        apps = []
+        if args.base_url:
+            transport, base_url = None, args.base_url
+        else:
+            gateway_app, apps = await start_local_stack(args.redis_url)
+            transport, base_url = httpx.ASGITransport(app=gateway_app), "http://gateway"
+
+        photo = make_photo()
+        run_id = uuid.uuid4().hex[:8]
+        recorder = Recorder()
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30, limits=limits) as client:
+                start = time.perf_counter()
+                stop_at = start + args.duration
+                await asyncio.gather(*(
+                    virtual_user(client, recorder, user_no, run_id, args, photo, stop_at)
+                    for user_no in range(args.concurrency)
+                ))
+                elapsed = time.perf_counter() - start
+        finally:
+            for app in reversed(apps):
+                await app.router.shutdown()
+
+    result = {
+        "config": {
+            "target": args.base_url or "in-process",
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "photo_ratio": args.photo_ratio,
+            "update_ratio": args.update_ratio,
+            "seed_employees": args.seed_employees,
+        },
+        **recorder.report(elapsed),
+    }
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    asyncio.run(main())
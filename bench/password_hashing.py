@@ -0,0 +1,124 @@
+"""
+비밀번호 해시 파라미터 튜닝: 후보 파라미터별 로그인(검증) 처리량과, 그동안 다른 요청이 밀리는 정도
+
+auth_server/passwords.py 의 스레드 풀을 그대로 사용해 동시 로그인 검증을 돌리고,
+초당 검증 수 / 검증 지연 p50·p99 / 이벤트 루프 지연(10ms 마다 깨어나는 작업이 늦은 정도)을 출력합니다.
+--target-rps 를 만족하는 후보 중 가장 비싼(안전한) 파라미터를 골라 설정할 환경 변수를 알려줍니다.
+운영 노드와 같은 CPU/PASSWORD_WORKERS 에서 실행해야 의미가 있습니다.
+
+실행 (프로젝트 루트에서):
+    python bench/password_hashing.py --target-rps 50 --duration 3
+    python bench/password_hashing.py --scheme bcrypt --bcrypt-rounds 10,11,12,13
+    python bench/password_hashing.py --inline   # 이전 방식(이벤트 루프에서 직접 해시)과 비교
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "auth_server"))
+
+import passwords  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def candidates(args):
+    """(이름, 환경 변수, CryptContext) 후보를 비용이 낮은 것부터 돌려줍니다."""
+    if args.scheme == "bcrypt":
+        for rounds in args.bcrypt_rounds:
+            yield f"bcrypt rounds={rounds}", {"PASSWORD_SCHEME": "bcrypt", "BCRYPT_ROUNDS": rounds}, \
+                passwords.build_context("bcrypt", bcrypt__rounds=rounds)
+        return
+    for memory_cost in args.argon2_memory:
+        for time_cost in args.argon2_time:
+            env = {"PASSWORD_SCHEME": "argon2", "ARGON2_TIME_COST": time_cost, "ARGON2_MEMORY_COST": memory_cost}
+            yield f"argon2id t={time_cost} m={memory_cost}KiB", env, \
+                passwords.build_context("argon2", argon2__time_cost=time_cost, argon2__memory_cost=memory_cost)
+
+async def run(context, duration: float, concurrency: int, inline: bool) -> dict:
+    stored = context.hash(PASSWORD)
+    passwords.pwd_context = context
+    latencies, lags, rejected = [], [], 0
+    stop_at = time.perf_counter() + duration
+
+    async def other_requests():
+        # 로그인이 아닌 요청 대용: 10ms 마다 깨어나 예정보다 얼마나 늦었는지 기록
+        while time.perf_counter() < stop_at:
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lags.append((time.perf_counter() - expected) * 1000)
+
+    async def login_worker():
+        nonlocal rejected
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            if inline:
+                context.verify(PASSWORD, stored)  # 이전 방식: 이벤트 루프에서 직접 실행
+                await asyncio.sleep(0)
+            else:
+                try:
+                    await passwords.verify_password(PASSWORD, stored)
+                except passwords.PasswordPoolBusyError:
+                    rejected += 1  # 실제 서버라면 503 + Retry-After
+                    await asyncio.sleep(0.01)
+                    continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(other_requests(), *(login_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "logins_per_sec": round(len(latencies) / elapsed, 1),
+        "login_p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "login_p99_ms": round(percentile(latencies, 99), 1) if latencies else None,
+        "rejected": rejected,
+        "loop_lag_p99_ms": round(percentile(lags, 99), 1) if lags else None,
+    }
+
+def int_list(text: str):
+    return [int(value) for value in text.split(",")]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", choices=("argon2", "bcrypt"), default=passwords.PASSWORD_SCHEME)
+    parser.add_argument("--argon2-time", type=int_list, default=[1, 2, 3], help="ARGON2_TIME_COST 후보")
+    parser.add_argument("--argon2-memory", type=int_list, default=[19456, 47104], help="ARGON2_MEMORY_COST 후보 (KiB)")
+    parser.add_argument("--bcrypt-rounds", type=int_list, default=[10, 11, 12, 13], help="BCRYPT_ROUNDS 후보")
+    parser.add_argument("--target-rps", type=float, default=50, help="프로세스 하나가 감당해야 할 초당 로그인 수")
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--concurrency", type=int, default=32, help="동시 로그인 요청 수")
+    parser.add_argument("--inline", action="store_true", help="풀 대신 이벤트 루프에서 직접 검증 (비교용)")
+    args = parser.parse_args()
+
+    print(f"workers={passwords.PASSWORD_WORKERS} queue_limit={passwords.PASSWORD_QUEUE_LIMIT} "
+          f"concurrency={args.concurrency} target={args.target_rps}/s mode={'inline' if args.inline else 'pool'}")
+    passwords.start()
+    best = None
+    try:
+        for name, env, context in candidates(args):
+            result = await run(context, args.duration, args.concurrency, args.inline)
+            meets = result["logins_per_sec"] >= args.target_rps
+            print(f"{name:>28}: {result['logins_per_sec']:>7} logins/s, p50 {result['login_p50_ms']} ms / "
+                  f"p99 {result['login_p99_ms']} ms, rejected {result['rejected']}, "
+                  f"loop lag p99 {result['loop_lag_p99_ms']} ms {'OK' if meets else '-'}")
+            if meets:
+                best = (name, env)
+    finally:
+        passwords.shutdown()
+
+    if best is None:
+        print("no candidate reaches the target: add PASSWORD_WORKERS/replicas or lower the cost")
+    else:
+        print(f"strongest candidate meeting the target: {best[0]}")
+        print("  " + " ".join(f"{key}={value}" for key, value in best[1].items()))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,176 @@
+"""
+캐시 스탬피드 방지 헬퍼 (single-flight + stale-while-revalidate + 확률적 조기 만료)
+
+캐시 항목은 Redis 해시로 저장합니다.
+    v     : 직렬화된 값 (JSON 문자열)
+    exp   : 소프트 만료 시각 (epoch 초). 이 시각이 지나면 stale 로 보고 백그라운드에서 갱신합니다.
+    delta : 값을 계산하는 데 걸린 시간(초). 확률적 조기 만료(XFetch)에 사용합니다.
+Redis 키 자체의 TTL 은 ttl + stale_ttl 이라서, 소프트 만료 후 stale_ttl 동안은 옛 값을 바로 돌려줄 수 있습니다.
+
+동시에 같은 키가 비어 있으면
+  - 같은 프로세스 안에서는 하나의 태스크만 계산하고 나머지는 그 결과를 기다리며 (in-process single-flight)
+  - 워커 간에는 짧은 Redis 잠금(SET NX PX)을 잡은 워커만 DB 를 조회하고 나머지는 값이 채워지길 잠깐 기다립니다.
+"""
+import asyncio
+import math
+import os
+import random
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from common import metrics
+
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL") or 60)            # 소프트 만료 후 stale 값을 줄 수 있는 시간(초)
+CACHE_LOCK_TTL_MS = int(os.getenv("CACHE_LOCK_TTL_MS") or 5000)      # 워커 간 재계산 잠금 유지 시간(ms)
+CACHE_LOCK_WAIT_MS = int(os.getenv("CACHE_LOCK_WAIT_MS") or 2000)    # 잠금을 못 잡았을 때 값이 채워지길 기다리는 최대 시간(ms)
+CACHE_XFETCH_BETA = float(os.getenv("CACHE_XFETCH_BETA") or 1.0)     # 클수록 더 일찍 갱신 (0 이면 조기 만료 끔)
+
+# 잠금을 잡은 토큰과 같을 때만 삭제 (다른 워커의 잠금을 지우지 않도록)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_inflight: Dict[str, asyncio.Task] = {}
+_background: set = set()
+
+Compute = Callable[[], Awaitable[Optional[str]]]
+
+
+def _lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+def _should_refresh_early(exp: float, delta: float, now: float) -> bool:
+    """XFetch: 만료가 가까울수록, 계산이 오래 걸리는 값일수록 높은 확률로 미리 갱신합니다."""
+    if CACHE_XFETCH_BETA <= 0:
+        return False
+    return now - delta * CACHE_XFETCH_BETA * math.log(1.0 - random.random()) >= exp
+
+
+async def _store(r, key: str, value: str, ttl: int, delta: float):
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={"v": value, "exp": time.time() + ttl, "delta": delta})
+        pipe.expire(key, ttl + CACHE_STALE_TTL)
+        await pipe.execute()
+
+
+async def _compute_and_store(r, key: str, ttl: int, compute: Compute) -> Optional[str]:
+    started = time.perf_counter()
+    value = await compute()
+    if value is not None:
+        await _store(r, key, value, ttl, time.perf_counter() - started)
+    return value
+
+
+async def _refresh_with_lock(r, key: str, ttl: int, compute: Compute, wait: bool) -> Optional[str]:
+    """
+    Redis 잠금을 잡은 경우에만 재계산합니다.
+    잠금을 못 잡았고 wait=True 면 다른 워커가 채운 값을 기다렸다가 돌려주고, 끝내 없으면 직접 계산합니다.
+    잠금이 풀렸는데 값이 없으면(compute 가 None, 예: 없는 직원) 더 기다리지 않고 바로 직접 계산합니다.
+    """
+    token = uuid.uuid4().hex
+    if await r.set(_lock_key(key), token, nx=True, px=CACHE_LOCK_TTL_MS):
+        try:
+            return await _compute_and_store(r, key, ttl, compute)
+        finally:
+            await r.eval(_RELEASE_LOCK_SCRIPT, 1, _lock_key(key), token)
+    if not wait:
+        return None
+    deadline = time.monotonic() + CACHE_LOCK_WAIT_MS / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.hget(key, "v")
+            pipe.exists(_lock_key(key))
+            value, locked = await pipe.execute()
+        if value is not None:
+            return value
+        if not locked:
+            break
+    # 잠금을 가진 워커가 너무 느리거나 값을 남기지 않았으면 직접 계산 (fail-open)
+    return await _compute_and_store(r, key, ttl, compute)
+
+
+def _log_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Cache background refresh failed: {task.exception()}")
+
+
+def _single_flight(key: str, factory: Callable[[], Awaitable[Optional[str]]]) -> asyncio.Task:
+    """같은 키에 대한 계산은 프로세스 안에서 하나의 태스크로 합칩니다."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return task
+
+
+async def get_or_compute(r, key: str, ttl: int, compute: Compute) -> Tuple[Optional[str], str]:
+    """
+    캐시된 값을 돌려주거나, 없으면 한 번만 계산해서 채웁니다.
+    반환값: (값, 상태)  상태는 "hit" / "stale" (옛 값 반환 + 백그라운드 갱신) / "miss"
+    compute 가 None 을 돌려주면 캐시하지 않습니다. (예: 없는 직원)
+    """
+    value, status = await _get_or_compute(r, key, ttl, compute)
+    metrics.record_cache(key, status)
+    return value, status
+
+
+async def _get_or_compute(r, key: str, ttl: int, compute: Compute) -> Tuple[Optional[str], str]:
+    entry = await r.hmget(key, "v", "exp", "delta")
+    value, exp, delta = entry
+    if value is not None:
+        now = time.time()
+        exp = float(exp or 0)
+        if now < exp and not _should_refresh_early(exp, float(delta or 0), now):
+            return value, "hit"
+        # stale 또는 조기 만료: 옛 값을 바로 돌려주고 한 태스크만 뒤에서 갱신
+        # 백그라운드 갱신은 잠금을 못 잡으면 None 으로 끝나므로, 값을 기다리는 miss 경로와 다른 키로 합칩니다.
+        refresh_key = f"refresh:{key}"
+        if refresh_key not in _inflight:
+            task = _single_flight(refresh_key, lambda: _refresh_with_lock(r, key, ttl, compute, wait=False))
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+            task.add_done_callback(_log_failure)
+        return value, "stale"
+
+    value = await asyncio.shield(_single_flight(key, lambda: _refresh_with_lock(r, key, ttl, compute, wait=True)))
+    return value, "miss"
+
+
+# ---------------------------------------------------------------------------
+# 세대(generation) 기반 무효화
+# 캐시 키에 소유자별 세대 번호를 넣어 두고, 쓰기 시 INCR 한 번으로 이전 키들을 모두 무효화합니다.
+# 옛 세대의 항목은 아무도 읽지 않으므로 TTL 이나 allkeys-lru 로 자연히 사라집니다.
+# ---------------------------------------------------------------------------
+
+def _generation_key(namespace: str) -> str:
+    return f"gen:{namespace}"
+
+
+def _initial_generation() -> int:
+    # 세대 키가 LRU 로 밀려나도 예전 세대 번호와 겹치지 않도록 시각 기반 값으로 시작합니다.
+    return time.time_ns()
+
+
+async def get_generation(r, namespace: str) -> str:
+    """현재 세대 번호를 돌려줍니다. 없으면 새로 만듭니다."""
+    generation = await r.get(_generation_key(namespace))
+    if generation is None:
+        await r.set(_generation_key(namespace), _initial_generation(), nx=True)
+        generation = await r.get(_generation_key(namespace))
+    return generation
+
+
+async def bump_generation(r, namespace: str) -> int:
+    """세대 번호를 올려 이 namespace 의 모든 캐시 항목을 한 번에 무효화합니다."""
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.set(_generation_key(namespace), _initial_generation(), nx=True)
+        pipe.incr(_generation_key(namespace))
+        _, generation = await pipe.execute()
+    return generation
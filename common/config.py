@@ -1,8 +1,8 @@
 import os
 
-# Flask / JWT
+# Flask
 FLASK_SECRET = os.environ.get("FLASK_SECRET", "dev-secret")
-JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "dev-jwt-secret")
+# JWT 는 auth_server 의 비대칭 키로 서명합니다. (auth_server/keys.py, 검증은 common/jwks.py)
 
 # Photo service
 PHOTO_SERVICE_URL = os.environ.get(
@@ -15,4 +15,15 @@ DATABASE_HOST = os.environ.get("DATABASE_HOST")
 DATABASE_PORT = os.environ.get("DATABASE_PORT", "3306")
 DATABASE_USER = os.environ.get("DATABASE_USER")
 DATABASE_PASSWORD = os.environ.get("DATABASE_PASSWORD")
-DATABASE_DB_NAME = os.environ.get("DATABASE_DB_NAME")
\ No newline at end of file
+DATABASE_DB_NAME = os.environ.get("DATABASE_DB_NAME")
+
+# DATABASE_URL 을 직접 지정하면 위 MySQL 설정 대신 사용합니다. (예: 로컬 테스트용 sqlite:///./local.db)
+# ASYNC_DATABASE_URL 은 비동기 엔진용 URL 입니다. (예: sqlite+aiosqlite:///./local.db)
+DATABASE_URL = os.environ.get("DATABASE_URL")
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL")
+
+# Connection pool
+DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", "10"))
+DATABASE_MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", "20"))
+DATABASE_POOL_TIMEOUT = int(os.environ.get("DATABASE_POOL_TIMEOUT", "30"))
+DATABASE_POOL_RECYCLE = int(os.environ.get("DATABASE_POOL_RECYCLE", "3600"))
@@ -1,28 +1,206 @@
-from typing import List, Optional
+import re
+import time
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 from sqlmodel import SQLModel, create_engine, Session, select
-from sqlalchemy.pool import QueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import and_, delete, func, insert, inspect, literal, or_, text, update
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import common.config as config
-from common.models import Employee, User
+from common import metrics # 커넥션 풀 대기 시간/상태 계측
+from common import tracing # 요청별 DB 구간 기록 (Server-Timing)
+from common.models import Employee, EmployeeBadge, EmployeeChange, User
 
 # Database URL
-DATABASE_URL = (
+# DATABASE_URL / ASYNC_DATABASE_URL 환경 변수가 있으면 그대로 사용합니다. (로컬 SQLite 테스트 등)
+DATABASE_URL = config.DATABASE_URL or (
     f"mysql+mysqlconnector://{config.DATABASE_USER}:{config.DATABASE_PASSWORD}@"
     f"{config.DATABASE_HOST}:{config.DATABASE_PORT}/"
     f"{config.DATABASE_DB_NAME}"
 )
+ASYNC_DATABASE_URL = config.ASYNC_DATABASE_URL or (
+    f"mysql+aiomysql://{config.DATABASE_USER}:{config.DATABASE_PASSWORD}@"
+    f"{config.DATABASE_HOST}:{config.DATABASE_PORT}/"
+    f"{config.DATABASE_DB_NAME}"
+)
+
+def _pool_options(url: str) -> dict:
+    """URL 에 맞는 풀 설정을 반환합니다. SQLite 는 드라이버 기본 풀을 사용합니다."""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    # pool_size: The number of connections to keep open in the pool.
+    # max_overflow: The number of connections that can be opened beyond the pool_size.
+    # pool_timeout: Seconds to wait for a free connection before giving up.
+    # pool_recycle: Recycle connections after this many seconds. Prevents stale connections.
+    return {
+        "pool_size": config.DATABASE_POOL_SIZE,
+        "max_overflow": config.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": config.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": config.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+class _TimedCheckout:
+    """풀에서 커넥션을 꺼내는 데(_do_get) 걸린 대기 시간을 메트릭으로 기록합니다."""
+    metrics_name = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe_pool_checkout(self.metrics_name, time.perf_counter() - start)
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics_name = "sync"
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_name = "async"
 
 # Create the engine with connection pooling
-# pool_size: The number of connections to keep open in the pool.
-# max_overflow: The number of connections that can be opened beyond the pool_size.
-# pool_recycle: Recycle connections after this many seconds. Prevents stale connections.
+_sync_options = _pool_options(DATABASE_URL)
+if not DATABASE_URL.startswith("sqlite"):
+    _sync_options["poolclass"] = InstrumentedQueuePool # QueuePool + 커넥션 대기 시간 기록
 engine = create_engine(
     DATABASE_URL,
     echo=False, # Set to True to see SQL statements
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_recycle=3600 # Recycle connections after 1 hour
+    **_sync_options
 )
+metrics.register_pool("sync", engine.pool)
+tracing.instrument_engine(engine)
+
+# 비동기 엔진: 이벤트 루프를 막지 않고 쿼리를 실행합니다. (aiomysql / aiosqlite)
+# 엔진은 첫 사용 시점에 생성합니다. (비동기 드라이버가 없는 auth/동기 스크립트에서도 import 가능하도록)
+_async_engine = None
+_async_session_factory = None
+
+def get_async_engine():
+    """프로세스 전역 비동기 엔진을 반환합니다."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        options = _pool_options(ASYNC_DATABASE_URL)
+        if not ASYNC_DATABASE_URL.startswith("sqlite"):
+            options["poolclass"] = InstrumentedAsyncQueuePool
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            echo=False,
+            **options
+        )
+        metrics.register_pool("async", _async_engine.sync_engine.pool)
+        tracing.instrument_engine(_async_engine.sync_engine)
+        # expire_on_commit=False: 커밋 후 세션이 닫혀도 객체 속성을 그대로 읽을 수 있게 합니다.
+        _async_session_factory = async_sessionmaker(
+            _async_engine, class_=AsyncSession, expire_on_commit=False
+        )
+    return _async_engine
+
+def async_session() -> AsyncSession:
+    """새 비동기 세션을 만듭니다. `async with async_session() as session:` 형태로 사용합니다."""
+    get_async_engine()
+    return _async_session_factory()
+
+async def dispose_async_engine():
+    """앱 종료 시 비동기 커넥션 풀을 정리합니다."""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+# SQLite 용 전문 검색 테이블 (MySQL 의 FULLTEXT 인덱스 대용). employee 테이블을 트리거로 따라갑니다.
+_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS employee_fts USING fts5("
+    "full_name, job_title, content='employee', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS employee_fts_ai AFTER INSERT ON employee BEGIN "
+    "INSERT INTO employee_fts(rowid, full_name, job_title) VALUES (new.id, new.full_name, new.job_title); END",
+    "CREATE TRIGGER IF NOT EXISTS employee_fts_ad AFTER DELETE ON employee BEGIN "
+    "INSERT INTO employee_fts(employee_fts, rowid, full_name, job_title) "
+    "VALUES ('delete', old.id, old.full_name, old.job_title); END",
+    "CREATE TRIGGER IF NOT EXISTS employee_fts_au AFTER UPDATE ON employee BEGIN "
+    "INSERT INTO employee_fts(employee_fts, rowid, full_name, job_title) "
+    "VALUES ('delete', old.id, old.full_name, old.job_title); "
+    "INSERT INTO employee_fts(rowid, full_name, job_title) VALUES (new.id, new.full_name, new.job_title); END",
+]
+
+def _create_all(connection):
+    had_badge_table = inspect(connection).has_table(EmployeeBadge.__tablename__)
+    had_change_table = inspect(connection).has_table(EmployeeChange.__tablename__)
+    had_fts_table = inspect(connection).has_table("employee_fts")
+    SQLModel.metadata.create_all(connection)
+    # create_all 은 이미 있는 테이블에 새 인덱스를 추가하지 않으므로 따로 확인합니다.
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    if connection.dialect.name == "sqlite":
+        for statement in _SQLITE_FTS_DDL:
+            connection.execute(text(statement))
+        if not had_fts_table:
+            connection.execute(text("INSERT INTO employee_fts(employee_fts) VALUES ('rebuild')"))
+    if not had_badge_table:
+        # 배지 테이블이 새로 생겼으면 기존 직원의 badges 문자열로 채웁니다.
+        rows = connection.execute(select(Employee.id, Employee.owner_id, Employee.badges).where(Employee.badges != "")).all()
+        badge_rows = _badge_rows(rows)
+        if badge_rows:
+            connection.execute(insert(EmployeeBadge), badge_rows)
+    if not had_change_table:
+        # 변경 기록 테이블이 새로 생겼으면 기존 직원마다 한 행씩 채워 since=0 동기화가 전체 목록이 되게 합니다.
+        connection.execute(insert(EmployeeChange).from_select(
+            ["employee_id", "owner_id", "deleted", "changed_datetime"],
+            select(Employee.id, Employee.owner_id, literal(False), Employee.created_datetime).order_by(Employee.id),
+        ))
+
+def split_badges(badges: Optional[str]) -> List[str]:
+    """"Python, redis,python" -> ["python", "redis"]  (소문자, 공백 제거, 중복 제거)"""
+    return list(dict.fromkeys(b.strip().lower() for b in (badges or "").split(",") if b.strip()))
+
+def _badge_rows(employees) -> List[dict]:
+    """(id, owner_id, badges) 목록을 EmployeeBadge 행 dict 목록으로 바꿉니다."""
+    return [
+        {"employee_id": employee_id, "owner_id": owner_id, "badge": badge}
+        for employee_id, owner_id, badges in employees
+        for badge in split_badges(badges)
+    ]
+
+def _replace_badges_sync(session: Session, employee: Employee):
+    session.execute(delete(EmployeeBadge).where(EmployeeBadge.employee_id == employee.id))
+    badge_rows = _badge_rows([(employee.id, employee.owner_id, employee.badges)])
+    if badge_rows:
+        session.execute(insert(EmployeeBadge), badge_rows)
+
+async def _replace_badges(session: AsyncSession, employee: Employee):
+    """직원의 배지 행을 badges 문자열에 맞게 다시 씁니다. (호출한 쪽에서 커밋)"""
+    await session.execute(delete(EmployeeBadge).where(EmployeeBadge.employee_id == employee.id))
+    badge_rows = _badge_rows([(employee.id, employee.owner_id, employee.badges)])
+    if badge_rows:
+        await session.execute(insert(EmployeeBadge), badge_rows)
+
+# ---------------------------------------------------------------------------
+# 변경 기록 (델타 동기화)
+# 쓰기 트랜잭션 맨 앞에서 유저 행을 잠가 같은 유저의 쓰기를 직렬화합니다.
+# 그래서 한 유저 안에서는 seq 가 커밋 순서대로 늘어나고, 클라이언트가 본 최대 seq 보다 작은 변경이 뒤늦게 커밋되는 일이 없습니다.
+# (SQLite 는 쓰기가 원래 직렬이라 FOR UPDATE 를 생략합니다. 직원 INSERT 의 외래 키 공유 잠금보다 먼저 잡아야 교착이 없습니다.)
+# ---------------------------------------------------------------------------
+
+def _lock_owner_sync(session: Session, owner_id: int):
+    session.execute(select(User.id).where(User.id == owner_id).with_for_update())
+
+async def _lock_owner(session: AsyncSession, owner_id: int):
+    await session.execute(select(User.id).where(User.id == owner_id).with_for_update())
+
+def _change_rows(employee_ids: Sequence[int], owner_id: int, deleted: bool) -> List[dict]:
+    now = datetime.now()
+    return [{"employee_id": employee_id, "owner_id": owner_id, "deleted": deleted, "changed_datetime": now}
+            for employee_id in employee_ids]
+
+def _record_changes_sync(session: Session, employee_ids: Sequence[int], owner_id: int, deleted: bool = False):
+    session.execute(delete(EmployeeChange).where(EmployeeChange.owner_id == owner_id, EmployeeChange.employee_id.in_(employee_ids)))
+    session.execute(insert(EmployeeChange), _change_rows(employee_ids, owner_id, deleted))
+
+async def _record_changes(session: AsyncSession, employee_ids: Sequence[int], owner_id: int, deleted: bool = False):
+    """직원들의 변경 기록을 새 seq 로 교체합니다. (직원마다 마지막 변경 한 행, 호출한 쪽에서 커밋)"""
+    await session.execute(delete(EmployeeChange).where(EmployeeChange.owner_id == owner_id, EmployeeChange.employee_id.in_(employee_ids)))
+    await session.execute(insert(EmployeeChange), _change_rows(employee_ids, owner_id, deleted))
 
 def create_db_and_tables():
     """
@@ -30,7 +208,8 @@ def create_db_and_tables():
     Safe to call multiple times.
     """
     try:
-        SQLModel.metadata.create_all(engine)
+        with engine.begin() as connection:
+            _create_all(connection)
         print("✅ Database tables created or already exist")
     except Exception as e:
         print("❌ Failed to create database tables")
@@ -59,7 +238,11 @@ def load_employee(employee_id: int) -> Optional[Employee]:
 def add_employee(employee_data: Employee) -> Employee:
     """[확인] employee_data에 이미 owner_id가 채워진 상태로 들어옵니다."""
     with Session(engine) as session:
+        _lock_owner_sync(session, employee_data.owner_id)
         session.add(employee_data)
+        session.flush()
+        _replace_badges_sync(session, employee_data)
+        _record_changes_sync(session, [employee_data.id], employee_data.owner_id)
         session.commit()
         session.refresh(employee_data)
         return employee_data
@@ -70,6 +253,7 @@ def update_employee(employee_id: int, employee_data: Employee) -> Optional[Emplo
         existing_employee = session.get(Employee, employee_id)
         if not existing_employee:
             return None
+        _lock_owner_sync(session, existing_employee.owner_id)
         
         # 클라이언트에서 넘어온 데이터로 업데이트
         # owner_id는 보안을 위해 보통 업데이트하지 않지만, 
@@ -79,6 +263,8 @@ def update_employee(employee_id: int, employee_data: Employee) -> Optional[Emplo
             setattr(existing_employee, key, value)
         
         session.add(existing_employee)
+        _replace_badges_sync(session, existing_employee)
+        _record_changes_sync(session, [existing_employee.id], existing_employee.owner_id)
         session.commit()
         session.refresh(existing_employee)
         return existing_employee
@@ -88,7 +274,10 @@ def delete_employee(employee_id: int):
     with Session(engine) as session:
         employee = session.get(Employee, employee_id)
         if employee:
+            _lock_owner_sync(session, employee.owner_id)
+            session.execute(delete(EmployeeBadge).where(EmployeeBadge.employee_id == employee_id))
             session.delete(employee)
+            _record_changes_sync(session, [employee_id], employee.owner_id, deleted=True)
             session.commit()
 
 # 1. 유저 정보 가져오기 (로그인 시 ID/비번 대조용)
@@ -104,4 +293,292 @@ def add_user(user_data: User) -> User:
         session.add(user_data)
         session.commit()      # DB에 실제 저장 (이때 ID 자동 생성됨)
         session.refresh(user_data) # 생성된 ID 정보를 객체에 반영
-        return user_data
\ No newline at end of file
+        return user_data
+
+# ---------------------------------------------------------------------------
+# 비동기 버전 (async def 핸들러에서 사용)
+# ---------------------------------------------------------------------------
+
+async def create_db_and_tables_async():
+    """비동기 엔진으로 테이블을 생성합니다. 여러 번 호출해도 안전합니다."""
+    try:
+        async with get_async_engine().begin() as conn:
+            await conn.run_sync(_create_all)
+        print("✅ Database tables created or already exist")
+    except Exception as e:
+        print("❌ Failed to create database tables")
+        print(e)
+        raise
+
+async def list_employees_async(owner_id: int) -> List[Employee]:
+    """특정 유저(owner_id)가 등록한 직원 목록 (비동기)"""
+    async with async_session() as session:
+        statement = select(Employee).where(Employee.owner_id == owner_id).order_by(Employee.full_name.desc())
+        result = await session.exec(statement)
+        return result.all()
+
+# 목록 API 에서 선택할 수 있는 컬럼 (?fields= 프로젝션)
+EMPLOYEE_LIST_COLUMNS = ("id", "object_key", "full_name", "location", "job_title", "badges", "owner_id")
+
+async def list_employees_page_async(
+    owner_id: int,
+    limit: int,
+    after: Optional[Tuple[str, int]] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> List[dict]:
+    """
+    keyset(커서) 페이지네이션으로 직원 목록 한 페이지를 가져옵니다. (비동기)
+    - 정렬: full_name DESC, id DESC  (ix_employee_owner_name_id 인덱스 순서)
+    - after: 이전 페이지 마지막 행의 (full_name, id). OFFSET 없이 그 다음부터 읽습니다.
+    - columns: 필요한 컬럼만 SELECT 합니다. 커서용 full_name, id 는 항상 포함됩니다.
+    다음 페이지 존재 여부 판단을 위해 최대 limit + 1 행을 dict 로 반환합니다.
+    """
+    return await _fetch_page(owner_id, limit, after, columns, [])
+
+async def _fetch_page(owner_id: int, limit: int, after: Optional[Tuple[str, int]],
+                      columns: Optional[Sequence[str]], conditions: list) -> List[dict]:
+    """목록/검색 공통 keyset 페이지 조회"""
+    selected = list(dict.fromkeys(["id", "full_name", *(columns or EMPLOYEE_LIST_COLUMNS)]))
+    statement = select(*(getattr(Employee, name) for name in selected)).where(Employee.owner_id == owner_id, *conditions)
+    if after is not None:
+        after_name, after_id = after
+        statement = statement.where(or_(
+            Employee.full_name < after_name,
+            and_(Employee.full_name == after_name, Employee.id < after_id),
+        ))
+    statement = statement.order_by(Employee.full_name.desc(), Employee.id.desc()).limit(limit + 1)
+    async with async_session() as session:
+        result = await session.execute(statement)
+        return [dict(row) for row in result.mappings().all()]
+
+def _search_terms(q: str) -> List[str]:
+    """검색어를 단어 단위로 나눕니다. 전문 검색 연산자(+ - * " 등)는 버립니다."""
+    return re.findall(r"\w+", q)
+
+def _text_match_condition(terms: List[str]):
+    """모든 단어가 이름 또는 직함에 (접두어로) 들어 있는 직원. MySQL 은 FULLTEXT, SQLite 는 FTS5 를 사용합니다."""
+    if get_async_engine().dialect.name == "mysql":
+        query = " ".join(f"+{term}*" for term in terms)
+        return text("MATCH (employee.full_name, employee.job_title) AGAINST (:fts_query IN BOOLEAN MODE)").bindparams(fts_query=query)
+    query = " ".join('"' + term.replace('"', '') + '"*' for term in terms)
+    return Employee.id.in_(text("SELECT rowid FROM employee_fts WHERE employee_fts MATCH :fts_query").bindparams(fts_query=query)
+                           .columns(rowid=Employee.id.type))
+
+async def search_employees_page_async(
+    owner_id: int,
+    limit: int,
+    after: Optional[Tuple[str, int]] = None,
+    columns: Optional[Sequence[str]] = None,
+    q: Optional[str] = None,
+    location: Optional[str] = None,
+    job_title: Optional[str] = None,
+    badges: Sequence[str] = (),
+) -> List[dict]:
+    """
+    직원 검색 (비동기). 목록과 같은 정렬/커서를 사용합니다.
+    - q: 이름/직함 전문 검색 (모든 단어 포함, 접두어 일치)
+    - location, job_title: 정확히 일치 (소유자별 복합 인덱스)
+    - badges: 모두 가진 직원 (EmployeeBadge 인덱스)
+    """
+    conditions = []
+    terms = _search_terms(q or "")
+    if terms:
+        conditions.append(_text_match_condition(terms))
+    if location:
+        conditions.append(Employee.location == location)
+    if job_title:
+        conditions.append(Employee.job_title == job_title)
+    for badge in split_badges(",".join(badges)):
+        conditions.append(Employee.id.in_(
+            select(EmployeeBadge.employee_id).where(EmployeeBadge.owner_id == owner_id, EmployeeBadge.badge == badge)
+        ))
+    return await _fetch_page(owner_id, limit, after, columns, conditions)
+
+async def add_employees_bulk_async(owner_id: int, rows: Sequence[dict]) -> int:
+    """
+    여러 직원을 한 트랜잭션으로 추가합니다. (대량 등록용, 비동기)
+    rows 는 full_name/location/job_title/badges 를 담은 dict 목록입니다.
+    executemany 로 실행되어 드라이버가 다중 행 INSERT 로 묶어 보냅니다. 추가한 행 수를 반환합니다.
+    """
+    if not rows:
+        return 0
+    now = datetime.now()
+    values = [{**row, "owner_id": owner_id, "created_datetime": now} for row in rows]
+    async with async_session() as session:
+        await _lock_owner(session, owner_id)
+        # executemany 는 새 id 를 돌려주지 않으므로, 삽입 전 최대 id 보다 큰 본인 행을 다시 읽어 배지/변경 기록 행을 만듭니다.
+        # 유저 행을 잠갔으므로 같은 유저의 다른 요청이 그 사이에 넣은 행은 없습니다.
+        max_id = (await session.execute(select(func.max(Employee.id)))).scalar() or 0
+        await session.execute(insert(Employee), values)
+        inserted = (await session.execute(
+            select(Employee.id, Employee.owner_id, Employee.badges)
+            .where(Employee.owner_id == owner_id, Employee.id > max_id)
+            .order_by(Employee.id)
+        )).all()
+        badge_rows = _badge_rows(inserted)
+        if badge_rows:
+            await session.execute(insert(EmployeeBadge), badge_rows)
+        await _record_changes(session, [employee_id for employee_id, _, _ in inserted], owner_id)
+        await session.commit()
+    return len(values)
+
+async def stream_employees_async(
+    owner_id: int,
+    columns: Sequence[str] = EMPLOYEE_LIST_COLUMNS,
+    batch_size: int = 1000,
+) -> AsyncIterator[List[dict]]:
+    """
+    유저의 직원 목록을 서버 사이드 커서로 batch_size 행씩 읽어 dict 목록으로 넘겨줍니다. (내보내기용)
+    전체 결과를 메모리에 올리지 않으므로 직원 수와 관계없이 메모리 사용량이 일정합니다.
+    """
+    statement = (
+        select(*(getattr(Employee, name) for name in columns))
+        .where(Employee.owner_id == owner_id)
+        .order_by(Employee.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async with async_session() as session:
+        result = await session.stream(statement)
+        async for partition in result.mappings().partitions(batch_size):
+            yield [dict(row) for row in partition]
+
+async def employee_facet_counts_async(owner_id: int) -> dict:
+    """
+    유저의 location / job_title / badge 별 인원 수를 GROUP BY 로 계산합니다. (비동기)
+    평소에는 Redis 패싯 카운터를 쓰고, 이 함수는 카운터를 다시 만들 때만 사용합니다.
+    """
+    counts = {}
+    async with async_session() as session:
+        for dimension, column, owner_column in (
+            ("location", Employee.location, Employee.owner_id),
+            ("job_title", Employee.job_title, Employee.owner_id),
+            ("badge", EmployeeBadge.badge, EmployeeBadge.owner_id),
+        ):
+            result = await session.execute(
+                select(column, func.count()).where(owner_column == owner_id).group_by(column)
+            )
+            counts[dimension] = {value: count for value, count in result.all()}
+    return counts
+
+def _changes_statement(owner_id: int, columns: Sequence[str]):
+    """변경 기록 + 직원의 현재 값 (삭제된 직원은 직원 컬럼이 None)"""
+    return (
+        select(EmployeeChange.seq, EmployeeChange.employee_id, *(getattr(Employee, name) for name in columns))
+        .select_from(EmployeeChange)
+        .outerjoin(Employee, and_(Employee.id == EmployeeChange.employee_id, Employee.owner_id == owner_id))
+        .where(EmployeeChange.owner_id == owner_id)
+    )
+
+async def list_employee_changes_async(
+    owner_id: int,
+    since: int,
+    limit: int,
+    columns: Sequence[str] = EMPLOYEE_LIST_COLUMNS,
+) -> List[dict]:
+    """
+    seq 가 since 보다 큰 변경을 seq 순으로 최대 limit + 1 행 가져옵니다. (델타 동기화, 비동기)
+    ix_employeechange_owner_seq 범위 스캔 + 직원 행 기본 키 조회라서 직원 수가 아니라 변경 수에 비례합니다.
+    각 행은 seq, employee_id 와 직원의 현재 컬럼 값이며, 직원이 삭제됐으면 컬럼 값이 None 입니다.
+    since=0 (처음 동기화)이면 삭제 기록은 건너뜁니다.
+    """
+    statement = _changes_statement(owner_id, columns).where(EmployeeChange.seq > since)
+    if since == 0:
+        statement = statement.where(EmployeeChange.deleted == False)  # noqa: E712
+    statement = statement.order_by(EmployeeChange.seq).limit(limit + 1)
+    async with async_session() as session:
+        result = await session.execute(statement)
+        return [dict(row) for row in result.mappings().all()]
+
+async def load_employee_change_async(
+    owner_id: int,
+    employee_id: int,
+    columns: Sequence[str] = EMPLOYEE_LIST_COLUMNS,
+) -> Optional[dict]:
+    """
+    직원 한 명의 마지막 변경 기록과 현재 값을 한 번에 읽습니다. (변경 알림용, 비동기)
+    같은 문장에서 읽으므로 seq 와 값이 항상 짝이 맞습니다. (그 사이 다른 쓰기가 있었으면 둘 다 최신)
+    """
+    statement = _changes_statement(owner_id, columns).where(EmployeeChange.employee_id == employee_id)
+    async with async_session() as session:
+        row = (await session.execute(statement)).mappings().first()
+        return dict(row) if row is not None else None
+
+async def latest_employee_change_seq_async(owner_id: int) -> int:
+    """유저의 가장 최근 변경 seq (없으면 0, 비동기)"""
+    async with async_session() as session:
+        result = await session.execute(select(func.max(EmployeeChange.seq)).where(EmployeeChange.owner_id == owner_id))
+        return result.scalar() or 0
+
+async def list_employee_owner_ids_async() -> List[int]:
+    """직원을 한 명 이상 가진 유저 id 목록 (비동기)"""
+    async with async_session() as session:
+        result = await session.execute(select(Employee.owner_id).distinct().order_by(Employee.owner_id))
+        return list(result.scalars().all())
+
+async def load_employee_async(employee_id: int) -> Optional[Employee]:
+    """직원 단건 조회 (비동기)"""
+    async with async_session() as session:
+        return await session.get(Employee, employee_id)
+
+async def add_employee_async(employee_data: Employee) -> Employee:
+    """직원 추가 (비동기)"""
+    async with async_session() as session:
+        await _lock_owner(session, employee_data.owner_id)
+        session.add(employee_data)
+        await session.flush() # id 를 받아 배지/변경 기록 행을 같은 트랜잭션에서 씁니다.
+        await _replace_badges(session, employee_data)
+        await _record_changes(session, [employee_data.id], employee_data.owner_id)
+        await session.commit()
+        await session.refresh(employee_data)
+        return employee_data
+
+async def update_employee_async(employee_id: int, employee_data: Employee) -> Optional[Employee]:
+    """직원 수정 (비동기)"""
+    async with async_session() as session:
+        existing_employee = await session.get(Employee, employee_id)
+        if not existing_employee:
+            return None
+        await _lock_owner(session, existing_employee.owner_id)
+
+        update_data = employee_data.dict(exclude_unset=True)
+        for key, value in update_data.items():
+            setattr(existing_employee, key, value)
+
+        session.add(existing_employee)
+        await _replace_badges(session, existing_employee)
+        await _record_changes(session, [existing_employee.id], existing_employee.owner_id)
+        await session.commit()
+        await session.refresh(existing_employee)
+        return existing_employee
+
+async def delete_employee_async(employee_id: int):
+    """직원 삭제 (비동기)"""
+    async with async_session() as session:
+        employee = await session.get(Employee, employee_id)
+        if employee:
+            await _lock_owner(session, employee.owner_id)
+            await session.execute(delete(EmployeeBadge).where(EmployeeBadge.employee_id == employee_id))
+            await session.delete(employee)
+            await _record_changes(session, [employee_id], employee.owner_id, deleted=True)
+            await session.commit()
+
+async def get_user_by_username_async(username: str) -> Optional[User]:
+    """로그인 시 유저 조회 (비동기)"""
+    async with async_session() as session:
+        statement = select(User).where(User.username == username)
+        result = await session.exec(statement)
+        return result.first()
+
+async def add_user_async(user_data: User) -> User:
+    """회원가입 (비동기)"""
+    async with async_session() as session:
+        session.add(user_data)
+        await session.commit()
+        await session.refresh(user_data)
+        return user_data
+
+async def update_user_password_async(user_id: int, password_hash: str):
+    """로그인 시 평문/옛 파라미터 비밀번호를 새 해시로 교체 (비동기)"""
+    async with async_session() as session:
+        await session.execute(update(User).where(User.id == user_id).values(password=password_hash))
+        await session.commit()
@@ -0,0 +1,221 @@
+"""
+직원 패싯(location / job_title / badge 별 인원 수) 카운터
+
+유저마다 Redis 해시 3개에 값별 인원 수를 보관합니다.
+    facets:{owner_id}:location   {"Seoul": 12, "Busan": 3}
+    facets:{owner_id}:job_title  {"Engineer": 9, ...}
+    facets:{owner_id}:badge      {"python": 7, ...}
+직원 추가/수정/삭제 시 HINCRBY 로 증감만 반영하고 (GROUP BY 재계산 없음), 0 이 된 값은 지웁니다.
+facets:{owner_id}:built 표시 키가 없으면(처음 조회, LRU 로 밀려남) DB 에서 다시 계산합니다.
+증감이 누락되어 생긴 오차는 rebuild_facets.py 작업이 주기적으로 바로잡습니다.
+
+재계산(GROUP BY)과 동시에 들어온 쓰기의 증감이 빠지거나 두 번 세어지지 않도록
+    facets:{owner_id}:writes  진행 중인 쓰기 수 (begin_write 로 +1, apply_delta 로 -1)
+    facets:{owner_id}:dirty   끝난 쓰기 수 (apply_delta 마다 +1)
+를 두고, 재계산 결과는 GROUP BY 동안 쓰기가 하나도 없었을 때만 저장합니다. (store_facets)
+재계산 자체는 유저별 Redis 잠금으로 한 번에 하나만 실행합니다. (rebuild_lock)
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from common.database import split_badges
+
+FACET_DIMENSIONS = ("location", "job_title", "badge")
+
+FACET_WRITE_TTL_MS = int(os.getenv("FACET_WRITE_TTL_MS") or 30000)      # 진행 중 쓰기 표시 유지 시간(ms). 쓰기 도중 죽은 워커 대비
+FACET_REBUILD_LOCK_MS = int(os.getenv("FACET_REBUILD_LOCK_MS") or 10000) # 재계산 잠금 유지 시간(ms)
+FACET_REBUILD_WAIT_MS = int(os.getenv("FACET_REBUILD_WAIT_MS") or 2000)  # 다른 워커의 재계산을 기다리는 최대 시간(ms)
+
+# 쓰기 하나를 끝냅니다: 진행 중 수 -1, 끝난 수 +1, 표시 키가 있을 때만 증감 반영 (0 이하가 된 값은 삭제)
+# KEYS = [built, dirty, writes, location, job_title, badge], ARGV = (해시 번호, 값, 증감) 반복
+_APPLY_DELTA_SCRIPT = """
+redis.call('incr', KEYS[2])
+if tonumber(redis.call('get', KEYS[3]) or '0') > 0 then
+    redis.call('decr', KEYS[3])
+end
+if redis.call('exists', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 3 do
+    local key = KEYS[tonumber(ARGV[i]) + 3]
+    if redis.call('hincrby', key, ARGV[i + 1], ARGV[i + 2]) <= 0 then
+        redis.call('hdel', key, ARGV[i + 1])
+    end
+end
+return 1
+"""
+
+# GROUP BY 를 시작할 때 읽은 dirty 값과 지금 값이 같고 진행 중인 쓰기가 없을 때만 해시를 통째로 교체합니다.
+# KEYS = [built, dirty, writes, location, job_title, badge], ARGV = [읽은 dirty, (해시 번호, 값, 인원 수) 반복]
+_STORE_SCRIPT = """
+if (redis.call('get', KEYS[2]) or '0') ~= ARGV[1] or tonumber(redis.call('get', KEYS[3]) or '0') > 0 then
+    return 0
+end
+redis.call('del', KEYS[4], KEYS[5], KEYS[6])
+for i = 2, #ARGV, 3 do
+    redis.call('hset', KEYS[tonumber(ARGV[i]) + 3], ARGV[i + 1], ARGV[i + 2])
+end
+redis.call('set', KEYS[1], 1)
+return 1
+"""
+
+# 잠금을 잡은 토큰과 같을 때만 삭제 (다른 워커의 잠금을 지우지 않도록)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _built_key(owner_id: int) -> str:
+    return f"facets:{owner_id}:built"
+
+
+def _dirty_key(owner_id: int) -> str:
+    return f"facets:{owner_id}:dirty"
+
+
+def _writes_key(owner_id: int) -> str:
+    return f"facets:{owner_id}:writes"
+
+
+def _lock_key(owner_id: int) -> str:
+    return f"lock:facets:{owner_id}"
+
+
+def _facet_key(owner_id: int, dimension: str) -> str:
+    return f"facets:{owner_id}:{dimension}"
+
+
+def _script_keys(owner_id: int) -> list:
+    return [_built_key(owner_id), _dirty_key(owner_id), _writes_key(owner_id),
+            *(_facet_key(owner_id, d) for d in FACET_DIMENSIONS)]
+
+
+def count_employees(employees: Iterable) -> Dict[str, Counter]:
+    """직원 객체(또는 같은 속성을 가진 dict) 목록의 패싯별 인원 수"""
+    counts = {dimension: Counter() for dimension in FACET_DIMENSIONS}
+    for employee in employees:
+        get = employee.get if isinstance(employee, dict) else lambda name: getattr(employee, name)
+        counts["location"][get("location")] += 1
+        counts["job_title"][get("job_title")] += 1
+        for badge in split_badges(get("badges")):
+            counts["badge"][badge] += 1
+    return counts
+
+
+async def begin_write(r, owner_id: int):
+    """직원 DB 쓰기 전에 호출합니다. apply_delta 로 끝날 때까지 재계산 결과가 저장되지 않습니다."""
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.incr(_writes_key(owner_id))
+        pipe.pexpire(_writes_key(owner_id), FACET_WRITE_TTL_MS)
+        await pipe.execute()
+
+
+async def apply_delta(r, owner_id: int, removed: Iterable = (), added: Iterable = ()):
+    """
+    begin_write 로 시작한 쓰기를 끝내고, removed 직원들을 빼고 added 직원들을 더합니다.
+    (수정은 옛 값 removed + 새 값 added, 쓰기가 실패했으면 둘 다 비워서 호출)
+    """
+    before = count_employees(removed)
+    after = count_employees(added)
+    args = []
+    for index, dimension in enumerate(FACET_DIMENSIONS, start=1):
+        delta = Counter(after[dimension])
+        delta.subtract(before[dimension])
+        for value, change in delta.items():
+            if change:
+                args.extend([index, value, change])
+    keys = _script_keys(owner_id)
+    await r.eval(_APPLY_DELTA_SCRIPT, len(keys), *keys, *args)
+
+
+async def write_epoch(r, owner_id: int) -> str:
+    """GROUP BY 직전에 읽어 store_facets 에 넘길 값 (끝난 쓰기 수)"""
+    epoch = await r.get(_dirty_key(owner_id))
+    return "0" if epoch is None else (epoch.decode() if isinstance(epoch, bytes) else str(epoch))
+
+
+@asynccontextmanager
+async def rebuild_lock(r, owner_id: int):
+    """유저별 재계산 잠금. 잡았으면 True, 다른 워커가 재계산 중이면 False 를 넘깁니다."""
+    token = uuid.uuid4().hex
+    acquired = await r.set(_lock_key(owner_id), token, nx=True, px=FACET_REBUILD_LOCK_MS)
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            await r.eval(_RELEASE_LOCK_SCRIPT, 1, _lock_key(owner_id), token)
+
+
+async def get_facets(r, owner_id: int) -> Optional[Dict[str, Dict[str, int]]]:
+    """저장된 패싯을 돌려줍니다. 아직 계산된 적이 없으면 None"""
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.exists(_built_key(owner_id))
+        for dimension in FACET_DIMENSIONS:
+            pipe.hgetall(_facet_key(owner_id, dimension))
+        built, *hashes = await pipe.execute()
+    if not built:
+        return None
+    return {
+        dimension: {value: int(count) for value, count in values.items()}
+        for dimension, values in zip(FACET_DIMENSIONS, hashes)
+    }
+
+
+async def store_facets(r, owner_id: int, counts: Dict[str, Dict[str, int]], epoch: str) -> bool:
+    """
+    DB 에서 다시 계산한 값으로 해시를 통째로 교체합니다. epoch 는 GROUP BY 직전에 읽은 write_epoch 값입니다.
+    그 사이 쓰기가 끝났거나 아직 진행 중이면 계산 결과가 이미 낡았거나 곧 두 번 세어지므로 저장하지 않고 False
+    """
+    args = [epoch]
+    for index, dimension in enumerate(FACET_DIMENSIONS, start=1):
+        for value, count in counts.get(dimension, {}).items():
+            if count > 0:
+                args.extend([index, value, count])
+    keys = _script_keys(owner_id)
+    return bool(await r.eval(_STORE_SCRIPT, len(keys), *keys, *args))
+
+
+async def rebuild_facets(r, owner_id: int, load: Callable[[], Awaitable[Dict[str, Dict[str, int]]]]) -> Tuple[Dict[str, Dict[str, int]], bool]:
+    """
+    저장된 패싯이 없을 때 load(GROUP BY)로 다시 계산합니다. 반환값: (인원 수, 저장했는지)
+    유저별 잠금을 잡은 워커만 계산해 저장하고, 나머지는 그 결과를 잠깐 기다립니다.
+    잠금이 풀렸는데도 값이 없으면(저장이 거절됨) 직접 계산만 하고 저장하지 않습니다.
+    """
+    async with rebuild_lock(r, owner_id) as locked:
+        if locked:
+            epoch = await write_epoch(r, owner_id)
+            counts = await load()
+            return counts, await store_facets(r, owner_id, counts, epoch)
+    deadline = time.monotonic() + FACET_REBUILD_WAIT_MS / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        stored = await get_facets(r, owner_id)
+        if stored is not None:
+            return stored, False
+        if not await r.exists(_lock_key(owner_id)):
+            break
+    return await load(), False
+
+
+def diff_facets(stored: Optional[Dict[str, Dict[str, int]]], actual: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, tuple]]:
+    """값이 다른 항목만 {dimension: {value: (저장된 수, 실제 수)}} 로 돌려줍니다. (재계산 작업의 로그용)"""
+    stored = stored or {}
+    drift = {}
+    for dimension in FACET_DIMENSIONS:
+        left, right = stored.get(dimension, {}), actual.get(dimension, {})
+        changed = {
+            value: (left.get(value, 0), right.get(value, 0))
+            for value in set(left) | set(right)
+            if left.get(value, 0) != right.get(value, 0)
+        }
+        if changed:
+            drift[dimension] = changed
+    return drift
@@ -0,0 +1,19 @@
+"""
+HTTP 조건부 요청 헬퍼 (gateway / employee_server 공용)
+
+ETag 를 만든 쪽이 If-None-Match 를 비교해 304 Not Modified 로 본문 전송을 생략합니다.
+"""
+from typing import Optional
+
+# 브라우저가 응답을 저장해도 쓰기 전에 항상 ETag 로 재검증하게 합니다. (공유 캐시에는 저장하지 않음)
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 현재 ETag 와 일치하는지 확인합니다. (If-None-Match 는 약한 비교)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
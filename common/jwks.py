@@ -0,0 +1,130 @@
+"""
+JWKS 기반 JWT 검증 (gateway / employee_server 공용)
+
+auth_server 가 공개하는 공개키 묶음(/auth/.well-known/jwks.json)을 받아 메모리에 두고,
+토큰 서명을 로컬에서 검증합니다. (요청마다 auth_server 를 부르지 않음)
+
+- JWKS_CACHE_TTL 초가 지나면 다시 받습니다.
+- 모르는 kid 의 토큰이 오면(키 교체 직후) 바로 다시 받되, JWKS_MIN_REFRESH_INTERVAL 초에 한 번만 받습니다.
+  (임의의 kid 를 넣은 위조 토큰으로 auth_server 를 두드리지 못하게)
+- auth_server 에 잠시 연결할 수 없으면 마지막으로 받은 키로 계속 검증합니다.
+
+게이트웨이가 검증한 신원은 X-Auth-User-Id / X-Auth-User 헤더로 다운스트림에 전달됩니다.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+from urllib.parse import quote, unquote
+
+import httpx
+import jwt
+
+JWKS_URL = os.getenv("JWKS_URL") or "http://auth-server:5001/auth/.well-known/jwks.json"
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL") or 300)                  # 키 묶음 유지 시간(초)
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL") or 10)  # 모르는 kid 로 인한 재조회 최소 간격(초)
+JWKS_FETCH_TIMEOUT = float(os.getenv("JWKS_FETCH_TIMEOUT") or 2)
+
+# 비대칭 서명만 허용합니다. (HS256 등 대칭키 알고리즘이나 alg=none 토큰은 거절)
+ALLOWED_ALGORITHMS = ("EdDSA", "RS256")
+
+# 게이트웨이가 검증한 신원을 다운스트림으로 넘기는 헤더 (클라이언트가 보낸 같은 이름의 헤더는 게이트웨이가 지웁니다)
+USER_ID_HEADER = "X-Auth-User-Id"
+USERNAME_HEADER = "X-Auth-User"
+IDENTITY_HEADERS = (USER_ID_HEADER.lower(), USERNAME_HEADER.lower())
+
+
+class JWKSUnavailableError(RuntimeError):
+    """키를 한 번도 받지 못해 토큰을 검증할 수 없을 때 (auth_server 장애)"""
+
+
+class JWKSCache:
+    """kid -> 공개키 캐시. 이벤트 루프 하나(프로세스 하나)에서 공유해 사용합니다."""
+
+    def __init__(self, url: str = JWKS_URL, ttl: float = JWKS_CACHE_TTL,
+                 min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL, client: Optional[httpx.AsyncClient] = None):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.client = client or httpx.AsyncClient(timeout=JWKS_FETCH_TIMEOUT)
+        self.keys: Dict[str, jwt.PyJWK] = {}
+        self.fetched_at = 0.0
+        self.last_attempt = float("-inf")
+        self._lock = None  # 루프 안에서 처음 필요할 때 만듭니다.
+        # 메트릭
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def refresh(self):
+        """키 묶음을 다시 받습니다. 실패하면 기존 키를 그대로 둡니다."""
+        self.last_attempt = time.monotonic()
+        try:
+            response = await self.client.get(self.url)
+            response.raise_for_status()
+            keys = {}
+            for jwk in response.json().get("keys", []):
+                try:
+                    key = jwt.PyJWK(jwk)
+                except jwt.PyJWTError as e:
+                    print(f"JWKS: skipping key {jwk.get('kid')}: {e}")
+                    continue
+                if key.key_id and key.algorithm_name in ALLOWED_ALGORITHMS:
+                    keys[key.key_id] = key
+        except (httpx.HTTPError, ValueError) as e:
+            self.refresh_failures += 1
+            print(f"JWKS: refresh from {self.url} failed: {e}")
+            return
+        self.keys = keys
+        self.fetched_at = self.last_attempt
+        self.refreshes += 1
+
+    async def get_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        now = time.monotonic()
+        stale = now - self.fetched_at >= self.ttl or kid not in self.keys
+        # 실패했거나 모르는 kid 때문이라도 재조회는 min_refresh_interval 에 한 번만
+        if stale and now - self.last_attempt >= self.min_refresh_interval:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                # 기다리는 동안 다른 요청이 이미 받아 왔으면 다시 받지 않습니다.
+                if self.last_attempt < now:
+                    await self.refresh()
+        if not self.keys:
+            raise JWKSUnavailableError("no signing keys available")
+        return self.keys.get(kid)
+
+    async def decode(self, token: str) -> dict:
+        """
+        서명/만료를 검증하고 클레임을 돌려줍니다.
+        잘못된 토큰은 jwt.PyJWTError, 키를 받을 수 없으면 JWKSUnavailableError 를 냅니다.
+        """
+        header = jwt.get_unverified_header(token)
+        key = await self.get_key(header.get("kid"))
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, key.key, algorithms=[key.algorithm_name], options={"require": ["exp"]})
+
+    def stats(self) -> dict:
+        return {
+            "keys": sorted(self.keys),
+            "age_seconds": round(time.monotonic() - self.fetched_at, 1) if self.fetched_at else None,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def identity_headers(claims: dict) -> Dict[str, str]:
+    """검증된 클레임 -> 다운스트림에 붙일 신원 헤더 (유저 이름은 한글 등을 위해 percent-encoding)"""
+    return {USER_ID_HEADER: str(claims["id"]), USERNAME_HEADER: quote(str(claims["user"]), safe="")}
+
+
+def identity_from_headers(headers) -> Optional[dict]:
+    """게이트웨이가 붙인 신원 헤더 -> {"username", "id"} (없거나 형식이 틀리면 None)"""
+    user_id = headers.get(USER_ID_HEADER)
+    username = headers.get(USERNAME_HEADER)
+    if not user_id or not user_id.isdigit() or not username:
+        return None
+    return {"username": unquote(username), "id": int(user_id)}
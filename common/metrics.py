@@ -0,0 +1,215 @@
+"""
+Prometheus 계측 (모든 서비스 공용)
+
+    metrics.setup(app, "employee")   # ASGI 미들웨어 + GET /metrics 등록
+
+- HTTP: 라우트 템플릿별 지연 히스토그램, 상태 코드별 요청 수, 처리 중 요청 수
+- 캐시: common.cache 의 Redis 캐시 hit / stale / miss 수 (키 접두어별)
+- DB: SQLAlchemy 커넥션 풀 크기/사용 중/overflow 게이지와 커넥션 대기 시간 히스토그램
+- 업스트림: httpx 클라이언트의 대상별 응답 지연, 서킷 브레이커 상태/차단 수, 재시도 수
+
+라우트 라벨은 실제 경로가 아니라 "/employee/{employee_id}" 같은 템플릿이라 라벨 수가 늘어나지 않습니다.
+uvicorn 워커를 여러 개 띄울 때는 PROMETHEUS_MULTIPROC_DIR 를 지정하면 워커 값을 합쳐서 내보냅니다.
+"""
+import os
+import time
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+
+# 밀리초~수 초 단위 API 지연에 맞춘 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["service", "method", "route"], buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ["service", "method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed",
+    ["service"], multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Redis cache lookups by key prefix and result (hit / stale / miss)",
+    ["cache", "result"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection",
+    ["pool"], buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds", "Latency until response headers from an upstream HTTP service",
+    ["target", "method", "status"], buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_CIRCUIT_STATE = Gauge(
+    "upstream_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)",
+    ["target"], multiprocess_mode="max",
+)
+UPSTREAM_CIRCUIT_REJECTIONS = Counter(
+    "upstream_circuit_rejections_total", "Requests failed fast because the upstream circuit was open",
+    ["target"],
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total", "Upstream request retries by reason",
+    ["target", "reason"],
+)
+
+METRICS_PATH = "/metrics"
+_UNMATCHED_ROUTE = "<unmatched>"
+
+
+# ---------------------------------------------------------------------------
+# HTTP (ASGI 미들웨어)
+# ---------------------------------------------------------------------------
+
+def _route_template(app, scope) -> str:
+    """요청이 매칭될 라우트의 경로 템플릿. (라우팅 전에 호출되므로 직접 매칭합니다)"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", _UNMATCHED_ROUTE)
+    return _UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """라우트별 지연/상태/동시 처리 수를 기록하는 순수 ASGI 미들웨어 (스트리밍 응답도 끝까지 측정)"""
+
+    def __init__(self, app, service: str, router_app=None):
+        self.app = app
+        self.service = service
+        self.router_app = router_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(self.router_app, scope)
+        status_code = 500
+        in_flight = HTTP_IN_FLIGHT.labels(self.service)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(self.service, method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(self.service, method, route, str(status_code)).inc()
+            in_flight.dec()
+
+
+def metrics_response(request: Request) -> Response:
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_pool_collector) # 풀 상태는 이 워커의 값만
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def setup(app, service: str):
+    """FastAPI 앱에 계측 미들웨어와 GET /metrics 를 붙입니다."""
+    app.add_middleware(PrometheusMiddleware, service=service, router_app=app)
+    app.add_route(METRICS_PATH, metrics_response, methods=["GET"], include_in_schema=False)
+
+
+# ---------------------------------------------------------------------------
+# Redis 캐시
+# ---------------------------------------------------------------------------
+
+def record_cache(key: str, result: str):
+    """캐시 키의 첫 ':' 앞부분(employees_list, employee ...)을 캐시 이름으로 사용합니다."""
+    CACHE_REQUESTS.labels(key.split(":", 1)[0], result).inc()
+
+
+# ---------------------------------------------------------------------------
+# SQLAlchemy 커넥션 풀
+# ---------------------------------------------------------------------------
+
+def observe_pool_checkout(pool_name: str, seconds: float):
+    """common.database 의 풀 클래스가 커넥션을 꺼낼 때마다 호출합니다."""
+    DB_POOL_CHECKOUT_WAIT.labels(pool_name).observe(seconds)
+
+
+class _PoolCollector:
+    """수집 시점에 등록된 풀의 현재 상태를 읽어 게이지로 내보냅니다."""
+
+    def __init__(self):
+        self.pools: Dict[str, object] = {}
+
+    def collect(self):
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["pool"])
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out", labels=["pool"])
+        checked_in = GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool", labels=["pool"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections opened beyond pool_size", labels=["pool"])
+        for name, pool in list(self.pools.items()):
+            size.add_metric([name], pool.size())
+            checked_out.add_metric([name], pool.checkedout())
+            checked_in.add_metric([name], pool.checkedin())
+            overflow.add_metric([name], max(0, pool.overflow()))
+        yield from (size, checked_out, checked_in, overflow)
+
+
+_pool_collector = _PoolCollector()
+REGISTRY.register(_pool_collector)
+
+
+def register_pool(name: str, pool):
+    """QueuePool 계열(크기/사용 중 수를 알 수 있는) 풀만 게이지로 내보냅니다."""
+    if all(hasattr(pool, attr) for attr in ("size", "checkedout", "checkedin", "overflow")):
+        _pool_collector.pools[name] = pool
+
+
+# ---------------------------------------------------------------------------
+# httpx 업스트림
+# ---------------------------------------------------------------------------
+
+def instrument_httpx(client, target: Optional[str] = None):
+    """
+    httpx.AsyncClient 에 이벤트 훅을 달아 대상별 응답 헤더 수신까지의 지연을 기록합니다.
+    target 을 주지 않으면 요청 URL 의 호스트 이름을 사용합니다.
+    """
+    async def on_request(request):
+        request.extensions["metrics_start"] = time.perf_counter()
+
+    async def on_response(response):
+        request = response.request
+        start = request.extensions.get("metrics_start")
+        if start is not None:
+            UPSTREAM_REQUEST_DURATION.labels(
+                target or request.url.host, request.method, str(response.status_code)
+            ).observe(time.perf_counter() - start)
+
+    client.event_hooks["request"].append(on_request)
+    client.event_hooks["response"].append(on_response)
+    return client
+
+
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def set_circuit_state(target: str, state: str):
+    UPSTREAM_CIRCUIT_STATE.labels(target).set(CIRCUIT_STATE_VALUES[state])
+
+
+def record_circuit_rejection(target: str):
+    UPSTREAM_CIRCUIT_REJECTIONS.labels(target).inc()
+
+
+def record_upstream_retry(target: str, reason: str):
+    UPSTREAM_RETRIES.labels(target, reason).inc()
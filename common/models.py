@@ -1,9 +1,22 @@
 from datetime import datetime
 from typing import Optional, List # List is needed for EmployeesResponse
 from sqlmodel import Field, SQLModel
+from sqlalchemy import Index
 from pydantic import BaseModel # Added for EmployeesResponse
+from pydantic import Field as PydanticField
 
 class Employee(SQLModel, table=True):
+    # 목록 조회(WHERE owner_id = ? ORDER BY full_name DESC, id DESC)와 keyset 페이지네이션을
+    # 인덱스 범위 스캔만으로 처리하기 위한 복합 인덱스
+    __table_args__ = (
+        Index("ix_employee_owner_name_id", "owner_id", "full_name", "id"),
+        # 검색 필터(location / job_title 일치) 용 인덱스
+        Index("ix_employee_owner_location", "owner_id", "location"),
+        Index("ix_employee_owner_job_title", "owner_id", "job_title"),
+        # 이름/직함 전문 검색 (MySQL 전용. SQLite 는 database.py 의 FTS5 테이블을 사용)
+        Index("ft_employee_name_title", "full_name", "job_title", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     object_key: Optional[str] = Field(default=None, max_length=80)
     full_name: str = Field(max_length=200)
@@ -18,6 +31,35 @@ class Employee(SQLModel, table=True):
             datetime: lambda dt: dt.isoformat()
         }
 
+# badges 문자열("python,redis")을 정규화한 테이블. 배지 검색이 LIKE '%x%' 대신 인덱스를 탑니다.
+# 원본은 Employee.badges 이며, database.py 의 쓰기 함수들이 이 테이블을 함께 갱신합니다.
+class EmployeeBadge(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_employeebadge_owner_badge", "owner_id", "badge", "employee_id"),
+    )
+
+    employee_id: int = Field(foreign_key="employee.id", primary_key=True)
+    badge: str = Field(max_length=200, primary_key=True)
+    owner_id: int = Field(foreign_key="user.id", nullable=False)
+
+# 직원 변경 기록 (GET /employees/changes 델타 동기화). database.py 의 쓰기 함수들이 같은 트랜잭션에서 씁니다.
+# 직원마다 마지막 변경 한 행만 남기고(변경할 때마다 새 seq 로 교체), 삭제된 직원은 deleted=True 행(tombstone)으로 남습니다.
+class EmployeeChange(SQLModel, table=True):
+    __table_args__ = (
+        # WHERE owner_id = ? AND seq > ? ORDER BY seq 를 인덱스 범위 스캔으로 처리
+        Index("ix_employeechange_owner_seq", "owner_id", "seq"),
+        # 직원당 한 행 (SQLite 처럼 삭제된 id 가 다른 유저에게 다시 쓰여도 원래 유저의 tombstone 은 남도록 유저별로)
+        Index("ux_employeechange_owner_employee", "owner_id", "employee_id", unique=True),
+        # SQLite 는 AUTOINCREMENT 가 없으면 지운 최대 rowid 를 다시 쓰므로 seq 가 되돌아가지 않게 켭니다.
+        {"sqlite_autoincrement": True},
+    )
+
+    seq: Optional[int] = Field(default=None, primary_key=True) # 변경 순번 (동기화 커서)
+    employee_id: int = Field(nullable=False) # 삭제 후에도 남아야 하므로 외래 키를 두지 않습니다.
+    owner_id: int = Field(foreign_key="user.id", nullable=False)
+    deleted: bool = Field(default=False, nullable=False)
+    changed_datetime: datetime = Field(default_factory=datetime.now)
+
 # Define a Pydantic model for the public representation of an Employee
 class EmployeePublic(BaseModel):
     id: int
@@ -33,6 +75,20 @@ class EmployeePublic(BaseModel):
 # Define a type alias for the list response
 EmployeesListResponse = List[EmployeePublic]
 
+# GET /employees/changes 응답: since 이후 추가/수정된 직원(현재 값)과 삭제된 직원 id
+class EmployeeChangesResponse(BaseModel):
+    changes: List[EmployeePublic]
+    deleted: List[int]
+    next_since: int # 다음 호출의 since 값
+    has_more: bool # true 면 next_since 로 바로 다시 호출
+
+# 대량 등록(POST /employees/bulk) 한 행의 입력 형식. owner_id 는 로그인한 유저로 채웁니다.
+class EmployeeImport(BaseModel):
+    full_name: str = PydanticField(min_length=1, max_length=200)
+    location: str = PydanticField(max_length=200)
+    job_title: str = PydanticField(max_length=200)
+    badges: str = PydanticField(default="", max_length=200)
+
 
 from sqlmodel import SQLModel, Field
 from typing import Optional
@@ -1,6 +1,15 @@
 from redis.sentinel import Sentinel
+from redis.asyncio.sentinel import Sentinel as AsyncSentinel
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError, ReadOnlyError
+from redis.retry import Retry
+from redis.asyncio.retry import Retry as AsyncRetry
 import redis
+import redis.asyncio as aioredis
 import os
+import threading
+
+from common import tracing # 요청별 Redis 구간 기록 (Server-Timing)
 
 # [1] 안전하게 환경 변수를 읽어오는 헬퍼 함수
 def get_env_port(name, default):
@@ -18,25 +27,123 @@ REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or "kosa1004"
 REDIS_CACHE_HOST = os.getenv("REDIS_CACHE_HOST") or "redis-cache-service"
 REDIS_CACHE_PORT = get_env_port("REDIS_CACHE_PORT", 6379)
 
+# 커넥션 풀 설정
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS") or 50)          # 프로세스당 풀 최대 크기
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT") or 2)               # 풀이 꽉 찼을 때 대기 시간(초)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT") or 0.5)
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL") or 30)  # 유휴 커넥션 PING 주기(초)
+
+# 클라이언트는 프로세스마다 한 번만 만들어 재사용합니다. (요청마다 TCP 연결/Sentinel 조회 방지)
+_lock = threading.Lock()
+_session_redis = None
+_cache_redis = None
+_session_redis_async = None
+_cache_redis_async = None
+
+def _retry_options(retry_class):
+    # 연결 오류나 READONLY(페일오버 직후 옛 master 에 쓰기) 응답이면 커넥션을 끊고 다시 연결합니다.
+    # Sentinel 풀은 재연결할 때 master 주소를 다시 조회하므로 이것이 곧 페일오버 갱신입니다.
+    return {
+        "retry": retry_class(ExponentialBackoff(cap=1, base=0.05), 3),
+        "retry_on_error": [ConnectionError, TimeoutError, ReadOnlyError],
+    }
+
+def _common_options():
+    return {
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+        "decode_responses": True,
+    }
+
 # [3] 세션용 Redis (Sentinel 방식)
 def get_session_redis():
-    # 상단에서 정의한 안전한 전역 변수를 사용합니다.
-    sentinel = Sentinel(
-        [(REDIS_SENTINEL_HOST, REDIS_SENTINEL_PORT)], 
-        socket_timeout=0.5,
-        password=REDIS_PASSWORD
-    )
-    return sentinel.master_for(
-        REDIS_MASTER_NAME, 
-        socket_timeout=0.5, 
-        decode_responses=True,
-        password=REDIS_PASSWORD
-    )
+    """프로세스 전역 세션 Redis 클라이언트 (Sentinel master, 동기)"""
+    global _session_redis
+    if _session_redis is None:
+        with _lock:
+            if _session_redis is None:
+                # 상단에서 정의한 안전한 전역 변수를 사용합니다.
+                sentinel = Sentinel(
+                    [(REDIS_SENTINEL_HOST, REDIS_SENTINEL_PORT)],
+                    socket_timeout=0.5,
+                    password=REDIS_PASSWORD
+                )
+                _session_redis = sentinel.master_for(
+                    REDIS_MASTER_NAME,
+                    password=REDIS_PASSWORD,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    **_common_options(),
+                    **_retry_options(Retry)
+                )
+    return _session_redis
 
 # [4] 캐시용 Redis (단독 방식)
 def get_cache_redis():
-    return redis.Redis(
-        host=REDIS_CACHE_HOST, 
-        port=REDIS_CACHE_PORT,
-        decode_responses=True
-    )
+    """프로세스 전역 캐시 Redis 클라이언트 (동기)"""
+    global _cache_redis
+    if _cache_redis is None:
+        with _lock:
+            if _cache_redis is None:
+                # BlockingConnectionPool: 풀이 꽉 차면 새 연결을 만들지 않고 잠시 기다립니다.
+                pool = redis.BlockingConnectionPool(
+                    host=REDIS_CACHE_HOST,
+                    port=REDIS_CACHE_PORT,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    timeout=REDIS_POOL_TIMEOUT,
+                    **_common_options(),
+                    **_retry_options(Retry)
+                )
+                _cache_redis = redis.Redis(connection_pool=pool)
+    return _cache_redis
+
+# [5] 비동기 클라이언트 (async def 핸들러용, redis.asyncio)
+# 이벤트 루프에 묶이므로 루프 안에서 처음 호출될 때 생성됩니다.
+# 명령 시간은 요청의 Server-Timing 에 redis-session / redis-cache 구간으로 기록됩니다.
+_TracedSessionRedis = tracing.traced_redis_class(aioredis.Redis, "session")
+_TracedCacheRedis = tracing.traced_redis_class(aioredis.Redis, "cache")
+
+def get_session_redis_async():
+    """프로세스 전역 세션 Redis 클라이언트 (Sentinel master, 비동기)"""
+    global _session_redis_async
+    if _session_redis_async is None:
+        sentinel = AsyncSentinel(
+            [(REDIS_SENTINEL_HOST, REDIS_SENTINEL_PORT)],
+            socket_timeout=0.5,
+            password=REDIS_PASSWORD
+        )
+        _session_redis_async = sentinel.master_for(
+            REDIS_MASTER_NAME,
+            password=REDIS_PASSWORD,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            redis_class=_TracedSessionRedis,
+            **_common_options(),
+            **_retry_options(AsyncRetry)
+        )
+    return _session_redis_async
+
+def get_cache_redis_async():
+    """프로세스 전역 캐시 Redis 클라이언트 (비동기)"""
+    global _cache_redis_async
+    if _cache_redis_async is None:
+        pool = aioredis.BlockingConnectionPool(
+            host=REDIS_CACHE_HOST,
+            port=REDIS_CACHE_PORT,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT,
+            **_common_options(),
+            **_retry_options(AsyncRetry)
+        )
+        _cache_redis_async = _TracedCacheRedis(connection_pool=pool)
+    return _cache_redis_async
+
+async def close_redis_clients():
+    """앱 종료 시 모든 풀을 정리합니다."""
+    global _session_redis, _cache_redis, _session_redis_async, _cache_redis_async
+    for client in (_session_redis_async, _cache_redis_async):
+        if client is not None:
+            await client.aclose()
+    for client in (_session_redis, _cache_redis):
+        if client is not None:
+            client.close()
+    _session_redis = _cache_redis = _session_redis_async = _cache_redis_async = None
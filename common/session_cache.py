@@ -0,0 +1,157 @@
+"""
+세션 검증 near-cache (프로세스 내부 TTL/LRU 캐시)
+
+매 요청마다 Redis 에 `EXISTS session:{id}` 를 보내는 대신, 최근에 확인된 세션을
+워커 메모리에 잠깐 보관합니다. 로그아웃 시 auth_server 가 Redis pub/sub 채널로
+무효화 메시지를 보내고, 모든 워커가 이를 구독하여 즉시 캐시에서 지웁니다.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from common.redis_config import get_session_redis_async
+
+SESSION_INVALIDATION_CHANNEL = os.getenv("SESSION_INVALIDATION_CHANNEL") or "session:invalidate"
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL") or 30)          # 캐시 유지 시간(초)
+SESSION_CACHE_MAX_SIZE = int(os.getenv("SESSION_CACHE_MAX_SIZE") or 10000)
+
+
+class SessionCache:
+    """user_id -> 만료 시각을 보관하는 TTL + LRU 캐시 (유효한 세션만 저장)"""
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL, max_size: int = SESSION_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, float]" = OrderedDict()
+        # 무효화가 일어날 때마다 증가합니다. Redis 조회 도중 로그아웃이 끼어들면 결과를 저장하지 않습니다.
+        self.generation = 0
+        # 무효화 채널을 구독 중일 때만 캐시합니다. (구독이 없으면 로그아웃을 알 수 없음)
+        self.enabled = False
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.last_invalidation_lag_ms: Optional[float] = None
+        self.max_invalidation_lag_ms = 0.0
+
+    def get(self, user_id: int) -> bool:
+        expires_at = self._entries.get(user_id)
+        if expires_at is None or expires_at < time.monotonic():
+            if expires_at is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return False
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return True
+
+    def put(self, user_id: int, generation: int):
+        """generation 은 Redis 조회 직전에 읽은 값입니다. 그 사이 무효화가 있었다면 버립니다."""
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[user_id] = time.monotonic() + self.ttl
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int, published_at: Optional[float] = None):
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.pop(user_id, None)
+        if published_at is not None:
+            lag_ms = max(0.0, (time.time() - published_at) * 1000)
+            self.last_invalidation_lag_ms = lag_ms
+            self.max_invalidation_lag_ms = max(self.max_invalidation_lag_ms, lag_ms)
+
+    def clear(self):
+        """구독이 끊겨 메시지를 놓쳤을 수 있을 때 전체를 비웁니다."""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "last_invalidation_lag_ms": self.last_invalidation_lag_ms,
+            "max_invalidation_lag_ms": self.max_invalidation_lag_ms,
+        }
+
+
+session_cache = SessionCache()
+_listener_task: Optional[asyncio.Task] = None
+
+
+async def is_session_active(user_id: int) -> bool:
+    """near-cache 를 먼저 보고, 없으면 Redis 에서 세션 존재 여부를 확인합니다."""
+    if session_cache.get(user_id):
+        return True
+    generation = session_cache.generation
+    if await get_session_redis_async().exists(f"session:{user_id}"):
+        session_cache.put(user_id, generation)
+        return True
+    return False
+
+
+async def publish_session_invalidation(user_id: int):
+    """(auth_server) 로그아웃된 세션을 모든 워커에 알립니다."""
+    message = json.dumps({"id": user_id, "ts": time.time()})
+    await get_session_redis_async().publish(SESSION_INVALIDATION_CHANNEL, message)
+
+
+async def _listen():
+    while True:
+        pubsub = get_session_redis_async().pubsub()
+        try:
+            await pubsub.subscribe(SESSION_INVALIDATION_CHANNEL)
+            # 구독 전 놓친 메시지가 있을 수 있으므로 새로 구독할 때마다 비웁니다.
+            session_cache.clear()
+            session_cache.enabled = True
+            while True:
+                # listen() 은 소켓 타임아웃(0.5초)에 걸리므로 get_message 의 자체 타임아웃으로 대기합니다.
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message.get("type") != "message":
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                    session_cache.invalidate(int(data["id"]), data.get("ts"))
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Session invalidation parse error: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Session invalidation listener error: {e}")
+            session_cache.enabled = False
+            session_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            session_cache.enabled = False
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def start_invalidation_listener():
+    """앱 시작 시 호출합니다. 무효화 채널 구독 태스크를 띄웁니다."""
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen())
+
+
+async def stop_invalidation_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
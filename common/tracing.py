@@ -0,0 +1,222 @@
+"""
+요청 ID 전파 + Server-Timing 구간 기록 (모든 서비스 공용)
+
+    tracing.setup(app, "employee")
+
+- 게이트웨이가 요청마다 X-Request-ID 를 만들고(클라이언트가 보낸 값이 올바르면 그대로 사용),
+  instrument_httpx 를 단 httpx 클라이언트가 업스트림 호출에 같은 ID 를 실어 보냅니다.
+- 요청 처리 중 Redis / DB / 업스트림 HTTP 구간 시간을 이름별로 합산해
+  응답의 Server-Timing 헤더로 돌려줍니다. (예: employee.db;dur=12.3;desc="2 calls")
+- 업스트림 응답의 Server-Timing 은 호출한 쪽 헤더에 그대로 합쳐지므로,
+  게이트웨이 응답 하나로 gateway -> employee -> photo 전 구간을 볼 수 있습니다.
+- SLOW_REQUEST_LOG_MS 를 주면 그보다 오래 걸린 요청 중 SLOW_REQUEST_SAMPLE_RATE 비율만
+  구간 내역 전체를 한 줄 JSON 으로 출력합니다. (기본: 끔)
+"""
+import contextvars
+import json
+import os
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+REQUEST_ID_HEADER = "X-Request-ID"
+SLOW_REQUEST_LOG_MS = float(os.getenv("SLOW_REQUEST_LOG_MS") or 0)             # 0 이면 느린 요청 로그 끔
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE") or 1.0)  # 느린 요청 중 기록할 비율
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+_SERVER_TIMING_NAME_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class Trace:
+    """요청 하나의 구간 기록. 같은 이름의 구간은 시간과 횟수를 합산합니다."""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.spans: Dict[str, List[float]] = {}   # 이름 -> [합계 ms, 횟수]
+        self.upstream: List[str] = []             # 업스트림이 보낸 Server-Timing 항목
+
+    def add(self, name: str, duration_ms: float):
+        entry = self.spans.setdefault(name, [0.0, 0])
+        entry[0] += duration_ms
+        entry[1] += 1
+
+    def server_timing(self, service: str, total_ms: float) -> str:
+        entries = []
+        for name, (duration_ms, count) in self.spans.items():
+            entry = f"{service}.{name};dur={duration_ms:.1f}"
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            entries.append(entry)
+        entries.append(f"{service}.total;dur={total_ms:.1f}")
+        return ", ".join(entries + self.upstream)
+
+    def breakdown(self) -> dict:
+        return {name: {"ms": round(duration_ms, 2), "count": count} for name, (duration_ms, count) in self.spans.items()}
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current.get()
+    return trace.request_id if trace else None
+
+
+def add_span(name: str, duration_ms: float):
+    """현재 요청에 구간을 더합니다. 요청 밖(백그라운드 작업 등)이면 무시합니다."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(_SERVER_TIMING_NAME_RE.sub("_", name), duration_ms)
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, (time.perf_counter() - start) * 1000)
+
+
+# ---------------------------------------------------------------------------
+# ASGI 미들웨어
+# ---------------------------------------------------------------------------
+
+def _incoming_request_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-request-id":
+            request_id = value.decode("latin-1")
+            return request_id if _REQUEST_ID_RE.match(request_id) else None
+    return None
+
+
+def _log_slow_request(service: str, scope, status_code: int, total_ms: float, trace: Trace):
+    if not SLOW_REQUEST_LOG_MS or total_ms < SLOW_REQUEST_LOG_MS or random.random() >= SLOW_REQUEST_SAMPLE_RATE:
+        return
+    print("SLOW_REQUEST " + json.dumps({
+        "request_id": trace.request_id,
+        "service": service,
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": status_code,
+        "total_ms": round(total_ms, 2),
+        "spans": trace.breakdown(),
+        "upstream": trace.upstream,
+    }, ensure_ascii=False))
+
+
+class TracingMiddleware:
+    """요청 ID 를 정하고, 응답 헤더에 X-Request-ID 와 Server-Timing 을 붙이는 순수 ASGI 미들웨어"""
+
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(_incoming_request_id(scope) or uuid.uuid4().hex)
+        token = _current.set(trace)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # 프록시한 업스트림의 Server-Timing 은 trace.upstream 에 이미 들어 있으므로 새로 씁니다.
+                headers = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in (b"server-timing", b"x-request-id")
+                ]
+                total_ms = (time.perf_counter() - start) * 1000
+                headers.append((b"x-request-id", trace.request_id.encode("latin-1")))
+                headers.append((b"server-timing", trace.server_timing(self.service, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _log_slow_request(self.service, scope, status_code, (time.perf_counter() - start) * 1000, trace)
+            _current.reset(token)
+
+
+def setup(app, service: str):
+    app.add_middleware(TracingMiddleware, service=service)
+
+
+# ---------------------------------------------------------------------------
+# 구간 계측 대상: httpx / Redis / SQLAlchemy
+# ---------------------------------------------------------------------------
+
+def instrument_httpx(client, target: Optional[str] = None):
+    """
+    업스트림 호출에 X-Request-ID 를 전달하고, 응답 헤더까지의 시간을 upstream-<대상> 구간으로 기록합니다.
+    업스트림이 보낸 Server-Timing 항목은 현재 요청의 헤더에 합칩니다.
+    """
+    async def on_request(request):
+        request_id = current_request_id()
+        if request_id:
+            request.headers[REQUEST_ID_HEADER] = request_id
+        request.extensions["trace_start"] = time.perf_counter()
+
+    async def on_response(response):
+        start = response.request.extensions.get("trace_start")
+        if start is not None:
+            add_span(f"upstream-{target or response.request.url.host}", (time.perf_counter() - start) * 1000)
+        trace = _current.get()
+        upstream_timing = response.headers.get("server-timing")
+        if trace is not None and upstream_timing:
+            trace.upstream.extend(entry.strip() for entry in upstream_timing.split(",") if entry.strip())
+
+    client.event_hooks["request"].append(on_request)
+    client.event_hooks["response"].append(on_response)
+    return client
+
+
+def traced_redis_class(base_class, name: str):
+    """
+    명령마다 redis-<name> 구간을 기록하는 redis.asyncio 클라이언트 클래스를 만듭니다.
+    (Sentinel.master_for(redis_class=...) 또는 직접 생성에 사용)
+    """
+    span_name = f"redis-{name}"
+
+    class TracedRedis(base_class):
+        async def execute_command(self, *args, **options):
+            with span(span_name):
+                return await super().execute_command(*args, **options)
+
+        def pipeline(self, transaction: bool = True, shard_hint=None):
+            pipe = super().pipeline(transaction, shard_hint)
+            execute = pipe.execute
+
+            async def traced_execute(raise_on_error: bool = True):
+                with span(span_name):
+                    return await execute(raise_on_error)
+
+            pipe.execute = traced_execute
+            return pipe
+
+    TracedRedis.__name__ = f"Traced{base_class.__name__}"
+    return TracedRedis
+
+
+def instrument_engine(engine, name: str = "db"):
+    """SQLAlchemy (동기) 엔진의 쿼리 실행 시간을 기록합니다. 비동기 엔진은 engine.sync_engine 을 넘깁니다."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._trace_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_trace_start", None)
+        if start is not None:
+            add_span(name, (time.perf_counter() - start) * 1000)
@@ -1,24 +1,38 @@
 import os # 운영체제 기능(파일 경로 등)을 위한 모듈
+import asyncio # SSE 하트비트 대기
 import jwt # JWT(JSON Web Token) 처리를 위한 라이브러리 (PyJWT)
-import time # 시간 측정을 위한 모듈
 import json
+import base64 # 페이지네이션 커서 인코딩
+import hashlib # 검색 조건 캐시 키
+from contextlib import asynccontextmanager # 패싯 카운터용 쓰기 구간
 from typing import List, Optional # 타입 힌트를 위한 모듈
-from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, status # FastAPI 프레임워크 관련 모듈
+from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Query, Request, status # FastAPI 프레임워크 관련 모듈
 from fastapi.middleware.cors import CORSMiddleware # CORS(교차 출처 리소스 공유) 미들웨어
-from fastapi.responses import JSONResponse # JSON 응답을 위한 모듈
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse # JSON 응답을 위한 모듈
 from fastapi.routing import APIRoute # API 라우팅을 위한 모듈
 from fastapi.staticfiles import StaticFiles # 정적 파일 제공을 위한 모듈
-from pydantic import BaseModel # 데이터 유효성 검사를 위한 Pydantic 모델
+from pydantic import BaseModel, TypeAdapter, ValidationError # 데이터 유효성 검사를 위한 Pydantic 모델
+import orjson # 빠른 JSON 직렬화
 from fastapi.security import OAuth2PasswordBearer # OAuth2 Bearer 토큰 인증을 위한 모듈
 import httpx # 비동기 HTTP 요청을 위한 라이브러리
 
 from common import config   # import common.config 대신
 from common import database # import common.database 대신
 import util 
-from common.models import Employee, EmployeePublic, EmployeesListResponse 
-from common.redis_config import get_cache_redis, get_session_redis
+import image_pool # 이미지 리사이즈를 별도 프로세스 풀에서 실행
+import bulk_io # 대량 등록/내보내기용 CSV, NDJSON 스트리밍 처리
+import change_events # 직원 변경을 Redis pub/sub -> SSE 로 전달
+from common.models import Employee, EmployeeChangesResponse, EmployeeImport, EmployeePublic, EmployeesListResponse 
+from common.redis_config import get_cache_redis_async, close_redis_clients
+from common import session_cache
+from common import cache # 캐시 스탬피드 방지 (single-flight / stale-while-revalidate)
+from common import facets # location / job_title / badge 별 인원 수 카운터
+from common import metrics # Prometheus 계측 (/metrics)
+from common import tracing # X-Request-ID 전파 + Server-Timing
+from common import jwks # 게이트웨이 신원 헤더 / JWKS 토큰 검증
+from common import http_cache # ETag / If-None-Match (304)
 
-app = FastAPI() # FastAPI 애플리케이션 인스턴스 생성
+app = FastAPI(default_response_class=ORJSONResponse) # FastAPI 애플리케이션 인스턴스 생성 (응답 직렬화는 orjson)
 
 # CORS 미들웨어 설정
 app.add_middleware(
@@ -27,45 +41,89 @@ app.add_middleware(
     allow_credentials=True, # 자격 증명(쿠키, HTTP 인증 등) 허용
     allow_methods=["*"],  # 모든 HTTP 메서드 허용
     allow_headers=["*"],  # 모든 HTTP 헤더 허용
+    expose_headers=["X-Next-Cursor", "ETag"], # 다음 페이지 커서 / 조건부 요청용 ETag 를 브라우저 JS 에서 읽을 수 있도록 노출
 )
 
+# 라우트별 지연/상태 코드, 캐시 hit/miss, DB 풀, photo_service 호출 지연을 /metrics 로 노출
+metrics.setup(app, "employee")
+tracing.setup(app, "employee")
+
 # JWT 인증 의존성 설정
-SECRET_KEY = config.JWT_SECRET_KEY
-ALGORITHM = "HS256" # JWT 서명 알고리즘
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# 게이트웨이가 토큰을 검증하고 X-Auth-User-Id / X-Auth-User 헤더로 신원을 넘겨줍니다.
+# 이 서버가 게이트웨이를 거쳐서만 호출되는 환경(k8s ClusterIP)에서만 1 로 켭니다.
+# 헤더가 없으면(또는 0 이면) auth_server 의 공개키(JWKS)로 토큰을 직접 검증합니다.
+TRUST_IDENTITY_HEADERS = os.getenv("TRUST_IDENTITY_HEADERS", "0") == "1"
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+jwks_cache = jwks.JWKSCache()
+
+# 캐시 TTL (초). 만료 후 cache.CACHE_STALE_TTL 동안은 옛 값을 주면서 뒤에서 갱신합니다.
+LIST_CACHE_TTL = 300
+ITEM_CACHE_TTL = 600
+
+# 목록 페이지네이션 설정
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# ?fields= 로 고를 수 있는 필드 (photo_url 은 object_key 로부터 만들어짐)
+SELECTABLE_FIELDS = set(database.EMPLOYEE_LIST_COLUMNS) | {"photo_url"}
+
+# 델타 동기화(/employees/changes) 한 번에 돌려주는 변경 수
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+# SSE 재연결 시 변경 기록에서 다시 보내는 최대 변경 수 (넘으면 sync 이벤트로 전체 새로고침을 요청)
+SSE_REPLAY_LIMIT = int(os.getenv("SSE_REPLAY_LIMIT") or 500)
+
+# 대량 등록: 한 트랜잭션에 넣는 행 수, 응답에 담는 최대 오류 수
+BULK_BATCH_SIZE = int(os.getenv("EMPLOYEE_BULK_BATCH_SIZE") or 500)
+BULK_MAX_REPORTED_ERRORS = 1000
+# 내보내기 컬럼 (대량 등록 입력 형식과 호환)
+EXPORT_COLUMNS = ["id", "full_name", "location", "job_title", "badges", "object_key"]
+
+# 직원 목록을 행마다가 아니라 한 번에 검증/직렬화하기 위한 어댑터
+EMPLOYEE_LIST_ADAPTER = TypeAdapter(EmployeesListResponse)
+
+# photo_service 에 올리는 기준 이미지 크기. 목록/상세용 작은 크기와 WebP/JPEG 변환은 photo_service 가 만듭니다.
+PHOTO_MASTER_SIZE = (480, 640)
 
 # httpx 클라이언트 초기화
-client = httpx.AsyncClient()
+client = tracing.instrument_httpx(metrics.instrument_httpx(httpx.AsyncClient(), "photo-service"), "photo")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await session_cache.stop_invalidation_listener()
+    await change_events.stop()
     await client.aclose()
+    await jwks_cache.aclose()
+    await database.dispose_async_engine()
+    await close_redis_clients()
+    image_pool.shutdown()
 
-async def get_current_user_info(token: str = Depends(oauth2_scheme)):
+async def get_current_user_info(request: Request, token: Optional[str] = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        # 1. JWT 토큰 해독
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("user")
-        user_id: int = payload.get("id")
-
-        # 2. Redis 세션 존재 여부 확인 (Sentinel)
-        r_session = get_session_redis() 
-        if not r_session.exists(f"session:{user_id}"):
-            raise HTTPException(status_code=401, detail="로그아웃된 세션입니다. 다시 로그인하세요.")
-
-        # 3. 유저 정보 유효성 검사
-        if username is None or user_id is None:
+    # 1. 게이트웨이가 이미 검증한 신원이 있으면 토큰을 다시 해독하지 않습니다.
+    user = jwks.identity_from_headers(request.headers) if TRUST_IDENTITY_HEADERS else None
+    if user is None:
+        if not token:
             raise credentials_exception
-            
-        return {"username": username, "id": user_id}
-        
-    except (jwt.ExpiredSignatureError, jwt.PyJWTError):
-        raise credentials_exception
+        try:
+            payload = await jwks_cache.decode(token)
+        except jwks.JWKSUnavailableError:
+            raise HTTPException(status_code=503, detail="Auth service unavailable", headers={"Retry-After": "1"})
+        except jwt.PyJWTError:
+            raise credentials_exception
+        # 유저 정보 유효성 검사
+        if payload.get("user") is None or not isinstance(payload.get("id"), int):
+            raise credentials_exception
+        user = {"username": payload["user"], "id": payload["id"]}
+
+    # 2. 세션 존재 여부 확인 (프로세스 near-cache -> 없으면 Redis Sentinel)
+    if not await session_cache.is_session_active(user["id"]):
+        raise HTTPException(status_code=401, detail="로그아웃된 세션입니다. 다시 로그인하세요.")
+    return user
 
 def get_photo_url_for_fastapi(object_key: str):
     return f"/static/uploads/{object_key}"
@@ -73,68 +131,483 @@ def get_photo_url_for_fastapi(object_key: str):
 @app.on_event("startup")
 async def on_startup():
     """앱 시작 시 데이터베이스 테이블이 생성되도록 합니다."""
-    database.create_db_and_tables()
+    await database.create_db_and_tables_async()
+    session_cache.start_invalidation_listener()
+    change_events.start()
+    image_pool.start()
+
+@app.get("/metrics/session-cache")
+async def get_session_cache_metrics():
+    """세션 near-cache 적중률 및 무효화 지연 메트릭"""
+    return session_cache.session_cache.stats()
+
+@app.get("/metrics/change-stream")
+async def get_change_stream_metrics():
+    """이 워커에 연결된 SSE 클라이언트 수와 받은/전달한 변경 이벤트 수"""
+    return change_events.stats()
+
+def encode_cursor(full_name: str, employee_id: int) -> str:
+    """마지막 행의 (full_name, id) 를 URL 에 안전한 커서 문자열로 만듭니다."""
+    raw = json.dumps([full_name, employee_id], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        full_name, employee_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(full_name), int(employee_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@app.get("/employees", response_model=EmployeesListResponse)
-async def get_employees(user: dict = Depends(get_current_user_info)):
-    """모든 직원의 목록을 JSON 배열로 반환합니다. (Redis 캐싱 적용)"""
-    start_time = time.time()
-    r = get_cache_redis()
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """?fields=id,full_name,photo_url 을 검증해 리스트로 반환합니다. 없으면 None (전체 필드)."""
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in SELECTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(["id", *requested]))
+
+def employee_row_to_public(row: dict, fields: Optional[List[str]]) -> dict:
+    """DB 행(dict)을 응답 형태로 바꿉니다. fields 가 있으면 해당 필드만 남깁니다."""
+    data = dict(row)
+    data["photo_url"] = get_photo_url_for_fastapi(row["object_key"]) if row.get("object_key") else None
+    if fields is None:
+        return {name: data.get(name) for name in EmployeePublic.model_fields}
+    return {name: data.get(name) for name in fields}
+
+def employees_cache_namespace(user_id: int) -> str:
+    """유저별 캐시 세대 namespace. 목록/페이지/단건 캐시 키 모두 이 세대 번호를 포함합니다."""
+    return f"employees:{user_id}"
+
+async def invalidate_employee_cache(r, user_id: int):
+    """유저의 목록/페이지/단건 캐시를 INCR 한 번으로 무효화합니다. (옛 세대 키는 TTL/LRU 로 사라짐)"""
+    await cache.bump_generation(r, employees_cache_namespace(user_id))
+
+class FacetDelta:
+    """facet_write 블록 안의 쓰기로 빠지고(removed) 더해진(added) 직원들"""
+
+    def __init__(self):
+        self.removed = []
+        self.added = []
+
+@asynccontextmanager
+async def facet_write(r, user_id: int):
+    """
+    직원 DB 쓰기를 감싸서, 쓰는 동안에는 패싯 재계산 결과가 저장되지 않게 하고 끝나면 모은 증감을 반영합니다.
+    Redis 오류는 이미 커밋된 쓰기를 실패로 만들지 않습니다. (오차는 재계산 작업이 바로잡음)
+    """
+    delta = FacetDelta()
+    try:
+        await facets.begin_write(r, user_id)
+    except Exception as e:
+        print(f"Facet write mark failed for User {user_id}: {e}")
+    try:
+        yield delta
+    finally:
+        # 쓰기가 예외로 끝나도(빈 증감) 진행 중 표시는 풀어야 재계산이 막히지 않습니다.
+        try:
+            await facets.apply_delta(r, user_id, delta.removed, delta.added)
+        except Exception as e:
+            print(f"Facet counter update failed for User {user_id}: {e}")
+
+def change_frame(row: dict) -> str:
+    """변경 기록 행 -> SSE 프레임. 현재 값이 있으면 upsert(직원 JSON), 없으면 delete({"id"})"""
+    if row["id"] is None:
+        return change_events.format_event("delete", orjson.dumps({"id": row["employee_id"]}).decode(), row["seq"])
+    return change_events.format_event("upsert", orjson.dumps(employee_row_to_public(row, None)).decode(), row["seq"])
+
+async def publish_change(user_id: int, employee_id: int):
+    """
+    커밋된 변경을 유저 채널로 알립니다. 실패해도 이미 커밋된 쓰기는 성공으로 두고,
+    클라이언트는 재연결(Last-Event-ID) 시 변경 기록에서 따라잡습니다.
+    """
+    try:
+        row = await database.load_employee_change_async(user_id, employee_id)
+        if row is not None:
+            await change_events.publish(user_id, change_frame(row), row["seq"])
+    except Exception as e:
+        print(f"Change event publish failed for User {user_id}: {e}")
+
+async def publish_sync(user_id: int):
+    """여러 행이 한 번에 바뀌었을 때(대량 등록) 행마다 보내는 대신 전체 새로고침을 요청합니다."""
+    try:
+        await change_events.publish(user_id, change_events.SYNC_FRAME)
+    except Exception as e:
+        print(f"Change event publish failed for User {user_id}: {e}")
+
+def serialize_employees(employees: List[Employee]) -> str:
+    """ORM 객체 목록을 한 번에 EmployeePublic 으로 변환해 JSON 문자열로 만듭니다."""
+    employees_public = EMPLOYEE_LIST_ADAPTER.validate_python(employees, from_attributes=True)
+    for emp_public in employees_public:
+        if emp_public.object_key:
+            emp_public.photo_url = get_photo_url_for_fastapi(emp_public.object_key)
+    return EMPLOYEE_LIST_ADAPTER.dump_json(employees_public).decode()
+
+def raw_json_response(body: str, headers: Optional[dict] = None) -> Response:
+    """캐시에 저장된 JSON 문자열을 다시 파싱/검증하지 않고 그대로 응답합니다."""
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def employees_etag(user_id: int, generation: str, *variant) -> str:
+    """
+    유저 데이터 버전(캐시 세대)으로 만든 강한 ETag. 직원을 추가/수정/삭제하면 세대가 바뀌므로
+    세대와 요청 조건(variant)이 같으면 응답 본문도 바이트 단위로 같습니다.
+    """
+    tag = f"{user_id}.{generation}"
+    if variant:
+        tag += "." + hashlib.sha1(orjson.dumps(variant)).hexdigest()[:16]
+    return f'"{tag}"'
+
+def validator_headers(etag: str, headers: Optional[dict] = None) -> dict:
+    return {"ETag": etag, "Cache-Control": http_cache.REVALIDATE_CACHE_CONTROL, **(headers or {})}
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """If-None-Match 가 현재 ETag 와 같으면 캐시/DB 를 읽지 않고 본문 없는 304 를 돌려줍니다."""
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=validator_headers(etag))
+    return None
+
+async def get_employees_page(request: Request, user_id: int, limit: int, after: Optional[str], fields: Optional[str], search: Optional[dict] = None):
+    """keyset 페이지네이션 + 필드 프로젝션 목록. search 가 있으면 검색 결과. 페이지 단위로 캐시합니다."""
+    r = get_cache_redis_async()
+    selected_fields = parse_fields(fields)
+    after_key = decode_cursor(after) if after else None
+    generation = await cache.get_generation(r, employees_cache_namespace(user_id))
+    cache_key = f"employees_page:{user_id}:g{generation}:{limit}:{after or ''}:{','.join(selected_fields or [])}"
+    etag = employees_etag(user_id, generation, "page", limit, after, selected_fields)
+    if search is not None:
+        search_digest = hashlib.sha1(orjson.dumps(search, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        cache_key = f"employees_search:{user_id}:g{generation}:{search_digest}:{limit}:{after or ''}:{','.join(selected_fields or [])}"
+        etag = employees_etag(user_id, generation, "search", search_digest, limit, after, selected_fields)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+
+    async def load_page():
+        columns = None
+        if selected_fields is not None:
+            columns = [name for name in selected_fields if name != "photo_url"]
+            if "photo_url" in selected_fields:
+                columns.append("object_key")
+        if search is not None:
+            rows = await database.search_employees_page_async(user_id, limit, after_key, columns, **search)
+        else:
+            rows = await database.list_employees_page_async(user_id, limit, after_key, columns)
+        next_cursor = encode_cursor(rows[limit - 1]["full_name"], rows[limit - 1]["id"]) if len(rows) > limit else None
+        items = orjson.dumps([employee_row_to_public(row, selected_fields) for row in rows[:limit]]).decode()
+        # "<다음 커서>\n<JSON 배열>" 형태로 저장해 캐시 적중 시 JSON 을 파싱하지 않고도 커서를 꺼냅니다.
+        return f"{next_cursor or ''}\n{items}"
+
+    cached_page, _ = await cache.get_or_compute(r, cache_key, LIST_CACHE_TTL, load_page)
+    next_cursor, _, items = cached_page.partition("\n")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return raw_json_response(items, validator_headers(etag, headers))
+
+@app.get("/employees", response_model=EmployeesListResponse, responses={304: {"description": "Not modified (If-None-Match)"}})
+async def get_employees(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="페이지 크기"),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 응답 필드 (예: id,full_name,photo_url)"),
+    user: dict = Depends(get_current_user_info),
+):
+    """
+    직원 목록을 JSON 배열로 반환합니다. (Redis 캐싱 + 스탬피드 방지 적용)
+    limit/after/fields 중 하나라도 주면 커서 페이지네이션으로 동작하며, 다음 페이지 커서는 X-Next-Cursor 헤더로 전달됩니다.
+    응답의 ETag 를 If-None-Match 로 보내면, 그 사이 바뀐 것이 없을 때 본문 없이 304 를 돌려줍니다.
+    """
+    if limit is not None or after is not None or fields is not None:
+        return await get_employees_page(request, user["id"], limit or DEFAULT_PAGE_SIZE, after, fields)
+
+    r = get_cache_redis_async()
 
     user_id = user["id"]
-    cache_key = f"employees_list_cache:{user_id}"
-
-   # 1. Redis 캐시 확인
-    cached_data = r.get(cache_key)
-    if cached_data:
-        execution_time = (time.time() - start_time) * 1000
-        print(f"🚀 Redis Cache Hit for User {user_id}: in {execution_time:.2f} ms")
-        return json.loads(cached_data)
-
-    # 2. 캐시 없으면 DB 조회 (수정된 database.list_employees 함수 사용 필요)
-    # database.py에서 list_employees(owner_id=user_id) 로 수정되어야 함
-    employees: List[Employee] = database.list_employees(owner_id=user_id)
-    
-    employees_public_data = []
-    for employee in employees:
-        emp_public = EmployeePublic.from_orm(employee)
-        if employee.object_key:
-            emp_public.photo_url = get_photo_url_for_fastapi(employee.object_key)
-        employees_public_data.append(emp_public)
-    
-    # 3. Redis에 유저별 결과 저장
-    r.setex(cache_key, 300, json.dumps([e.dict() for e in employees_public_data]))
-
-    execution_time = (time.time() - start_time) * 1000
-    print(f"🐌 DB Query (Cache Miss) for User {user_id}: in {execution_time:.2f} ms")
-    return employees_public_data
-
-@app.get("/employee/{employee_id}", response_model=EmployeePublic, responses={404: {"description": "Employee not found"}})
-async def get_employee(employee_id: int):
-    """단일 직원 조회 (Redis 캐싱 적용)"""
-    start_time = time.time()
-    r = get_cache_redis()
-    cache_key = f"emp_cache:{employee_id}"
-
-    # 1. Redis 확인
-    cached_emp = r.get(cache_key)
-    if cached_emp:
-        execution_time = (time.time() - start_time) * 1000
-        print(f"🚀 Redis Cache Hit: get_employee({employee_id}) in {execution_time:.2f} ms")
-        return json.loads(cached_emp)
-
-    # 2. DB 조회
-    employee: Optional[Employee] = database.load_employee(employee_id)
-    if employee:
-        emp_public = EmployeePublic.from_orm(employee)
+    generation = await cache.get_generation(r, employees_cache_namespace(user_id))
+    # 0. 클라이언트가 가진 버전이 최신이면 캐시 값도 읽지 않고 304
+    etag = employees_etag(user_id, generation)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    cache_key = f"employees_list:{user_id}:g{generation}"
+
+    async def load_list():
+        # 캐시가 비었을 때 이 워커/프로세스에서 한 번만 실행됩니다.
+        employees: List[Employee] = await database.list_employees_async(owner_id=user_id)
+        return serialize_employees(employees)
+
+    # 1. Redis 캐시 확인 (없거나 만료 임박이면 한 태스크만 DB 조회, 나머지는 결과/옛 값 사용)
+    cached_data, _ = await cache.get_or_compute(r, cache_key, LIST_CACHE_TTL, load_list)
+    # 2. 캐시된 JSON 을 그대로 응답 (json.loads -> response_model 검증 -> 재직렬화 생략)
+    return raw_json_response(cached_data, validator_headers(etag))
+
+@app.get("/employees/search", response_model=EmployeesListResponse, responses={304: {"description": "Not modified (If-None-Match)"}})
+async def search_employees(
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200, description="이름/직함 검색어 (모든 단어 포함, 접두어 일치)"),
+    location: Optional[str] = Query(None, max_length=200),
+    job_title: Optional[str] = Query(None, max_length=200),
+    badge: List[str] = Query([], description="배지 (여러 번 주면 모두 가진 직원)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 응답 필드"),
+    user: dict = Depends(get_current_user_info),
+):
+    """
+    본인 직원 검색. 목록과 같은 순서(full_name DESC, id DESC)와 커서를 사용하며,
+    결과는 유저의 캐시 세대 아래에 페이지 단위로 캐시됩니다.
+    """
+    search = {
+        "q": (q or "").strip() or None,
+        "location": location or None,
+        "job_title": job_title or None,
+        "badges": sorted(database.split_badges(",".join(badge))),
+    }
+    return await get_employees_page(request, user["id"], limit, after, fields, search)
+
+@app.get("/employees/facets")
+async def get_employee_facets(user: dict = Depends(get_current_user_info)):
+    """
+    본인 직원의 location / job_title / badge 별 인원 수 (많은 순).
+    Redis 패싯 카운터를 그대로 읽고, 카운터가 없을 때만 DB 에서 다시 계산합니다.
+    """
+    user_id = user["id"]
+    r = get_cache_redis_async()
+    counts = await facets.get_facets(r, user_id)
+    if counts is None:
+        # 유저별 잠금으로 동시 요청 중 하나만 GROUP BY 하고, 그 사이 쓰기가 있었으면 저장하지 않습니다.
+        counts, stored = await facets.rebuild_facets(r, user_id, lambda: database.employee_facet_counts_async(user_id))
+        if stored:
+            print(f"🐌 Facets rebuilt from DB for User {user_id}")
+    return {
+        dimension: dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+        for dimension, values in counts.items()
+    }
+
+@app.get("/employees/changes", response_model=EmployeeChangesResponse, responses={304: {"description": "Not modified (If-None-Match)"}})
+async def get_employee_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="이전 응답의 next_since 값 (0 이면 처음부터 = 전체 목록)"),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+    user: dict = Depends(get_current_user_info),
+):
+    """
+    since 이후 추가/수정된 직원(현재 값)과 삭제된 직원 id(tombstone)만 돌려줍니다. (델타 동기화)
+    클라이언트는 changes 를 id 기준으로 덮어쓰고 deleted 를 지운 뒤 next_since 를 저장해 두었다가 다음에 보냅니다.
+    has_more 가 true 면 바로 이어서 호출합니다. 비용은 직원 수가 아니라 변경 수에 비례합니다.
+    """
+    user_id = user["id"]
+    r = get_cache_redis_async()
+    # 같은 since 로 다시 물었는데 그 사이 쓰기가 없었으면(세대 동일) DB 를 읽지 않고 304
+    generation = await cache.get_generation(r, employees_cache_namespace(user_id))
+    etag = employees_etag(user_id, generation, "changes", since, limit)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+
+    rows = await database.list_employee_changes_async(user_id, since, limit)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes, deleted = [], []
+    for row in rows:
+        if row["id"] is None:
+            deleted.append(row["employee_id"]) # 직원 행이 없으면 삭제된 것
+        else:
+            changes.append(employee_row_to_public(row, None))
+    body = {
+        "changes": changes,
+        "deleted": deleted,
+        "next_since": rows[-1]["seq"] if rows else since,
+        "has_more": has_more,
+    }
+    return raw_json_response(orjson.dumps(body).decode(), validator_headers(etag))
+
+async def session_still_active(user_id: int) -> bool:
+    try:
+        return await session_cache.is_session_active(user_id)
+    except Exception:
+        return True # Redis 장애로 열린 스트림을 끊지는 않습니다.
+
+@app.get("/employees/stream")
+async def stream_employee_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="이 seq 이후 변경부터 (Last-Event-ID 헤더가 있으면 그 값)"),
+    user: dict = Depends(get_current_user_info),
+):
+    """
+    본인 직원의 변경을 Server-Sent Events 로 보냅니다.
+      upsert (id: seq, data: 직원 JSON) / delete (id: seq, data: {"id"}) /
+      sync (목록 전체를 다시 받으라는 신호) / ready (id: 기준 seq, 여기부터 실시간)
+    Last-Event-ID(또는 since)가 있으면 그 이후 변경을 변경 기록에서 먼저 보내고, 없으면 sync 를 보냅니다.
+    연결이 조용하면 SSE_HEARTBEAT_SECONDS 마다 주석 줄을 보내고, 그때 로그아웃된 세션이면 스트림을 닫습니다.
+    """
+    user_id = user["id"]
+    last_event_id = request.headers.get("last-event-id", "").strip()
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    stream = change_events.open_stream(user_id) # 변경 기록을 읽기 전에 등록해 사이에 낀 변경을 놓치지 않습니다.
+
+    async def generate():
+        try:
+            yield change_events.retry_frame()
+            # 1. 따라잡기: boundary 이하 seq 의 실시간 이벤트는 이미 보냈거나 sync 로 덮이므로 건너뜁니다.
+            boundary = since
+            if since is not None:
+                rows = await database.list_employee_changes_async(user_id, since, SSE_REPLAY_LIMIT)
+                if len(rows) <= SSE_REPLAY_LIMIT:
+                    for row in rows:
+                        yield change_frame(row)
+                    boundary = rows[-1]["seq"] if rows else since
+                else:
+                    boundary = None
+            if boundary is None:
+                boundary = await database.latest_employee_change_seq_async(user_id)
+                yield change_events.SYNC_FRAME
+            yield change_events.format_event("ready", orjson.dumps({"since": boundary}).decode(), boundary)
+
+            # 2. 실시간
+            while True:
+                try:
+                    seq, frame = await asyncio.wait_for(stream.queue.get(), change_events.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if not await session_still_active(user_id):
+                        return
+                    yield change_events.HEARTBEAT_FRAME
+                    continue
+                if stream.overflowed:
+                    stream.drain()
+                    yield change_events.SYNC_FRAME
+                    continue
+                if seq is not None and seq <= boundary:
+                    continue
+                yield frame
+        finally:
+            change_events.close_stream(stream)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        # 프록시(nginx ingress 등)가 응답을 모아 두지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/employees/bulk")
+async def bulk_import_employees(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv 또는 ndjson (없으면 Content-Type 으로 판단)"),
+    user: dict = Depends(get_current_user_info),
+):
+    """
+    CSV(헤더 행 필수) 또는 NDJSON 본문을 스트리밍으로 읽어 직원을 대량 등록합니다.
+    BULK_BATCH_SIZE 행씩 한 트랜잭션으로 넣고, 잘못된 행은 건너뛴 뒤 줄 번호와 함께 errors 로 알려줍니다.
+    목록 캐시는 배치마다 한 번만 무효화합니다.
+    """
+    user_id = user["id"]
+    r = get_cache_redis_async()
+    try:
+        fmt = bulk_io.detect_format(request.headers.get("content-type"), format)
+    except bulk_io.BulkFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    inserted = 0
+    failed = 0
+    errors = []
+    batch = []
+    batch_start_line = 0
+
+    def report(line: int, message: str, rows: int = 1):
+        nonlocal failed
+        failed += rows
+        if len(errors) < BULK_MAX_REPORTED_ERRORS:
+            errors.append({"line": line, "error": message})
+
+    async def flush():
+        nonlocal inserted, batch
+        if not batch:
+            return
+        try:
+            async with facet_write(r, user_id) as delta:
+                inserted += await database.add_employees_bulk_async(user_id, batch)
+                delta.added.extend(batch)
+            await invalidate_employee_cache(r, user_id)
+            await publish_sync(user_id)
+        except Exception as e:
+            print(f"Bulk insert batch failed: {e}")
+            report(batch_start_line, f"Batch of {len(batch)} rows starting here was not inserted: {e}", len(batch))
+        batch = []
+
+    try:
+        async for line, record, error in bulk_io.iter_records(request.stream(), fmt):
+            if error is not None:
+                report(line, error)
+                continue
+            try:
+                row = EmployeeImport.model_validate(record)
+            except ValidationError as e:
+                report(line, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+                continue
+            if not batch:
+                batch_start_line = line
+            batch.append(row.model_dump())
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush()
+    except bulk_io.BulkFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # 요청이 중간에 끊겨도 이미 검증된 행은 저장합니다.
+        await flush()
+
+    return {"inserted": inserted, "failed": failed, "errors": errors}
+
+@app.get("/employees/export")
+async def export_employees(
+    format: str = Query(bulk_io.NDJSON, pattern="^(ndjson|csv)$", description="ndjson 또는 csv"),
+    user: dict = Depends(get_current_user_info),
+):
+    """유저의 전체 직원 목록을 서버 사이드 커서로 읽으면서 NDJSON/CSV 로 스트리밍합니다."""
+    user_id = user["id"]
+
+    async def generate():
+        first = True
+        async for rows in database.stream_employees_async(user_id, EXPORT_COLUMNS):
+            yield bulk_io.format_rows(rows, format, EXPORT_COLUMNS, with_header=first)
+            first = False
+        if first and format == bulk_io.CSV:
+            yield bulk_io.format_rows([], format, EXPORT_COLUMNS, with_header=True)
+
+    return StreamingResponse(
+        generate(),
+        media_type=bulk_io.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'},
+    )
+
+@app.get("/employee/{employee_id}", response_model=EmployeePublic,
+         responses={304: {"description": "Not modified (If-None-Match)"}, 404: {"description": "Employee not found"}})
+async def get_employee(employee_id: int, request: Request, user: dict = Depends(get_current_user_info)):
+    """단일 직원 조회 (본인 데이터만, Redis 캐싱 + 스탬피드 방지 적용, ETag / If-None-Match 지원)"""
+    r = get_cache_redis_async()
+    user_id = user["id"]
+    generation = await cache.get_generation(r, employees_cache_namespace(user_id))
+    # ETag 는 200 으로 응답한 직원에게만 나가므로, 같은 세대에서 일치하면 그 직원은 여전히 그대로입니다.
+    etag = employees_etag(user_id, generation, "employee", employee_id)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    cache_key = f"employee:{user_id}:g{generation}:{employee_id}"
+
+    async def load_one():
+        employee: Optional[Employee] = await database.load_employee_async(employee_id)
+        if employee is None or employee.owner_id != user_id:
+            return None # 없는 직원/남의 직원은 캐시하지 않음
+        emp_public = EmployeePublic.model_validate(employee)
         if employee.object_key:
             emp_public.photo_url = get_photo_url_for_fastapi(employee.object_key)
-        
-        # 3. 캐시에 저장
-        r.setex(cache_key, 600, json.dumps(emp_public.dict()))
-        return emp_public
-    
-    raise HTTPException(status_code=404, detail="Employee not found")
+        return emp_public.model_dump_json()
+
+    cached_emp, _ = await cache.get_or_compute(r, cache_key, ITEM_CACHE_TTL, load_one)
+    if cached_emp is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return raw_json_response(cached_emp, validator_headers(etag))
 
 @app.post("/employee", response_model=Employee)
 async def save_employee(
@@ -148,16 +621,30 @@ async def save_employee(
 ):
 
     user_id = user["id"]
-    r = get_cache_redis()
-    user_list_cache = f"employees_list_cache:{user_id}"
+    r = get_cache_redis_async()
+
+    old_employee = None
+    if employee_id:
+        old_employee = await database.load_employee_async(employee_id)
+        # [보안] 본인 데이터만 수정 가능 (남의 직원을 덮어써서 가져가는 것 방지)
+        # 사진을 올리기 전에 확인해야 거절된 요청이 photo_service 에 주인 없는 사진을 남기지 않습니다.
+        if not old_employee or old_employee.owner_id != user_id:
+            raise HTTPException(status_code=404, detail="Employee not found")
 
     key = None
     if photo and photo.filename != '':
-        # 이미지 업로드 로직 (기존과 동일)
-        image_bytes = util.resize_image(photo.file, (120, 160))
+        # 이미지 리사이즈는 CPU 작업이므로 이벤트 루프가 아닌 프로세스 풀에서 실행합니다.
+        try:
+            image_bytes = await image_pool.resize_image(await photo.read(), PHOTO_MASTER_SIZE)
+        except image_pool.ImagePoolBusyError:
+            raise HTTPException(status_code=503, detail="Image processing is busy, try again shortly", headers={"Retry-After": "1"})
+        except util.ImageTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         if image_bytes:
             try:
-                files = {'file': (photo.filename, image_bytes, photo.content_type)}
+                # resize_image 결과는 항상 PNG 이므로 확장자/타입도 맞춰서 보냅니다.
+                png_name = f"{os.path.splitext(photo.filename)[0]}.png"
+                files = {'file': (png_name, image_bytes, "image/png")}
                 response = await client.post(f"{config.PHOTO_SERVICE_URL}/upload", files=files)
                 response.raise_for_status()
                 upload_result = response.json()
@@ -166,41 +653,55 @@ async def save_employee(
                 raise HTTPException(status_code=500, detail=f"Could not upload image: {e}")
 
     # [수정] Employee 객체 생성 시 owner_id 명시
-    employee_data = Employee(
+    employee_fields = dict(
         id=employee_id,
-        object_key=key,
         full_name=full_name,
         location=location,
         job_title=job_title,
         badges=badges,
         owner_id=user_id # 현재 로그인한 유저를 주인으로 설정
     )
+    # 새 사진이 없으면 object_key 를 아예 넘기지 않습니다. (update 는 exclude_unset 이라 None 을 넘기면
+    # 기존 사진이 지워지고, photo_service 의 참조 수는 줄지 않아 사진 파일이 남습니다.)
+    if key:
+        employee_fields["object_key"] = key
+    employee_data = Employee(**employee_fields)
 
     if employee_id:
-        # 수정 로직
+        # 수정 로직 (소유자 확인은 사진 업로드 전에 끝남)
         if key:
-            old_employee = database.load_employee(employee_id)
-            if old_employee and old_employee.object_key:
+            if old_employee.object_key:
                 try: await client.delete(f"{config.PHOTO_SERVICE_URL}/photos/{old_employee.object_key}")
                 except Exception as e: print(f"Error: {e}")
         
-        updated_employee = database.update_employee(employee_id, employee_data)
+        async with facet_write(r, user_id) as delta:
+            updated_employee = await database.update_employee_async(employee_id, employee_data)
+            if updated_employee:
+                delta.removed.append(old_employee)
+                delta.added.append(updated_employee)
         if updated_employee:
-            r.delete(f"emp_cache:{employee_id}")
-            r.delete(user_list_cache) # 본인 리스트 캐시만 삭제
+            await invalidate_employee_cache(r, user_id) # 본인 캐시 세대만 올림
+            await publish_change(user_id, employee_id)
             return updated_employee
+        # 확인 뒤에 지워진 경우: 방금 올린 사진은 쓸 곳이 없으므로 돌려놓습니다.
+        if key:
+            try: await client.delete(f"{config.PHOTO_SERVICE_URL}/photos/{key}")
+            except Exception as e: print(f"Error: {e}")
         raise HTTPException(status_code=404, detail="Employee not found")
     
     else:
         # 신규 추가
-        new_employee = database.add_employee(employee_data)
-        r.delete(user_list_cache) # 본인 리스트 캐시만 삭제
+        async with facet_write(r, user_id) as delta:
+            new_employee = await database.add_employee_async(employee_data)
+            delta.added.append(new_employee)
+        await invalidate_employee_cache(r, user_id) # 본인 캐시 세대만 올림
+        await publish_change(user_id, new_employee.id)
         return new_employee
 
 @app.delete("/employee/{employee_id}")
 async def delete_employee_route(employee_id: int, user: dict = Depends(get_current_user_info)):
     user_id = user["id"]
-    employee = database.load_employee(employee_id)
+    employee = await database.load_employee_async(employee_id)
     
     # [보안] 본인 데이터인지 확인
     if not employee or employee.owner_id != user_id:
@@ -210,10 +711,11 @@ async def delete_employee_route(employee_id: int, user: dict = Depends(get_curre
         try: await client.delete(f"{config.PHOTO_SERVICE_URL}/photos/{employee.object_key}")
         except Exception as e: print(f"Error: {e}")
 
-    database.delete_employee(employee_id)
-
-    r = get_cache_redis()
-    r.delete(f"emp_cache:{employee_id}")
-    r.delete(f"employees_list_cache:{user_id}")
+    r = get_cache_redis_async()
+    async with facet_write(r, user_id) as delta:
+        await database.delete_employee_async(employee_id)
+        delta.removed.append(employee)
+    await invalidate_employee_cache(r, user_id)
+    await publish_change(user_id, employee_id)
     
     return JSONResponse(status_code=200, content={"success": True, "message": f"Employee {employee_id} deleted."})
\ No newline at end of file
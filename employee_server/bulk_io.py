@@ -0,0 +1,113 @@
+"""
+대량 등록(POST /employees/bulk) / 내보내기(GET /employees/export)용 CSV, NDJSON 스트리밍 처리
+
+요청 본문을 청크 단위로 읽어 한 행씩 넘기므로, 파일 전체를 메모리에 올리지 않습니다.
+"""
+import codecs
+import csv
+from io import StringIO
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+import orjson
+
+CSV = "csv"
+NDJSON = "ndjson"
+MEDIA_TYPES = {CSV: "text/csv; charset=utf-8", NDJSON: "application/x-ndjson"}
+
+
+class BulkFormatError(ValueError):
+    """업로드 전체를 쓸 수 없을 때 (예: 헤더 행이 없는 CSV, 지원하지 않는 형식)"""
+
+
+def detect_format(content_type: Optional[str], requested: Optional[str]) -> str:
+    """?format= 값이 있으면 그것을, 없으면 Content-Type 을 보고 csv / ndjson 을 고릅니다."""
+    if requested:
+        if requested not in MEDIA_TYPES:
+            raise BulkFormatError(f"Unsupported format: {requested}")
+        return requested
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return CSV
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+        return NDJSON
+    raise BulkFormatError("Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """바이트 스트림을 줄 단위로 디코딩합니다. (청크 하나 이상을 메모리에 쌓지 않음, UTF-8 BOM 제거)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    입력 행마다 (줄 번호, 레코드, 오류)를 돌려줍니다. 빈 줄은 건너뜁니다.
+    읽을 수 없는 행은 (줄 번호, None, 오류 메시지)로 돌려주어 호출한 쪽이 보고하고 계속 진행할 수 있게 합니다.
+    """
+    header: Optional[List[str]] = None
+    record_lines: List[str] = []
+    start_line = 0
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if fmt == NDJSON:
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                yield line_no, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Each line must be a JSON object"
+                continue
+            yield line_no, record, None
+            continue
+
+        # CSV: 따옴표로 감싼 값은 여러 줄에 걸칠 수 있으므로 따옴표 짝이 맞을 때까지 줄을 모읍니다.
+        if not record_lines:
+            if not line.strip():
+                continue
+            start_line = line_no
+        record_lines.append(line)
+        text = "\n".join(record_lines)
+        if text.count('"') % 2:
+            continue
+        record_lines = []
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            yield start_line, None, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start_line, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start_line, dict(zip(header, values)), None
+
+    if record_lines:
+        yield start_line, None, "Unterminated quoted field"
+    if fmt == CSV and header is None and line_no:
+        raise BulkFormatError("CSV upload has no header row")
+
+
+def format_rows(rows: Iterable[dict], fmt: str, columns: List[str], with_header: bool = False) -> str:
+    """행 묶음을 NDJSON 줄 또는 CSV 레코드 문자열로 만듭니다."""
+    if fmt == NDJSON:
+        return "".join(orjson.dumps(row).decode() + "\n" for row in rows)
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    if with_header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
@@ -0,0 +1,160 @@
+"""
+직원 변경을 유저별 Redis pub/sub 채널을 거쳐 SSE(Server-Sent Events) 클라이언트에 전달합니다.
+
+쓰기 요청은 미리 만든 SSE 프레임을 employees:events:<owner_id> 로 publish 하고,
+각 워커는 패턴 구독 하나로 받아 자기에게 연결된 클라이언트들의 큐에 나눠 넣습니다.
+"""
+import asyncio
+import os
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from common.redis_config import get_cache_redis_async
+
+# 변경마다 <prefix><owner_id> 로 publish 합니다. 워커마다 패턴 구독은 하나뿐이라
+# 연결만 해 둔 클라이언트는 Redis 커넥션이 아니라 큐 하나만 차지합니다.
+CHANNEL_PREFIX = os.environ.get("EMPLOYEE_EVENTS_CHANNEL_PREFIX", "employees:events:")
+# 조용한 클라이언트에 보내는 주석 줄 간격(초). 프록시가 연결을 끊지 않게 하고, 끊긴 클라이언트를 알아챕니다.
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+# 클라이언트마다 쌓아 두는 이벤트 수. 이만큼 밀린 클라이언트에는 대신 sync(다시 받기)를 보냅니다.
+SSE_CLIENT_QUEUE_SIZE = int(os.environ.get("SSE_CLIENT_QUEUE_SIZE", "100"))
+# 브라우저에 알려 주는 재연결 대기 시간(ms)
+SSE_RETRY_MS = int(os.environ.get("SSE_RETRY_MS", "3000"))
+
+HEARTBEAT_FRAME = ": ping\n\n"
+# id: 줄이 없으므로 클라이언트의 마지막 이벤트 id(이어 받을 위치)는 그대로 남습니다.
+SYNC_FRAME = "event: sync\ndata: {}\n\n"
+
+_clients: Dict[int, Set["StreamClient"]] = defaultdict(set)
+_listener_task: Optional[asyncio.Task] = None
+_stats = {"events_received": 0, "events_delivered": 0, "overflows": 0, "resubscribes": 0}
+
+
+def channel(owner_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{owner_id}"
+
+
+def format_event(event: str, data: str, seq: Optional[int] = None) -> str:
+    """SSE 프레임 하나. data 는 한 줄이어야 합니다. (공백 없는 JSON)"""
+    frame = f"event: {event}\ndata: {data}\n\n"
+    return f"id: {seq}\n{frame}" if seq is not None else frame
+
+
+def retry_frame() -> str:
+    return f"retry: {SSE_RETRY_MS}\n\n"
+
+
+async def publish(owner_id: int, frame: str, seq: Optional[int] = None):
+    """만들어 둔 프레임을 "<seq>\\n<frame>" 로 publish 합니다. 구독하는 워커는 JSON 을 파싱하지 않고 그대로 나눠 줍니다."""
+    await get_cache_redis_async().publish(channel(owner_id), f"{'' if seq is None else seq}\n{frame}")
+
+
+class StreamClient:
+    """연결된 SSE 클라이언트 하나. 워커의 리스너가 (seq, 프레임)을 크기가 정해진 큐에 넣습니다."""
+
+    def __init__(self, owner_id: int):
+        self.owner_id = owner_id
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=SSE_CLIENT_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, seq: Optional[int], frame: str):
+        try:
+            self.queue.put_nowait((seq, frame))
+        except asyncio.QueueFull:
+            # 느린 클라이언트 때문에 리스너를 멈추지 않습니다. 따라잡으면 sync 이벤트 하나만 받습니다.
+            if not self.overflowed:
+                _stats["overflows"] += 1
+            self.overflowed = True
+
+    def drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+def open_stream(owner_id: int) -> StreamClient:
+    """변경 기록을 읽기 전에 먼저 등록해야 재전송과 실시간 사이에 빠지는 이벤트가 없습니다."""
+    client = StreamClient(owner_id)
+    _clients[owner_id].add(client)
+    return client
+
+
+def close_stream(client: StreamClient):
+    clients = _clients.get(client.owner_id)
+    if clients is not None:
+        clients.discard(client)
+        if not clients:
+            del _clients[client.owner_id]
+
+
+def _dispatch(channel_name: str, data: str):
+    _stats["events_received"] += 1
+    try:
+        clients = _clients.get(int(channel_name[len(CHANNEL_PREFIX):]))
+    except ValueError:
+        return
+    if not clients:
+        return
+    seq, _, frame = data.partition("\n")
+    seq = int(seq) if seq else None
+    for client in list(clients):
+        client.offer(seq, frame)
+    _stats["events_delivered"] += len(clients)
+
+
+def _broadcast_sync():
+    for clients in list(_clients.values()):
+        for client in list(clients):
+            client.offer(None, SYNC_FRAME)
+
+
+async def _listen():
+    while True:
+        pubsub = get_cache_redis_async().pubsub()
+        try:
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+            # 구독이 끊긴 동안 publish 된 이벤트는 사라졌으므로 연결된 클라이언트는 다시 받아야 합니다.
+            _stats["resubscribes"] += 1
+            _broadcast_sync()
+            while True:
+                # listen() 은 0.5초 소켓 타임아웃에 걸리므로 get_message 의 자체 타임아웃으로 기다립니다.
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message.get("type") != "pmessage":
+                    continue
+                _dispatch(message["channel"], message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Employee change listener error: {e}")
+            await asyncio.sleep(1)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def start():
+    """워커의 패턴 구독을 시작합니다. (앱 시작 시 호출)"""
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen())
+
+
+async def stop():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
+
+
+def stats() -> dict:
+    return {
+        "clients": sum(len(clients) for clients in _clients.values()),
+        "owners": len(_clients),
+        **_stats,
+    }
@@ -0,0 +1,72 @@
+"""
+이미지 리사이즈를 이벤트 루프가 아닌 크기가 정해진 프로세스 풀에서 실행합니다.
+
+대기열이 가득 차거나 작업 프로세스가 죽으면 ImagePoolBusyError 로 알려 업로드를 503 으로 돌려보냅니다.
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import util
+
+# PIL 작업을 하는 프로세스 수
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 서버 프로세스당 실행 중 + 대기 중인 리사이즈 작업의 최대 수. 넘으면 업로드는 503
+IMAGE_QUEUE_LIMIT = int(os.environ.get("IMAGE_QUEUE_LIMIT", str(IMAGE_WORKERS * 4)))
+
+_executor = None
+_pending = 0
+
+
+class ImagePoolBusyError(RuntimeError):
+    """리사이즈 작업이 이미 IMAGE_QUEUE_LIMIT 개 쌓여 있거나, 풀의 작업 프로세스가 죽었을 때"""
+
+
+def _resize_bytes(data, size):
+    # 작업 프로세스에서 실행됩니다. 이미지는 bytes 로 프로세스 경계를 넘습니다.
+    return util.resize_image(BytesIO(data), size)
+
+
+def start():
+    """프로세스 풀을 만듭니다. (앱 시작 시 호출)"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+
+
+def shutdown():
+    """프로세스 풀을 멈춥니다. (앱 종료 시 호출)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def resize_image(data, size):
+    """이미지 bytes 를 프로세스 풀에서 리사이즈합니다. 대기열이 가득 찼거나 작업 프로세스가 죽었으면 ImagePoolBusyError"""
+    global _executor, _pending
+    if _pending >= IMAGE_QUEUE_LIMIT:
+        raise ImagePoolBusyError(f"{_pending} image jobs already queued")
+    start()
+    executor = _executor
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, _resize_bytes, data, size)
+    except BrokenProcessPool as e:
+        # 작업 프로세스가 죽으면(예: OOM) 풀 전체를 쓸 수 없으므로 버리고, 다음 호출이 새 풀을 만들게 합니다.
+        # 이미 다른 실패한 작업이 새 풀을 만들었을 수 있으니 깨진 그 풀일 때만 버립니다.
+        if _executor is executor:
+            print(f"Image pool broken, restarting: {e}")
+            _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise ImagePoolBusyError("image worker crashed") from e
+    finally:
+        _pending -= 1
+
+
+def pending():
+    """지금 실행 중이거나 대기 중인 리사이즈 작업 수"""
+    return _pending
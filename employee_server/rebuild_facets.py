@@ -0,0 +1,62 @@
+"""
+Redis 패싯 카운터(facets:{owner_id}:*)를 DB 에서 다시 계산해 바로잡습니다.
+
+요청 처리 중 Redis 오류나 LRU 축출로 증감이 빠지면 카운터가 실제 인원 수와 달라질 수 있습니다.
+이 작업은 유저별로 GROUP BY 결과와 저장된 값을 비교해 차이를 출력하고, 다르면 통째로 교체합니다.
+
+사용 예 (employee_server 컨테이너에서):
+    python rebuild_facets.py --all
+    python rebuild_facets.py --owner 3 --dry-run
+"""
+import argparse
+import asyncio
+
+from common import database, facets
+from common.redis_config import close_redis_clients, get_cache_redis_async
+
+async def reconcile(owner_id: int, dry_run: bool) -> bool:
+    """유저 한 명의 카운터를 검사하고 필요하면 교체합니다. 차이가 있었으면 True"""
+    r = get_cache_redis_async()
+    # 조회 요청의 재계산과 겹치지 않게 유저별 잠금을 잡고, GROUP BY 동안 쓰기가 있었으면 교체하지 않습니다.
+    async with facets.rebuild_lock(r, owner_id) as locked:
+        if not locked:
+            print(f"owner {owner_id}: rebuild already in progress, skipped")
+            return False
+        epoch = await facets.write_epoch(r, owner_id)
+        actual = await database.employee_facet_counts_async(owner_id)
+        stored = await facets.get_facets(r, owner_id)
+        drift = facets.diff_facets(stored, actual)
+        if stored is not None and not drift:
+            print(f"owner {owner_id}: ok")
+            return False
+        if stored is None:
+            print(f"owner {owner_id}: not built")
+        for dimension, changed in drift.items():
+            for value, (was, now) in sorted(changed.items()):
+                print(f"owner {owner_id}: {dimension}[{value!r}] {was} -> {now}")
+        if not dry_run and not await facets.store_facets(r, owner_id, actual, epoch):
+            # 차이는 GROUP BY 와 겹친 쓰기 때문일 수도 있으므로 다음 실행에서 다시 확인합니다.
+            print(f"owner {owner_id}: employees changed during the rebuild, left as is")
+            return False
+    return True
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--owner", type=int, action="append", help="대상 유저 id (여러 번 지정 가능)")
+    target.add_argument("--all", action="store_true", help="직원이 있는 모든 유저")
+    parser.add_argument("--dry-run", action="store_true", help="차이만 출력하고 Redis 는 바꾸지 않음")
+    args = parser.parse_args()
+
+    owner_ids = await database.list_employee_owner_ids_async() if args.all else args.owner
+    fixed = 0
+    try:
+        for owner_id in owner_ids:
+            fixed += await reconcile(owner_id, args.dry_run)
+    finally:
+        await database.dispose_async_engine()
+        await close_redis_clients()
+    print(f"{len(owner_ids)} owners checked, {fixed} {'would be ' if args.dry_run else ''}rebuilt")
+
+if __name__ == "__main__":
+    asyncio.run(main())
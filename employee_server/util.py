@@ -4,6 +4,12 @@ from io import BytesIO
 from PIL import Image
 
 EXIF_ORIENTATION = 274  # Magic numbers from http://www.exiv2.org/tags.html
+# Reject images whose header declares more pixels than this before decoding them
+MAX_IMAGE_PIXELS = int(os.environ.get("IMAGE_MAX_PIXELS", str(40_000_000)))
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an image's declared dimensions exceed MAX_IMAGE_PIXELS"""
 
 def random_hex_bytes(n_bytes):
     """Create a hex encoded string of random bytes"""
@@ -18,6 +24,15 @@ def resize_image(file_p, size):
         print("Error: Unable to open image")
         return None
 
+    # Image.open only reads the header, so oversized images are rejected before decoding
+    if image.size[0] * image.size[1] > MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(f"Image is {image.size[0]}x{image.size[1]}, limit is {MAX_IMAGE_PIXELS} pixels")
+
+    # For JPEGs, let the decoder downscale by 1/2..1/8 while decoding (much cheaper than a full decode).
+    # Both sides use the larger target dimension so the result is still big enough after an EXIF rotation.
+    longest = max(size)
+    image.draft("RGB", (longest, longest))
+
     try:
         exif = dict(image._getexif().items())
         if exif[EXIF_ORIENTATION] == 3:
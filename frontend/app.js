@@ -57,6 +57,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 authSection.style.display = 'none';
                 employeeSection.style.display = 'block';
                 fetchEmployees();
+                startChangeStream();
             } catch (e) {
                 logout();
             }
@@ -132,44 +133,143 @@ document.addEventListener('DOMContentLoaded', () => {
     async function fetchEmployees() {
         showLoading();
         try {
-            const response = await fetch(`${API_BASE_URL}/api/employee/employees`, { headers: getAuthHeaders() });
+            const { response, data: employees, notModified } = await fetchJsonWithValidators(`${API_BASE_URL}/api/employee/employees`);
             if (response.status === 401) return logout();
-            const employees = await response.json();
-            employeeListDiv.innerHTML = '';
-            employees.forEach(emp => {
-                const empDiv = document.createElement('div');
-                empDiv.className = 'employee-item';
-                const displayPhoto = emp.photo_url || DEFAULT_PHOTO_PLACEHOLDER;
-                empDiv.innerHTML = `
-                    <img src="${displayPhoto}" alt="${emp.full_name}" width="120" height="160">
-                    <div>
-                        <h4>${emp.full_name} (${emp.job_title})</h4>
-                        <p>Location: ${emp.location}</p>
-                        <p>Badges: ${emp.badges || 'N/A'}</p>
-                        <button class="edit-employee" data-id="${emp.id}">Edit</button>
-                        <button class="delete-employee" data-id="${emp.id}">Delete</button>
-                    </div>
-                `;
-                employeeListDiv.appendChild(empDiv);
-            });
-            addEmployeeEventListeners();
+            // 그 사이 바뀐 것이 없으면 이미 그려 둔 목록(과 사진)을 그대로 둡니다.
+            if (notModified && employeeListDiv.childElementCount > 0) return;
+            currentEmployees = employees;
+            renderEmployees(employees);
         } catch (error) { console.error(error); }
         finally { hideLoading(); }
     }
 
+    function renderEmployees(employees) {
+        employeeListDiv.innerHTML = '';
+        employees.forEach(emp => {
+            const empDiv = document.createElement('div');
+            empDiv.className = 'employee-item';
+            // 목록 타일은 120px 파생 이미지 (고해상도 화면은 240px)
+            const displayPhoto = emp.photo_url ? `${emp.photo_url}?w=120` : DEFAULT_PHOTO_PLACEHOLDER;
+            const displaySrcset = emp.photo_url ? `srcset="${emp.photo_url}?w=120 1x, ${emp.photo_url}?w=240 2x"` : '';
+            empDiv.innerHTML = `
+                <img src="${displayPhoto}" ${displaySrcset} alt="${emp.full_name}" width="120" height="160" loading="lazy">
+                <div>
+                    <h4>${emp.full_name} (${emp.job_title})</h4>
+                    <p>Location: ${emp.location}</p>
+                    <p>Badges: ${emp.badges || 'N/A'}</p>
+                    <button class="edit-employee" data-id="${emp.id}">Edit</button>
+                    <button class="delete-employee" data-id="${emp.id}">Delete</button>
+                </div>
+            `;
+            employeeListDiv.appendChild(empDiv);
+        });
+        addEmployeeEventListeners();
+    }
+
+    // --- 실시간 변경 반영 (GET /employees/stream, Server-Sent Events) ---
+    // EventSource 는 Authorization 헤더를 보낼 수 없으므로 fetch 스트림을 직접 읽습니다.
+    // upsert/delete 는 화면의 목록에 바로 반영하고, sync 를 받으면 목록을 다시 받습니다. (ETag 로 바뀐 게 없으면 304)
+    let currentEmployees = [];
+    let changeStream = null; // AbortController
+    let lastEventId = null; // 재연결 시 Last-Event-ID 로 보내 놓친 변경부터 다시 받습니다.
+    let renderTimer = null;
+    let refreshTimer = null;
+
+    function byNameDesc(a, b) { return b.full_name.localeCompare(a.full_name) || b.id - a.id; }
+    function scheduleRender() {
+        // 변경이 몰려 와도 한 번만 다시 그립니다.
+        clearTimeout(renderTimer);
+        renderTimer = setTimeout(() => renderEmployees([...currentEmployees].sort(byNameDesc)), 50);
+    }
+    function scheduleRefresh() {
+        clearTimeout(refreshTimer);
+        refreshTimer = setTimeout(fetchEmployees, 300);
+    }
+
+    function handleChangeEvent(event) {
+        if (event.type === 'upsert') {
+            const emp = JSON.parse(event.data);
+            currentEmployees = currentEmployees.filter(e => e.id !== emp.id).concat(emp);
+            scheduleRender();
+        } else if (event.type === 'delete') {
+            const { id } = JSON.parse(event.data);
+            currentEmployees = currentEmployees.filter(e => e.id !== id);
+            scheduleRender();
+        } else if (event.type === 'sync') {
+            scheduleRefresh();
+        }
+    }
+
+    function parseSseFrame(frame) {
+        const event = { type: 'message', data: '' };
+        for (const line of frame.split('\n')) {
+            const colon = line.indexOf(':');
+            if (colon === 0) continue; // 하트비트 주석
+            const field = colon < 0 ? line : line.slice(0, colon);
+            const value = colon < 0 ? '' : line.slice(colon + 1).replace(/^ /, '');
+            if (field === 'data') event.data += value;
+            else if (field === 'event') event.type = value;
+            else if (field === 'id') event.id = value;
+            else if (field === 'retry') event.retry = Number(value);
+        }
+        return event;
+    }
+
+    function startChangeStream() {
+        stopChangeStream();
+        const controller = new AbortController();
+        changeStream = controller;
+        (async () => {
+            let retryMs = 3000;
+            while (!controller.signal.aborted && jwtToken) {
+                try {
+                    const headers = getAuthHeaders();
+                    if (lastEventId !== null) headers['Last-Event-ID'] = lastEventId;
+                    const response = await fetch(`${API_BASE_URL}/api/employee/employees/stream`, { headers, signal: controller.signal });
+                    if (response.status === 401) return logout();
+                    if (!response.ok || !response.body) throw new Error(`change stream: HTTP ${response.status}`);
+                    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                    let buffer = '';
+                    while (true) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        buffer += value;
+                        let end;
+                        while ((end = buffer.indexOf('\n\n')) >= 0) {
+                            const event = parseSseFrame(buffer.slice(0, end));
+                            buffer = buffer.slice(end + 2);
+                            if (event.retry) retryMs = event.retry;
+                            if (event.id !== undefined) lastEventId = event.id;
+                            handleChangeEvent(event);
+                        }
+                    }
+                } catch (error) {
+                    if (controller.signal.aborted) return;
+                    console.warn(error);
+                }
+                // 서버 재시작 후 모든 브라우저가 한꺼번에 다시 붙지 않도록 대기 시간에 지터를 둡니다.
+                await new Promise(resolve => setTimeout(resolve, retryMs * (0.5 + Math.random())));
+            }
+        })();
+    }
+
+    function stopChangeStream() {
+        if (changeStream) changeStream.abort();
+        changeStream = null;
+    }
+
     function addEmployeeEventListeners() {
         // 사용자님의 원래 클래스명(.edit-employee)으로 이벤트 바인딩
         document.querySelectorAll('.edit-employee').forEach(btn => {
             btn.addEventListener('click', async (e) => {
                 const id = e.target.dataset.id;
-                const response = await fetch(`${API_BASE_URL}/api/employee/employee/${id}`, { headers: getAuthHeaders() });
-                const emp = await response.json();
+                const { response, data: emp } = await fetchJsonWithValidators(`${API_BASE_URL}/api/employee/employee/${id}`);
                 if (response.ok) {
                     document.getElementById('employee-id').value = emp.id;
                     document.getElementById('full_name').value = emp.full_name;
                     document.getElementById('location').value = emp.location;
                     document.getElementById('job_title').value = emp.job_title;
-                    photoPreview.src = emp.photo_url || DEFAULT_PHOTO_PLACEHOLDER;
+                    photoPreview.src = emp.photo_url ? `${emp.photo_url}?w=480` : DEFAULT_PHOTO_PLACEHOLDER;
                     cancelEditButton.style.display = 'inline-block';
                 }
             });
@@ -204,6 +304,8 @@ document.addEventListener('DOMContentLoaded', () => {
     // 2. 클라이언트 상태 정리 (API 호출 성공 여부와 상관없이 수행)
     jwtToken = null;
     localStorage.removeItem('jwtToken');
+    validatorCache.clear();
+    stopChangeStream();
     setAuthUI(false);
     alert("로그아웃 되었습니다.");
     location.reload(); // 페이지 새로고침으로 상태 초기화
@@ -213,6 +315,22 @@ document.addEventListener('DOMContentLoaded', () => {
     function showLoading() { loadingIndicator.style.display = 'block'; }
     function hideLoading() { loadingIndicator.style.display = 'none'; }
     function getAuthHeaders() { return jwtToken ? { 'Authorization': `Bearer ${jwtToken}` } : {}; }
+
+    // 조건부 GET: URL 별로 마지막 ETag 와 본문을 기억해 두고 If-None-Match 로 보냅니다.
+    // 바뀐 것이 없으면 서버는 본문 없이 304 를 주므로 기억해 둔 JSON 을 그대로 사용합니다. (notModified: true)
+    const validatorCache = new Map();
+    async function fetchJsonWithValidators(url) {
+        const cached = validatorCache.get(url);
+        const headers = getAuthHeaders();
+        if (cached) headers['If-None-Match'] = cached.etag;
+        const response = await fetch(url, { headers });
+        if (response.status === 304 && cached) return { response, data: cached.data, notModified: true };
+        const data = await response.json().catch(() => null);
+        const etag = response.headers.get('ETag');
+        if (response.ok && etag) validatorCache.set(url, { etag, data });
+        else validatorCache.delete(url);
+        return { response, data, notModified: false };
+    }
     function resetEmployeeForm() { 
         employeeForm.reset(); 
         document.getElementById('employee-id').value = ''; 
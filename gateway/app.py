@@ -1,7 +1,17 @@
-import time # 시간 측정을 위한 모듈
+import math # Retry-After 올림
+import os # 환경 변수 읽기
 from fastapi import FastAPI, Request, Response, HTTPException # FastAPI 프레임워크 관련 모듈
+from fastapi.responses import JSONResponse, StreamingResponse # 업스트림 응답을 버퍼링 없이 그대로 흘려보내기 위한 응답
+from starlette.background import BackgroundTask # 스트리밍이 끝난 뒤 업스트림 응답을 닫기 위한 작업
 from fastapi.middleware.cors import CORSMiddleware # CORS(교차 출처 리소스 공유) 미들웨어
 import httpx # 비동기 HTTP 요청을 위한 라이브러리 (FastAPI의 비동기 특성과 호환)
+from photo_cache import PhotoLRUCache, parse_range # 썸네일 LRU 캐시 및 Range 파싱
+from upstreams import CircuitOpenError, Upstream # 업스트림별 커넥션 풀 / 시간 제한 / 재시도 / 서킷 브레이커
+from common import metrics # Prometheus 계측 (/metrics)
+from common import tracing # 요청 ID 생성/전파 + 업스트림 Server-Timing 병합
+from common import jwks # auth_server 공개키(JWKS)로 토큰을 게이트웨이에서 직접 검증
+from common import http_cache # If-None-Match 비교 (사진 304)
+import jwt # 토큰 오류 타입 (PyJWT)
 
 app = FastAPI() # FastAPI 애플리케이션 인스턴스 생성
 
@@ -14,100 +24,275 @@ app.add_middleware(
     allow_headers=["*"],  # 모든 HTTP 헤더 허용
 )
 
+# 라우트별 지연/상태 코드와 업스트림(auth/employee/photo) 응답 지연을 /metrics 로 노출
+metrics.setup(app, "gateway")
+tracing.setup(app, "gateway")
+
 # 다운스트림 서비스(인증 서버, 직원 서버)의 URL 정의
 AUTH_SERVER_URL = "http://auth-server:5001"
 EMPLOYEE_SERVER_URL = "http://employee-server:5002"
 PHOTO_SERVICE_URL = "http://photo-service:5003" # 새로운 사진 서비스 URL
 
-# 비동기 요청을 위한 httpx 클라이언트 초기화
-# 연결 풀링을 위해 전역 클라이언트 사용
-client = httpx.AsyncClient()
+# 스트리밍 프록시 설정
+MAX_BODY_SIZE = int(os.environ.get("GATEWAY_MAX_BODY_SIZE", str(10 * 1024 * 1024))) # 요청 본문 최대 크기 (기본 10MB)
+CHUNK_SIZE = int(os.environ.get("GATEWAY_CHUNK_SIZE", str(64 * 1024))) # 응답 스트리밍 청크 크기 (기본 64KB)
+
+# 업스트림으로 그대로 넘기면 안 되는 hop-by-hop 헤더
+HOP_BY_HOP_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade", "proxy-authorization", "proxy-connection"}
+# 클라이언트가 보낸 신원 헤더는 절대 믿지 않습니다. (게이트웨이가 검증한 값만 다시 붙임)
+UNTRUSTED_REQUEST_HEADERS = HOP_BY_HOP_HEADERS | set(jwks.IDENTITY_HEADERS)
+
+# 1 이면 /api/employee/* 요청의 토큰을 여기서 검증해 잘못된 토큰은 바로 401 로 돌려보냅니다.
+# (0 이면 이전처럼 그대로 전달하고 employee_server 가 직접 검증)
+GATEWAY_VERIFY_TOKENS = os.environ.get("GATEWAY_VERIFY_TOKENS", "1") == "1"
+
+# 사진 캐싱 설정: object_key 는 내용의 sha256 이라 같은 키는 언제나 같은 바이트를 가리키므로 1년 + immutable 로 캐시합니다.
+# (예전 UUID 키도 별칭으로 그 내용의 sha256 키 하나에 고정되고, 사진을 바꾸면 새 키가 발급됩니다.)
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+photo_cache = PhotoLRUCache()
+
+# 업스트림마다 전용 httpx 클라이언트(커넥션 풀)를 둡니다.
+# 하나가 멈춰도 다른 업스트림의 커넥션은 남아 있고, 서킷이 열리면 시간 초과를 기다리지 않고 바로 503 을 줍니다.
+# (값은 GATEWAY_<이름>_READ_TIMEOUT, GATEWAY_<이름>_MAX_CONNECTIONS 등 환경 변수로 조정)
+auth_upstream = Upstream("auth-server", AUTH_SERVER_URL, max_connections=50, read_timeout=5.0)
+employee_upstream = Upstream("employee-server", EMPLOYEE_SERVER_URL, max_connections=100, read_timeout=10.0)
+photo_upstream = Upstream("photo-service", PHOTO_SERVICE_URL, max_connections=50, read_timeout=10.0)
+# SSE(/employees/stream)는 연결 하나가 업스트림 커넥션을 계속 잡고 있으므로 전용 풀을 씁니다.
+# 대기 중인 스트림이 일반 API 풀을 다 차지해 목록/저장 요청이 막히지 않게 하고, 읽기 제한은 하트비트(15초)보다 길게 둡니다.
+employee_stream_upstream = Upstream("employee-stream", EMPLOYEE_SERVER_URL, max_connections=10000, read_timeout=60.0)
+UPSTREAMS = {upstream.name: upstream for upstream in (auth_upstream, employee_upstream, employee_stream_upstream, photo_upstream)}
+EMPLOYEE_STREAM_PATHS = {"employees/stream"}
+
+# 라우트별 시간 제한: 대량 등록/내보내기는 본문 스트리밍이 길어서 읽기/쓰기 제한을 따로 둡니다.
+STREAMING_READ_TIMEOUT = float(os.environ.get("GATEWAY_STREAMING_READ_TIMEOUT", "300"))
+EMPLOYEE_STREAMING_TIMEOUT = httpx.Timeout(
+    connect=employee_upstream.timeout.connect, read=STREAMING_READ_TIMEOUT,
+    write=STREAMING_READ_TIMEOUT, pool=employee_upstream.timeout.pool,
+)
+EMPLOYEE_ROUTE_TIMEOUTS = {
+    "employees/bulk": EMPLOYEE_STREAMING_TIMEOUT,
+    "employees/export": EMPLOYEE_STREAMING_TIMEOUT,
+}
+
+jwks_cache = jwks.JWKSCache(client=auth_upstream.client) # 공개키는 auth-server 클라이언트로 받아 캐시
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    # 애플리케이션 종료 시 httpx 클라이언트 연결 닫기
-    await client.aclose()
+    # 애플리케이션 종료 시 업스트림 클라이언트 연결 닫기
+    for upstream in UPSTREAMS.values():
+        await upstream.aclose()
+
+class RequestBodyTooLarge(Exception):
+    """스트리밍 도중 요청 본문이 MAX_BODY_SIZE 를 넘었을 때 발생합니다."""
+
+async def _limited_body(request: Request):
+    """요청 본문을 메모리에 모으지 않고 청크 단위로 업스트림에 전달합니다. (크기 제한 적용)"""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_BODY_SIZE:
+            raise RequestBodyTooLarge()
+        if chunk:
+            yield chunk
+
+def upstream_error(e: Exception, service_name: str) -> HTTPException:
+    """업스트림 호출 실패를 클라이언트 응답으로 바꿉니다. (서킷 열림/풀 포화는 503, 시간 초과는 504)"""
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=f"{service_name} unavailable (circuit open)",
+                             headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+    print(f"Gateway: Proxy to {service_name} failed: {type(e).__name__} {e}")
+    if isinstance(e, httpx.PoolTimeout):
+        return HTTPException(status_code=503, detail=f"{service_name} busy", headers={"Retry-After": "1"})
+    if isinstance(e, httpx.TimeoutException):
+        return HTTPException(status_code=504, detail=f"{service_name} timed out")
+    return HTTPException(status_code=503, detail=f"{service_name} unavailable: {str(e)}")
+
+async def proxy_request(request: Request, upstream: Upstream, path: str, service_name: str,
+                        identity: dict = None, timeout: httpx.Timeout = None):
+    """
+    요청/응답을 양방향 스트리밍으로 프록시하는 공통 루틴입니다.
+    본문 전체를 게이트웨이 메모리에 올리지 않고, 업스트림 응답의 첫 바이트가 오면 바로 클라이언트로 보냅니다.
+    identity 는 게이트웨이가 검증한 토큰 클레임으로, 신원 헤더로 바꿔 업스트림에 전달합니다.
+    """
+    # hop-by-hop / 신원 헤더를 제외한 헤더 재구성 (Content-Length 는 스트리밍 본문의 길이로 그대로 전달)
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in UNTRUSTED_REQUEST_HEADERS}
+    if identity:
+        headers.update(jwks.identity_headers(identity))
+
+    # Content-Length 가 이미 제한을 넘으면 본문을 읽기 전에 거절
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_SIZE:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    has_body = content_length is not None or "transfer-encoding" in request.headers
+
+    try:
+        # 응답 헤더까지만 받고 본문은 아래에서 청크 단위로 전달 (본문이 없는 멱등 요청만 재시도)
+        resp = await upstream.send(
+            request.method,
+            path,
+            headers=headers,
+            content=_limited_body(request) if has_body else None,
+            params=request.query_params,
+            timeout=timeout,
+        )
+    except RequestBodyTooLarge:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    except (CircuitOpenError, httpx.RequestError) as e:
+        raise upstream_error(e, service_name)
 
-# 직원 사진 요청을 위한 프록시 엔드포인트
+    # 본문을 디코딩하지 않고(raw) 전달하므로 Content-Encoding/Content-Length 는 그대로 유지합니다.
+    response_headers = {k: v for k, v in resp.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+    # httpx 는 chunk_size 를 주면 그 크기만큼 모아서 넘기므로, SSE 는 받은 조각을 바로 흘려보냅니다.
+    chunk_size = None if resp.headers.get("content-type", "").startswith("text/event-stream") else CHUNK_SIZE
+
+    return StreamingResponse(
+        resp.aiter_raw(chunk_size),
+        status_code=resp.status_code,
+        headers=response_headers,
+        background=BackgroundTask(resp.aclose), # 전송이 끝나면 업스트림 연결을 풀에 반환
+    )
 
 # auth_server로 요청 프록시
 @app.api_route("/api/auth/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"])
 async def proxy_auth_requests(path: str, request: Request):
     """인증 서버로 요청을 프록시합니다."""
-    url = f"{AUTH_SERVER_URL}/auth/{path}" # 인증 서버의 URL 구성
-    print(f"DEBUG: Proxying to -> {url}")
-    
-    # 호스트 및 Content-Length를 제외한 헤더 재구성 (httpx가 Content-Length 처리)
-    headers = {k: v for k, v in request.headers.items() if k.lower() not in ["host", "content-length"]}
-    
+    return await proxy_request(request, auth_upstream, f"/auth/{path}", "Auth service")
+
+def _unauthorized():
+    return JSONResponse(
+        status_code=401,
+        content={"detail": "Could not validate credentials"},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def verify_request_token(request: Request):
+    """
+    Authorization: Bearer 토큰을 캐시된 공개키로 검증합니다.
+    성공하면 클레임을, 실패하면 바로 돌려보낼 응답(401 / 키를 못 받으면 503)을 돌려줍니다.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None, _unauthorized()
     try:
-        # 전달을 위해 요청 본문을 바이트로 읽기
-        body = await request.body()
-        
-        # 인증 서버로 요청 전달
-        resp = await client.request(
-            method=request.method,
-            url=url,
-            headers=headers,
-            content=body, # 바이트 본문에 content 사용
-            params=request.query_params,
-            follow_redirects=False
-        )
-        
-        # Content-Encoding, Content-Length, Transfer-Encoding, Connection을 제외한 응답 헤더 재구성
-        excluded_headers = ["content-encoding", "content-length", "transfer-encoding", "connection"]
-        response_headers = {k: v for k, v in resp.headers.items() if k.lower() not in excluded_headers}
-        
-        # 인증 서버의 응답 반환
-        return Response(content=resp.content, status_code=resp.status_code, headers=response_headers)
-    except httpx.RequestError as e:
-        # 서비스 사용 불가 시 예외 발생
-        raise HTTPException(status_code=503, detail=f"Auth service unavailable: {str(e)}")
+        claims = await jwks_cache.decode(token.strip())
+    except jwks.JWKSUnavailableError:
+        return None, JSONResponse(status_code=503, content={"detail": "Auth service unavailable"}, headers={"Retry-After": "1"})
+    except jwt.PyJWTError:
+        return None, _unauthorized()
+    if not isinstance(claims.get("id"), int) or not claims.get("user"):
+        return None, _unauthorized()
+    return claims, None
 
 # employee_server로 요청 프록시
 @app.api_route("/api/employee/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"])
 async def proxy_employee_requests(path: str, request: Request):
-    """직원 서버로 요청을 프록시합니다."""
-    url = f"{EMPLOYEE_SERVER_URL}/{path}" 
-    
-    # 디버깅 로그 추가 (반드시 확인하세요)
-    print(f"DEBUG: Proxying to Employee Server -> {url}") # 직원 서버의 URL 구성
-    
-    # 호스트 및 Content-Length를 제외한 헤더 재구성 (httpx가 Content-Length 처리)
-    headers = {k: v for k, v in request.headers.items() if k.lower() not in ["host", "content-length"]}
+    """직원 서버로 요청을 프록시합니다. 잘못된 토큰은 업스트림까지 가지 않고 여기서 401 이 됩니다."""
+    identity = None
+    if GATEWAY_VERIFY_TOKENS:
+        identity, error_response = await verify_request_token(request)
+        if error_response is not None:
+            return error_response
+    upstream = employee_stream_upstream if path in EMPLOYEE_STREAM_PATHS else employee_upstream
+    return await proxy_request(request, upstream, f"/{path}", "Employee service", identity,
+                               timeout=EMPLOYEE_ROUTE_TIMEOUTS.get(path))
+
+def _photo_response(content_type: str, data: bytes, range_header: str, headers: dict):
+    """메모리에 있는 사진을 Range 요청을 반영해 응답합니다."""
+    size = len(data)
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return Response(content=data, media_type=content_type, headers=headers)
+    start, end = byte_range
+    return Response(
+        content=data[start:end + 1],
+        status_code=206,
+        media_type=content_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+    )
+
+# 직원 사진 요청을 photo_service로 프록시 (ETag / 304 / Range / 썸네일 LRU 캐시)
+@app.api_route("/static/uploads/{object_key}", methods=["GET", "HEAD"])
+async def get_photo(object_key: str, request: Request):
+    """사진을 캐시 친화적으로 제공합니다. 자주 쓰이는 썸네일은 photo_service 를 거치지 않습니다."""
+    # photo_service 는 ?w= 와 Accept 에 따라 다른 파생 이미지를 주므로 둘 다 캐시 키에 포함합니다.
+    width = request.query_params.get("w")
+    accept = request.headers.get("accept", "")
+    cache_key = f"{object_key}|{width}|{accept}"
+    # 키가 불변이므로 한 번 받은 내용은 영원히 유효합니다.
+    headers = {"Cache-Control": PHOTO_CACHE_CONTROL, "Accept-Ranges": "bytes", "Vary": "Accept"}
+    if_none_match = request.headers.get("if-none-match")
+    range_header = request.headers.get("range")
 
-    start_time = time.time() # 프록시 요청 시간 측정 시작
+    cached = photo_cache.get(cache_key)
+    if cached is not None:
+        content_type, data, etag = cached
+        headers["ETag"] = etag
+        # 조건부 요청은 업스트림 없이 바로 304
+        if http_cache.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return _photo_response(content_type, data, range_header, headers)
 
+    upstream_headers = {k: v for k, v in (("accept", accept), ("range", range_header), ("if-none-match", if_none_match)) if v}
     try:
-        # 전달을 위해 요청 본문을 바이트로 읽기
-        body = await request.body()
-        
-        # 직원 서버로 요청 전달
-        resp = await client.request(
-            method=request.method,
-            url=url,
-            headers=headers,
-            content=body, # 바이트 본문에 content 사용
-            params=request.query_params,
-            follow_redirects=False
+        resp = await photo_upstream.send("GET", f"/photos/{object_key}", headers=upstream_headers, params={"w": width} if width else None)
+    except (CircuitOpenError, httpx.RequestError) as e:
+        raise upstream_error(e, "Photo service")
+
+    etag = resp.headers.get("etag")
+    if etag:
+        headers["ETag"] = etag
+    if resp.status_code == 304:
+        await resp.aclose()
+        return Response(status_code=304, headers=headers)
+
+    if resp.status_code != 200 or range_header:
+        # 에러 응답이나 Range 요청(캐시 미스)은 캐시하지 않고 그대로 스트리밍
+        if resp.status_code not in (200, 206):
+            body = await resp.aread()
+            await resp.aclose()
+            return Response(content=body, status_code=resp.status_code, media_type=resp.headers.get("content-type"))
+        passthrough = {k: v for k, v in resp.headers.items() if k.lower() in ("content-type", "content-length", "content-range")}
+        return StreamingResponse(
+            resp.aiter_raw(CHUNK_SIZE),
+            status_code=resp.status_code,
+            headers={**passthrough, **headers},
+            background=BackgroundTask(resp.aclose),
         )
-        
-        end_time = time.time() # 프록시 요청 시간 측정 종료
-        execution_time = (end_time - start_time) * 1000 # 밀리초 단위 실행 시간
-        print(f"Gateway: Proxy to Employee Server ({path}) executed in {execution_time:.2f} ms") # 실행 시간 로깅
-
-        # Content-Encoding, Content-Length, Transfer-Encoding, Connection을 제외한 응답 헤더 재구성
-        excluded_headers = ["content-encoding", "content-length", "transfer-encoding", "connection"]
-        response_headers = {k: v for k, v in resp.headers.items() if k.lower() not in excluded_headers}
-        
-        # 직원 서버의 응답 반환
-        return Response(content=resp.content, status_code=resp.status_code, headers=response_headers)
-    except httpx.RequestError as e:
-        end_time = time.time() # 오류 발생 시에도 시간 측정 종료
-        execution_time = (end_time - start_time) * 1000 # 밀리초 단위 실행 시간
-        print(f"Gateway: Proxy to Employee Server ({path}) failed after {execution_time:.2f} ms with error: {e}")
-        # 서비스 사용 불가 시 예외 발생
-        raise HTTPException(status_code=503, detail=f"Employee service unavailable: {str(e)}")
+
+    content_type = resp.headers.get("content-type", "application/octet-stream")
+    content_length = resp.headers.get("content-length")
+    if etag and content_length and content_length.isdigit() and int(content_length) <= photo_cache.max_item_bytes:
+        # 작은 썸네일: 통째로 읽어 LRU 에 넣고 응답
+        data = await resp.aread()
+        await resp.aclose()
+        photo_cache.put(cache_key, content_type, data, etag)
+        return _photo_response(content_type, data, None, headers)
+
+    # 큰 원본: 캐시하지 않고 스트리밍
+    return StreamingResponse(
+        resp.aiter_raw(CHUNK_SIZE),
+        media_type=content_type,
+        headers={**({"Content-Length": content_length} if content_length else {}), **headers},
+        background=BackgroundTask(resp.aclose),
+    )
+
+@app.get("/metrics/photo-cache")
+async def get_photo_cache_metrics():
+    """썸네일 LRU 캐시 상태"""
+    return photo_cache.stats()
+
+@app.get("/metrics/upstreams")
+async def get_upstream_metrics():
+    """업스트림별 시간 제한 / 재시도 / 서킷 브레이커 상태"""
+    return {name: upstream.stats() for name, upstream in UPSTREAMS.items()}
+
+@app.get("/metrics/jwks")
+async def get_jwks_metrics():
+    """게이트웨이가 캐시한 토큰 검증 키 상태"""
+    return jwks_cache.stats()
 
 # The if __name__ == '__main__': block is removed as Uvicorn will run the app directly.
 # Example command to run with Uvicorn: uvicorn app:app --host 0.0.0.0 --port 5000 --reload
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os # 환경 변수 읽기
+import threading # 캐시 동시 접근 보호
+from collections import OrderedDict # LRU 순서 관리
+from typing import Optional, Tuple
+
+# 자주 조회되는 썸네일(120x160 PNG, 수십 KB)을 게이트웨이 메모리에 보관하는 LRU 캐시 설정
+PHOTO_CACHE_MAX_BYTES = int(os.environ.get("PHOTO_CACHE_MAX_BYTES", str(32 * 1024 * 1024))) # 캐시 전체 크기 (기본 32MB)
+PHOTO_CACHE_MAX_ITEM_BYTES = int(os.environ.get("PHOTO_CACHE_MAX_ITEM_BYTES", str(256 * 1024))) # 이보다 큰 파일은 캐시하지 않음 (기본 256KB)
+
+class PhotoLRUCache:
+    """캐시 키 -> (content_type, bytes, etag) 를 총 바이트 수 기준으로 제한하는 LRU 캐시"""
+
+    def __init__(self, max_bytes: int = PHOTO_CACHE_MAX_BYTES, max_item_bytes: int = PHOTO_CACHE_MAX_ITEM_BYTES):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, Tuple[str, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes, str]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key: str, content_type: str, data: bytes, etag: str):
+        if len(data) > self.max_item_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old[1])
+            self._items[key] = (content_type, data, etag)
+            self.current_bytes += len(data)
+            # 한도를 넘으면 가장 오래 안 쓰인 항목부터 제거
+            while self.current_bytes > self.max_bytes and self._items:
+                _, (_, evicted, _) = self._items.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "items": len(self._items),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    단일 'bytes=start-end' Range 헤더를 (start, end) 로 변환합니다. (end 포함)
+    Range 가 없거나 잘못되었거나 다중 범위이면 None (전체 응답), 만족할 수 없는 범위면 ValueError 를 발생시킵니다.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_s, _, end_s = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_s == "":
+            # bytes=-N : 마지막 N 바이트
+            length = int(end_s)
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        # 형식이 잘못된 Range 는 무시하고 전체를 응답합니다.
+        return None
+    # 형식은 맞지만 만족할 수 없는 범위(bytes=-0 등)는 try 밖에서 발생시켜 호출한 쪽이 416 으로 응답하게 합니다.
+    if start_s == "":
+        if length <= 0:
+            raise ValueError("empty suffix range")
+        start, end = max(0, size - length), size - 1
+    else:
+        end = min(end, size - 1)
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
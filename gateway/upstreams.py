@@ -0,0 +1,194 @@
+import asyncio # 재시도 대기
+import os # 환경 변수 읽기
+import random # 재시도 지터
+import time # 서킷 브레이커 시간 계산
+from typing import Optional
+
+import httpx # 업스트림 HTTP 클라이언트
+from common import metrics # 대상별 지연 / 서킷 상태 / 재시도 수
+from common import tracing # 요청 ID 전달 + 업스트림 Server-Timing
+
+# 멱등 메서드만 재시도합니다. (POST/PATCH 는 두 번 실행되면 안 되므로 한 번만 보냄)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# 업스트림이 죽었거나 멈췄다는 뜻인 응답. (503 은 업스트림의 정상적인 과부하 거절이라 제외)
+FAILURE_STATUSES = {502, 504}
+
+
+def _env(name: str, key: str, default):
+    """GATEWAY_<업스트림>_<설정> 환경 변수 (예: GATEWAY_EMPLOYEE_SERVER_READ_TIMEOUT)"""
+    value = os.environ.get(f"GATEWAY_{name.upper().replace('-', '_')}_{key}")
+    if value is None:
+        return default
+    return type(default)(value) if not isinstance(default, bool) else value == "1"
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 업스트림에 보내지 않고 바로 실패시킬 때 발생합니다."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 failure_threshold 번이면 열림(open) -> open_seconds 동안 즉시 실패
+    -> 반열림(half_open) 에서 요청 하나만 시험으로 보내 성공하면 닫힘, 실패하면 다시 열림
+    """
+
+    def __init__(self, name: str, failure_threshold: int, open_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        metrics.set_circuit_state(name, "closed")
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            print(f"Gateway: {self.name} circuit {self.state} -> {state}")
+            self.state = state
+            metrics.set_circuit_state(self.name, state)
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def before_request(self) -> bool:
+        """보내도 되면 True. 반열림 상태에서는 시험 요청 하나만 통과시킵니다."""
+        if self.state == "open":
+            if self.retry_after() > 0:
+                return False
+            self._set_state("half_open")
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.probe_in_flight = False
+        self._set_state("closed")
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state("open")
+        self.probe_in_flight = False
+
+    def release(self):
+        """성공/실패 판정 없이 끝난 시험 요청(풀 대기 초과 등)의 자리를 돌려줍니다."""
+        self.probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "retry_after": round(self.retry_after(), 1)}
+
+
+class Upstream:
+    """
+    업스트림 하나의 전용 커넥션 풀 + 시간 제한 + 재시도 + 서킷 브레이커
+
+    업스트림마다 풀이 따로라서 employee_server 가 멈춰 커넥션을 다 잡아도 auth 요청은 영향을 받지 않고,
+    풀이 가득 차면 pool_timeout 뒤에 바로 실패합니다. 모든 값은 GATEWAY_<이름>_<설정> 환경 변수로 바꿀 수 있습니다.
+    """
+
+    def __init__(self, name: str, base_url: str, *, max_connections: int = 100, max_keepalive: int = 20,
+                 keepalive_expiry: float = 30.0, connect_timeout: float = 1.0, read_timeout: float = 10.0,
+                 write_timeout: float = 10.0, pool_timeout: float = 1.0, retries: int = 2,
+                 retry_backoff: float = 0.05, retry_backoff_max: float = 1.0, failure_threshold: int = 5,
+                 open_seconds: float = 10.0, http2: bool = False):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(
+            connect=_env(name, "CONNECT_TIMEOUT", connect_timeout),
+            read=_env(name, "READ_TIMEOUT", read_timeout),
+            write=_env(name, "WRITE_TIMEOUT", write_timeout),
+            pool=_env(name, "POOL_TIMEOUT", pool_timeout),
+        )
+        self.retries = _env(name, "RETRIES", retries)
+        self.retry_backoff = _env(name, "RETRY_BACKOFF", retry_backoff)
+        self.retry_backoff_max = _env(name, "RETRY_BACKOFF_MAX", retry_backoff_max)
+        self.breaker = CircuitBreaker(
+            name, _env(name, "FAILURE_THRESHOLD", failure_threshold), _env(name, "OPEN_SECONDS", open_seconds)
+        )
+        limits = httpx.Limits(
+            max_connections=_env(name, "MAX_CONNECTIONS", max_connections),
+            max_keepalive_connections=_env(name, "MAX_KEEPALIVE", max_keepalive),
+            keepalive_expiry=_env(name, "KEEPALIVE_EXPIRY", keepalive_expiry),
+        )
+        http2 = _env(name, "HTTP2", http2)
+        if http2:
+            try:
+                import h2  # noqa: F401  (httpx[http2])
+            except ImportError:
+                print(f"Gateway: {name} HTTP/2 requested but the h2 package is missing, using HTTP/1.1")
+                http2 = False
+        # 지연 기록 + 요청 ID 전달 훅은 업스트림 이름으로 (Server-Timing: gateway.upstream-employee-server)
+        self.client = tracing.instrument_httpx(
+            metrics.instrument_httpx(httpx.AsyncClient(limits=limits, timeout=self.timeout, http2=http2), name), name
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: 0 ~ min(최대, 기본 * 2^시도) 사이에서 무작위로 기다려 재시도가 한꺼번에 몰리지 않게 합니다.
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * (2 ** attempt)))
+
+    async def send(self, method: str, path: str, *, headers=None, content=None, params=None,
+                   timeout: Optional[httpx.Timeout] = None) -> httpx.Response:
+        """
+        응답 헤더까지 받은 스트리밍 응답을 돌려줍니다. (본문은 호출한 쪽이 읽고 aclose)
+        서킷이 열려 있으면 CircuitOpenError, 재시도 후에도 연결/시간 초과면 httpx.TransportError 를 냅니다.
+        본문을 스트리밍으로 보내는 요청은 다시 보낼 수 없으므로 재시도하지 않습니다.
+        """
+        retryable = method.upper() in IDEMPOTENT_METHODS and content is None
+        attempts = 1 + (self.retries if retryable else 0)
+        for attempt in range(attempts):
+            if not self.breaker.before_request():
+                metrics.record_circuit_rejection(self.name)
+                raise CircuitOpenError(self.name, self.breaker.retry_after())
+            request = self.client.build_request(
+                method, f"{self.base_url}{path}", headers=headers, content=content, params=params,
+                timeout=timeout or self.timeout,
+            )
+            try:
+                response = await self.client.send(request, stream=True, follow_redirects=False)
+            except httpx.PoolTimeout:
+                # 게이트웨이 쪽 풀이 가득 찬 것이므로 업스트림 실패로 세지도, 재시도하지도 않습니다.
+                self.breaker.release()
+                raise
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                if attempt + 1 >= attempts:
+                    raise
+                metrics.record_upstream_retry(self.name, type(e).__name__)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                # 요청 본문 크기 초과 등 업스트림과 무관한 실패
+                self.breaker.release()
+                raise
+            if response.status_code in FAILURE_STATUSES:
+                self.breaker.record_failure()
+                if attempt + 1 < attempts:
+                    await response.aclose()
+                    metrics.record_upstream_retry(self.name, str(response.status_code))
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                return response
+            self.breaker.record_success()
+            return response
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "timeout": {"connect": self.timeout.connect, "read": self.timeout.read,
+                        "write": self.timeout.write, "pool": self.timeout.pool},
+            "retries": self.retries,
+            "circuit": self.breaker.stats(),
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -1,73 +1,203 @@
+import hashlib
 import os
 import shutil
 import uuid
-from fastapi import FastAPI, UploadFile, File, HTTPException, status
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from typing import Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
 
-# 1. 저장 경로를 아예 마운트 경로와 일치시킵니다.
-PHOTOS_DIR = "/app/static/uploads"
+import store # 내용 해시 기반 샤딩 저장소 (중복 제거, 참조 수)
+import variants # 크기/포맷별 파생 이미지 생성
+from common import metrics # Prometheus 계측 (/metrics)
+from common import tracing # X-Request-ID + Server-Timing
+from common import http_cache # If-None-Match 비교 (W/ 접두사, 여러 값)
+
+# 1. 사진 저장소 루트 (k8s 에서는 PVC 가 이 경로에 마운트됩니다)
+PHOTOS_DIR = os.environ.get("PHOTOS_DIR", "/app/static/uploads")
+# 업로드 중인 임시 파일 위치 (저장소와 같은 파일시스템이어야 rename 이 원자적입니다)
+TMP_DIR = os.path.join(PHOTOS_DIR, "_tmp")
+
+# 업로드 설정
+MAX_UPLOAD_BYTES = int(os.environ.get("PHOTO_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024))) # 업로드 최대 크기 (기본 10MB)
+UPLOAD_CHUNK_SIZE = int(os.environ.get("PHOTO_UPLOAD_CHUNK_SIZE", str(1024 * 1024))) # 디스크 쓰기 청크 크기 (기본 1MB)
+FSYNC_UPLOADS = os.environ.get("PHOTO_FSYNC", "0") == "1" # 1 이면 rename 전에 파일/디렉터리를 fsync
 
 # PHOTOS_DIR이 없으면 생성
-os.makedirs(PHOTOS_DIR, exist_ok=True)
+os.makedirs(TMP_DIR, exist_ok=True)
 
 app = FastAPI()
 
-# 정적 파일 제공 (저장된 사진을 직접 제공)
-# 이 마운트는 /photos/{object_key} 엔드포인트와 충돌하지 않도록 주의해야 합니다.
-# FileResponse를 사용하여 직접 파일을 제공하는 것이 더 유연합니다.
-# app.mount("/photos", StaticFiles(directory=PHOTOS_DIR), name="photos")
+class MaxBodySizeMiddleware:
+    """
+    요청 본문을 받는 도중에 크기를 세어 MAX_UPLOAD_BYTES 를 넘는 순간 413 으로 끊습니다.
+    (multipart 파싱이 끝난 뒤가 아니라 스트리밍 중에 제한)
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            return await self.app(scope, receive, send)
+
+        # Content-Length 로 이미 초과가 확실하면 본문을 읽지 않고 바로 거절
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_body_size:
+                response = JSONResponse(status_code=413, content={"detail": "Upload too large"})
+                return await response(scope, receive, send)
 
-# 2. 스태틱 마운트도 동일하게 설정 (이미 되어있다면 확인만)
-app.mount("/static/uploads", StaticFiles(directory=PHOTOS_DIR), name="photos")
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+# multipart 여유분(경계 문자열, 헤더)으로 64KB 를 더 허용
+app.add_middleware(MaxBodySizeMiddleware, max_body_size=MAX_UPLOAD_BYTES + 64 * 1024)
+# 계측 미들웨어는 가장 바깥에 두어 크기 초과(413) 응답도 집계합니다.
+metrics.setup(app, "photo")
+tracing.setup(app, "photo")
+
+class UploadTooLargeError(Exception):
+    pass
+
+def _receive_upload(upload_file, tmp_path: str) -> str:
+    """
+    업로드 내용을 청크 단위로 임시 파일에 쓰면서 sha256 을 계산합니다. (스레드풀에서 실행)
+    MAX_UPLOAD_BYTES 를 넘으면 쓰는 도중에 중단합니다.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    with open(tmp_path, "wb") as buffer:
+        for chunk in iter(lambda: upload_file.read(UPLOAD_CHUNK_SIZE), b""):
+            written += len(chunk)
+            if written > MAX_UPLOAD_BYTES:
+                raise UploadTooLargeError()
+            digest.update(chunk)
+            buffer.write(chunk)
+        if FSYNC_UPLOADS:
+            buffer.flush()
+            os.fsync(buffer.fileno())
+    return digest.hexdigest()
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
 @app.post("/upload")
 async def upload_photo(file: UploadFile = File(...)):
     """
-    사진을 업로드하고 고유한 object_key를 반환합니다.
+    사진을 업로드하고 object_key(내용 해시)를 반환합니다.
+    같은 사진이 이미 있으면 새로 저장하지 않고 참조 수만 늘립니다.
     """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file selected")
 
-    # 고유한 파일 이름 생성 (S3 object_key와 유사)
-    file_extension = file.filename.split(".")[-1] if "." in file.filename else "bin"
-    object_key = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(PHOTOS_DIR, object_key)
-
+    # 임시 파일에 다 쓴 뒤 원자적으로 rename 하므로 읽는 쪽에서 반쯤 쓰인 파일은 보이지 않습니다.
+    # 디스크 I/O 는 모두 스레드풀에서 실행해 느린 디스크가 이벤트 루프를 막지 않게 합니다.
+    tmp_path = os.path.join(TMP_DIR, f"{uuid.uuid4()}.part")
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        with tracing.span("disk"):
+            digest = await run_in_threadpool(_receive_upload, file.file, tmp_path)
+            object_key = store.make_key(digest, file.filename)
+            created_new = await run_in_threadpool(store.commit, PHOTOS_DIR, tmp_path, object_key, FSYNC_UPLOADS)
+    except UploadTooLargeError:
+        await run_in_threadpool(_discard, tmp_path)
+        raise HTTPException(status_code=413, detail="Upload too large")
     except Exception as e:
+        await run_in_threadpool(_discard, tmp_path)
         raise HTTPException(status_code=500, detail=f"Could not upload file: {e}")
 
-    return JSONResponse(status_code=status.HTTP_200_OK, content={"object_key": object_key})
+    # 새 사진이면 여러 크기의 WebP/JPEG 파생 이미지를 미리 생성 (PIL 작업이므로 스레드풀에서 실행)
+    created = []
+    if created_new:
+        file_path = store.shard_path(PHOTOS_DIR, object_key)
+        with tracing.span("variants"):
+            created = await run_in_threadpool(variants.generate_defaults, PHOTOS_DIR, object_key, file_path)
+
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"object_key": object_key, "variants": created, "deduplicated": not created_new})
 
 @app.get("/photos/{object_key}")
-async def get_photo(object_key: str):
+async def get_photo(object_key: str, request: Request, w: Optional[int] = None):
     """
     object_key를 사용하여 저장된 사진을 제공합니다.
+    Accept 헤더(WebP/JPEG/PNG)와 ?w= 너비에 맞는 파생 이미지를 골라 주며, 없으면 만들어 캐시합니다.
     """
-    file_path = os.path.join(PHOTOS_DIR, object_key)
-    if not os.path.exists(file_path):
+    file_path = await run_in_threadpool(store.resolve, PHOTOS_DIR, object_key)
+    if file_path is None:
         raise HTTPException(status_code=404, detail="Photo not found")
-    
-    return FileResponse(file_path)
+    # 예전 키(별칭)로 들어와도 파생 이미지와 ETag 는 실제 해시 키 기준
+    object_key = os.path.basename(file_path)
+
+    if_none_match = request.headers.get("if-none-match")
+
+    def serve(path: str, etag: str, media_type: Optional[str] = None) -> Response:
+        # 브라우저가 가진 사본과 같으면 파일을 읽지 않고 304
+        headers = {"ETag": etag, "Vary": "Accept"}
+        if http_cache.etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    # 내용 해시가 곧 키이므로 원본도 키 자체가 강한 ETag 입니다.
+    original_etag = f'"{object_key}"'
+    fmt = variants.negotiate_format(request.headers.get("accept"))
+    width = variants.snap_width(w)
+    if fmt is None and width is None:
+        return serve(file_path, original_etag)
+    fmt = fmt or "jpeg"
+
+    # 파생 이미지는 (키, 너비, 포맷)이 같으면 내용이 같으므로 이 조합을 강한 ETag 로 사용합니다.
+    etag = f'"{object_key}.{width or "orig"}.{fmt}"'
+    if http_cache.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Vary": "Accept"})
+
+    try:
+        with tracing.span("variants"):
+            path = await run_in_threadpool(variants.ensure_variant, PHOTOS_DIR, object_key, file_path, width, fmt)
+    except OSError:
+        # 이미지가 아닌 파일은 원본 그대로 제공
+        return serve(file_path, original_etag)
+    return serve(path, etag, variants.FORMATS[fmt][1])
+
+# 2. 예전 정적 경로 호환 (/static/uploads/{key} -> /photos/{key})
+@app.get("/static/uploads/{object_key}")
+async def get_static_photo(object_key: str, request: Request, w: Optional[int] = None):
+    return await get_photo(object_key, request, w)
 
 @app.delete("/photos/{object_key}")
 async def delete_photo(object_key: str):
     """
-    object_key를 사용하여 사진을 삭제합니다.
+    object_key를 사용하여 사진 참조를 하나 해제합니다.
+    마지막 참조가 사라질 때만 파일과 파생 이미지를 실제로 삭제합니다.
     """
-    file_path = os.path.join(PHOTOS_DIR, object_key)
-    if not os.path.exists(file_path):
+    canonical_key = await run_in_threadpool(store.canonical_key, PHOTOS_DIR, object_key)
+    if canonical_key is None:
         raise HTTPException(status_code=404, detail="Photo not found")
-    
+
     try:
-        os.remove(file_path)
+        remaining = await run_in_threadpool(store.release, PHOTOS_DIR, object_key)
+        if remaining is None:
+            raise HTTPException(status_code=404, detail="Photo not found")
+        await run_in_threadpool(store.remove_alias, PHOTOS_DIR, object_key)
+        if remaining == 0:
+            await run_in_threadpool(shutil.rmtree, variants.variant_dir(PHOTOS_DIR, canonical_key), True)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not delete file: {e}")
-    
-    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": f"Photo {object_key} deleted."})
+
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": f"Photo {object_key} deleted.", "remaining_references": remaining})
 
 # The if __name__ == '__main__': block is removed as Uvicorn will run the app directly.
 # Example command to run with Uvicorn: uvicorn app:app --host 0.0.0.0 --port 5003 --reload
@@ -0,0 +1,57 @@
+"""
+평평한 사진 디렉터리(예: photo_service/data/photos/<uuid>.jpg)를 내용 해시 기반 샤딩 저장소로 옮깁니다.
+
+- 각 파일을 sha256 키로 저장소에 복사하고 (같은 내용은 하나로 합치고 참조 수 증가)
+- 예전 키로도 계속 조회/삭제할 수 있도록 별칭(_aliases/<옛 키>)을 남기며
+- employee 테이블의 object_key 를 새 키로 바꾸는 SQL 을 출력합니다.
+
+사용 예:
+    python migrate_store.py --source ./data/photos --dest /app/static/uploads --sql-out migrate_keys.sql
+원본 파일은 --delete-source 를 주지 않는 한 그대로 둡니다. 여러 번 실행해도 이미 옮긴 파일은 건너뜁니다.
+"""
+import argparse
+import os
+
+import store
+import variants
+
+def migrate(source: str, dest: str, with_variants: bool, delete_source: bool):
+    mapping = []
+    for name in sorted(os.listdir(source)):
+        source_path = os.path.join(source, name)
+        if not os.path.isfile(source_path) or not store.LEGACY_KEY_RE.match(name):
+            continue
+        if store.HASH_KEY_RE.match(name) or store.resolve(dest, name):
+            print(f"skip (already migrated): {name}")
+            continue
+        object_key = store.copy_into_store(dest, source_path, name)
+        store.add_alias(dest, name, object_key)
+        if with_variants:
+            variants.generate_defaults(dest, object_key, store.shard_path(dest, object_key))
+        if delete_source:
+            os.remove(source_path)
+        mapping.append((name, object_key))
+        print(f"{name} -> {object_key}")
+    return mapping
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="기존 평평한 사진 디렉터리")
+    parser.add_argument("--dest", default=os.environ.get("PHOTOS_DIR", "/app/static/uploads"), help="새 저장소 루트 (PHOTOS_DIR)")
+    parser.add_argument("--sql-out", help="object_key 갱신 SQL 을 저장할 파일")
+    parser.add_argument("--variants", action="store_true", help="파생 이미지도 미리 생성")
+    parser.add_argument("--delete-source", action="store_true", help="옮긴 원본 파일 삭제")
+    args = parser.parse_args()
+
+    os.makedirs(args.dest, exist_ok=True)
+    mapping = migrate(args.source, args.dest, args.variants, args.delete_source)
+    print(f"migrated {len(mapping)} file(s), {len(set(key for _, key in mapping))} unique object(s)")
+
+    if args.sql_out:
+        with open(args.sql_out, "w") as f:
+            for old_key, new_key in mapping:
+                f.write(f"UPDATE employee SET object_key = '{new_key}' WHERE object_key = '{old_key}';\n")
+        print(f"SQL written to {args.sql_out}")
+
+if __name__ == "__main__":
+    main()
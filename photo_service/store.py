@@ -0,0 +1,171 @@
+"""
+내용 주소(content-addressed) 사진 저장소
+
+object_key = "<sha256>.<확장자>" 이며, 파일은 "ab/cd/<sha256>.<확장자>" 처럼 해시 앞 4글자로
+나눈 하위 디렉터리에 저장합니다. 같은 사진을 여러 번 올려도 파일은 하나만 두고 참조 수(.refs)를
+늘리며, 삭제는 참조 수가 0 이 될 때만 실제로 파일을 지웁니다.
+예전 UUID 키(평평한 디렉터리)는 migrate_store.py 가 만든 별칭(_aliases/<옛 키>)으로 계속 찾을 수 있습니다.
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl # 여러 uvicorn 워커 간 참조 수 갱신을 직렬화 (리눅스/컨테이너)
+except ImportError: # Windows 개발 환경에서는 프로세스 내부 잠금만 사용
+    fcntl = None
+
+HASH_KEY_RE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{1,10}$")
+LEGACY_KEY_RE = re.compile(r"^[A-Za-z0-9_-]{1,80}\.[A-Za-z0-9]{1,10}$")
+ALIASES_DIR_NAME = "_aliases"
+
+_lock = threading.Lock()
+
+def make_key(digest: str, filename: str) -> str:
+    """sha256 hex 와 업로드 파일 이름으로 object_key 를 만듭니다."""
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else "bin"
+    if not re.fullmatch(r"[a-z0-9]{1,10}", extension):
+        extension = "bin"
+    return f"{digest}.{extension}"
+
+def shard_path(root: str, object_key: str) -> str:
+    """ab/cd/<key> 형태의 샤딩된 경로"""
+    return os.path.join(root, object_key[0:2], object_key[2:4], object_key)
+
+def _refs_path(path: str) -> str:
+    return f"{path}.refs"
+
+def resolve(root: str, object_key: str) -> Optional[str]:
+    """object_key 의 실제 파일 경로. 잘못된 키나 없는 파일이면 None. (경로 조작 방지 포함)"""
+    if HASH_KEY_RE.match(object_key):
+        path = shard_path(root, object_key)
+        return path if os.path.exists(path) else None
+    if LEGACY_KEY_RE.match(object_key):
+        alias_path = os.path.join(root, ALIASES_DIR_NAME, object_key)
+        try:
+            with open(alias_path) as f:
+                target = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return resolve(root, target) if HASH_KEY_RE.match(target) else None
+    return None
+
+def canonical_key(root: str, object_key: str) -> Optional[str]:
+    """별칭이면 실제 해시 키로 바꿔 반환합니다."""
+    path = resolve(root, object_key)
+    return os.path.basename(path) if path else None
+
+@contextmanager
+def _locked(root: str):
+    """참조 수 갱신을 직렬화합니다. (짧은 작업이므로 저장소 전체에 잠금 하나)"""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(root, ".store.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_refs(path: str) -> int:
+    try:
+        with open(_refs_path(path)) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        # .refs 가 없는 기존 파일은 참조 1개로 취급
+        return 1 if os.path.exists(path) else 0
+
+def _write_refs(path: str, count: int):
+    tmp_path = f"{_refs_path(path)}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(count))
+    os.replace(tmp_path, _refs_path(path))
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _fsync_dir(path: str):
+    """rename 결과가 전원 장애 후에도 남도록 디렉터리 엔트리를 디스크에 반영합니다."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def commit(root: str, tmp_path: str, object_key: str, fsync: bool = False) -> bool:
+    """
+    임시 파일을 저장소에 넣습니다. 같은 내용이 이미 있으면 임시 파일을 버리고 참조 수만 늘립니다.
+    rename 은 원자적이므로 읽는 쪽에서 반쯤 쓰인 파일이 보이는 일은 없습니다.
+    새로 저장했으면 True 를 반환합니다.
+    """
+    path = shard_path(root, object_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _locked(root):
+        if os.path.exists(path):
+            _write_refs(path, _read_refs(path) + 1)
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        _write_refs(path, 1)
+        if fsync:
+            _fsync_dir(os.path.dirname(path))
+        return True
+
+def release(root: str, object_key: str) -> Optional[int]:
+    """
+    참조 하나를 해제합니다. 남은 참조 수를 반환하며 0 이면 파일을 지웁니다.
+    파일이 없으면 None.
+    """
+    path = resolve(root, object_key)
+    if path is None:
+        return None
+    with _locked(root):
+        if not os.path.exists(path):
+            return None
+        remaining = _read_refs(path) - 1
+        if remaining > 0:
+            _write_refs(path, remaining)
+            return remaining
+        os.remove(path)
+        try:
+            os.remove(_refs_path(path))
+        except FileNotFoundError:
+            pass
+        return 0
+
+def add_alias(root: str, legacy_key: str, object_key: str):
+    """예전 키로도 찾을 수 있도록 별칭 파일을 남깁니다."""
+    alias_dir = os.path.join(root, ALIASES_DIR_NAME)
+    os.makedirs(alias_dir, exist_ok=True)
+    with open(os.path.join(alias_dir, legacy_key), "w") as f:
+        f.write(object_key)
+
+def remove_alias(root: str, legacy_key: str):
+    if LEGACY_KEY_RE.match(legacy_key) and not HASH_KEY_RE.match(legacy_key):
+        try:
+            os.remove(os.path.join(root, ALIASES_DIR_NAME, legacy_key))
+        except FileNotFoundError:
+            pass
+
+def copy_into_store(root: str, source_path: str, filename: str) -> str:
+    """기존 파일을 저장소로 복사합니다. (마이그레이션용) object_key 를 반환합니다."""
+    object_key = make_key(hash_file(source_path), filename)
+    path = shard_path(root, object_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    shutil.copyfile(source_path, tmp_path)
+    commit(root, tmp_path, object_key)
+    return object_key
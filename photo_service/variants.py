@@ -0,0 +1,99 @@
+import os
+import uuid
+from io import BytesIO
+from typing import Optional
+from PIL import Image
+
+# 미리 만들어 두는 파생 이미지 너비 (px). ?w= 요청은 이 중 가장 가까운 큰 값으로 맞춥니다.
+VARIANT_WIDTHS = sorted(int(w) for w in os.environ.get("PHOTO_VARIANT_WIDTHS", "120,240,480").split(","))
+
+# 포맷별 PIL 저장 옵션과 Content-Type
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+# 업로드 시 미리 생성하는 포맷 (PNG 는 요청이 있을 때만 생성)
+DEFAULT_FORMATS = ("webp", "jpeg")
+
+VARIANTS_DIR_NAME = "_variants"
+
+def negotiate_format(accept: Optional[str]) -> Optional[str]:
+    """
+    Accept 헤더로 응답 포맷을 고릅니다. 명시적인 이미지 타입이 없으면 None (원본 그대로).
+    브라우저의 <img> 요청은 보통 image/webp 를 포함합니다.
+    """
+    if not accept:
+        return None
+    accept = accept.lower()
+    if "image/webp" in accept:
+        return "webp"
+    if "image/jpeg" in accept or "image/*" in accept:
+        return "jpeg"
+    if "image/png" in accept:
+        return "png"
+    return None
+
+def snap_width(width: Optional[int]) -> Optional[int]:
+    """요청 너비를 미리 정한 너비 중 하나로 맞춥니다. (임의 크기로 캐시가 늘어나는 것 방지)"""
+    if not width or width <= 0:
+        return None
+    for candidate in VARIANT_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return VARIANT_WIDTHS[-1]
+
+def variant_dir(photos_dir: str, object_key: str) -> str:
+    """파생 이미지 디렉터리. 원본과 같은 ab/cd 샤딩을 사용합니다."""
+    return os.path.join(photos_dir, VARIANTS_DIR_NAME, object_key[0:2], object_key[2:4], object_key)
+
+def variant_path(photos_dir: str, object_key: str, width: Optional[int], fmt: str) -> str:
+    name = f"{width or 'orig'}.{fmt}"
+    return os.path.join(variant_dir(photos_dir, object_key), name)
+
+def render_variant(source_path: str, width: Optional[int], fmt: str) -> bytes:
+    """원본을 지정한 너비(비율 유지, 확대 없음)와 포맷으로 인코딩합니다."""
+    pil_format, _, options = FORMATS[fmt]
+    with Image.open(source_path) as image:
+        image.load()
+        if width and image.size[0] > width:
+            height = max(1, round(image.size[1] * width / image.size[0]))
+            image = image.resize((width, height), resample=Image.LANCZOS)
+        if fmt == "jpeg" and image.mode != "RGB":
+            # JPEG 는 투명도가 없으므로 흰 배경 위에 합성합니다.
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.split()[-1])
+            image = background
+        bytes_stream = BytesIO()
+        image.save(bytes_stream, pil_format, **options)
+        return bytes_stream.getvalue()
+
+def write_variant(path: str, data: bytes):
+    """다른 요청이 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체합니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def ensure_variant(photos_dir: str, object_key: str, source_path: str, width: Optional[int], fmt: str) -> str:
+    """파생 이미지가 없으면 만들어 디스크에 캐시하고 경로를 반환합니다. (블로킹 - 스레드풀에서 호출)"""
+    path = variant_path(photos_dir, object_key, width, fmt)
+    if not os.path.exists(path):
+        write_variant(path, render_variant(source_path, width, fmt))
+    return path
+
+def generate_defaults(photos_dir: str, object_key: str, source_path: str) -> list:
+    """업로드 직후 기본 크기 x 기본 포맷 파생 이미지를 미리 만듭니다. 이미지가 아니면 빈 리스트."""
+    try:
+        with Image.open(source_path) as image:
+            image.verify()
+    except Exception:
+        return []
+    created = []
+    for width in VARIANT_WIDTHS:
+        for fmt in DEFAULT_FORMATS:
+            ensure_variant(photos_dir, object_key, source_path, width, fmt)
+            created.append(f"{width}.{fmt}")
+    return created